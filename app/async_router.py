@@ -0,0 +1,117 @@
+"""
+Versiones async de los GET más usados del catálogo (solo con DB_ASYNC=1).
+
+Se registran antes que los routers síncronos, así que para la misma ruta y método
+gana esta versión; las escrituras siguen en los routers de siempre con la sesión
+síncrona. No aparecen en el esquema OpenAPI porque su contrato es idéntico al de
+las rutas síncronas que reemplazan.
+
+Los ids usan el convertidor ``:int`` para que rutas literales de los routers
+síncronos (``/furniture/export``, ``/posts/inactive``) no queden tapadas.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud_category, crud_furniture, crud_post, database, http_cache, schemas
+
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/furniture/", response_model=List[schemas.FurnitureOut], tags=["furniture"])
+async def list_furniture(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    category_id: Optional[int] = None,
+    category_ids: Optional[List[int]] = Query(None),
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    stamp = await crud_furniture.furniture_list_stamp_async(db, category_id=category_id, category_ids=category_ids)
+    not_modified = http_cache.check(request, response, stamp, collection=True)
+    if not_modified is not None:
+        return not_modified
+    return await crud_furniture.get_all_furniture_async(db, skip, limit, category_id, category_ids)
+
+
+@router.get("/furniture/search", response_model=List[schemas.FurnitureOut], tags=["furniture"])
+async def search_furniture(
+    request: Request,
+    response: Response,
+    term: Optional[str] = None,
+    category_id: Optional[int] = None,
+    category_ids: Optional[List[int]] = Query(None),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    stamp = await crud_furniture.furniture_list_stamp_async(db, term, category_id, category_ids, min_price, max_price)
+    not_modified = http_cache.check(request, response, stamp, collection=True)
+    if not_modified is not None:
+        return not_modified
+    return await crud_furniture.search_furniture_async(db, term, category_id, category_ids, min_price, max_price, skip, limit)
+
+
+@router.get("/furniture/categories", response_model=List[schemas.CategoryOut], tags=["furniture"])
+async def get_categories(db: AsyncSession = Depends(database.get_async_db)):
+    return await crud_category.get_all_categories_async(db)
+
+
+@router.get("/furniture/categories/{category_id:int}", response_model=schemas.CategoryOut, tags=["furniture"])
+async def get_category(category_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    cat = await crud_category.get_category_by_id_async(db, category_id)
+    if not cat:
+        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+    return cat
+
+
+@router.get("/furniture/{furniture_id:int}", response_model=schemas.FurnitureOut, tags=["furniture"])
+async def get_furniture(furniture_id: int, request: Request, response: Response,
+                        db: AsyncSession = Depends(database.get_async_db)):
+    stamp = await crud_furniture.furniture_stamp_async(db, furniture_id)
+    if stamp is None:
+        raise HTTPException(status_code=404, detail="Mueble no encontrado")
+    not_modified = http_cache.check(request, response, stamp)
+    if not_modified is not None:
+        return not_modified
+    furniture = await crud_furniture.get_furniture_async(db, furniture_id)
+    if not furniture:
+        raise HTTPException(status_code=404, detail="Mueble no encontrado")
+    return furniture
+
+
+@router.get("/furniture/{furniture_id:int}/posts", response_model=List[schemas.PostOut], tags=["furniture"])
+async def list_posts_for_furniture(
+    furniture_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(database.get_async_db)
+):
+    return await crud_post.get_posts_by_furniture_async(db, furniture_id, skip, limit)
+
+
+@router.get("/posts/", response_model=List[schemas.PostOut], tags=["posts"])
+async def list_posts(request: Request, response: Response, skip: int = 0, limit: int = 100,
+                     db: AsyncSession = Depends(database.get_async_db)):
+    not_modified = http_cache.check(request, response, await crud_post.posts_stamp_async(db), collection=True)
+    if not_modified is not None:
+        return not_modified
+    return await crud_post.get_all_posts_async(db, skip, limit)
+
+
+@router.get("/posts/furniture/{furniture_id:int}", response_model=List[schemas.PostOut], tags=["posts"])
+async def get_posts_by_furniture(furniture_id: int, skip: int = 0, limit: int = 100,
+                                 db: AsyncSession = Depends(database.get_async_db)):
+    return await crud_post.get_posts_by_furniture_async(db, furniture_id, skip, limit)
+
+
+@router.get("/posts/{post_id:int}", response_model=schemas.PostOut, tags=["posts"])
+async def get_post(post_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    post = await crud_post.get_post_async(db, post_id)
+    if not post or not post.is_active:
+        raise HTTPException(status_code=404, detail="Publicación no encontrada")
+    return post
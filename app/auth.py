@@ -1,9 +1,15 @@
+from collections import OrderedDict
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Dict, Optional, Set, Tuple
+import threading
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 from . import database, models
 from .config import settings
 
@@ -12,37 +18,189 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib y jose se importan en el primer uso: ninguno hace falta para arrancar el worker
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                from passlib.context import CryptContext
+
+                # min/max = rounds: cualquier hash con otro costo se marca para rehash al hacer login
+                _pwd_context = CryptContext(
+                    schemes=["bcrypt"],
+                    deprecated="auto",
+                    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+                    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+                    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+                )
+    return _pwd_context
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# ===== Pool dedicado para bcrypt =====
+# Cada hash cuesta ~250 ms de CPU; limitarlos a PASSWORD_HASH_WORKERS hilos evita que una
+# ráfaga de logins acapare la CPU del worker. Si hay más de workers + cola en vuelo se
+# responde 503 de inmediato en lugar de encolar sin límite.
+#
+# Las funciones de hash son async: el endpoint espera el Future del pool sin ocupar un
+# hilo del threadpool de AnyIO ni una conexión (los endpoints de auth cierran su sesión
+# antes de hashear). Aun así la capacidad se acota a la mitad del threadpool y del pool
+# de conexiones, porque cada login en vuelo hace sus consultas cortas en ambos.
+_hash_workers = max(1, settings.PASSWORD_HASH_WORKERS)
+_hash_capacity = max(1, min(
+    _hash_workers + max(0, settings.PASSWORD_HASH_QUEUE),
+    min(settings.THREADPOOL_LIMIT, settings.DB_POOL_SIZE) // 2,
+))
+_hash_pool = ThreadPoolExecutor(max_workers=_hash_workers, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(_hash_capacity)
+
+async def _run_hashing(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servicio de autenticación saturado, intenta de nuevo",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.wrap_future(_hash_pool.submit(fn, *args))
+    finally:
+        _hash_slots.release()
+
 # Funciones de password
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await _run_hashing(get_pwd_context().verify, plain_password, hashed_password)
+
+async def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """Verifica y, si el hash usa otro costo, devuelve el hash nuevo para guardarlo."""
+    return await _run_hashing(get_pwd_context().verify_and_update, plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await _run_hashing(get_pwd_context().hash, password)
 
 # Funciones de JWT
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
+    from jose import jwt
+
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ===== Caché de usuarios autenticados =====
+@dataclass(frozen=True)
+class Principal:
+    """Lo mínimo que necesitan las dependencias de auth; no está ligado a ninguna sesión."""
+    id: int
+    email: str
+    is_admin: bool
+    is_active: bool
+
+# token -> (expira_en, principal); acotada por tamaño (LRU) y por la expiración del token
+_principal_cache: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+_tokens_by_email: Dict[str, Set[str]] = {}
+_principal_lock = threading.Lock()
+# Sube con cada invalidación: una lectura que empezó antes no se guarda (ver _cache_put)
+_principal_generation = 0
+
+def _cache_get(token: str) -> Optional[Principal]:
+    with _principal_lock:
+        entry = _principal_cache.get(token)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at <= time.time():
+            _cache_drop(token)
+            return None
+        _principal_cache.move_to_end(token)
+        return principal
+
+def _cache_put(token: str, principal: Principal, exp: Optional[float], generation: int) -> None:
+    if settings.AUTH_CACHE_MAX_ENTRIES <= 0:
+        return
+    expires_at = float(exp) if exp else time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    if settings.AUTH_CACHE_TTL_SECONDS > 0:
+        expires_at = min(expires_at, time.time() + settings.AUTH_CACHE_TTL_SECONDS)
+    with _principal_lock:
+        # Hubo una escritura de usuarios mientras se leía: la fila puede ser la vieja
+        if generation != _principal_generation:
+            return
+        _principal_cache[token] = (expires_at, principal)
+        _principal_cache.move_to_end(token)
+        _tokens_by_email.setdefault(principal.email, set()).add(token)
+        while len(_principal_cache) > settings.AUTH_CACHE_MAX_ENTRIES:
+            _cache_drop(next(iter(_principal_cache)))
+
+def _cache_drop(token: str) -> None:
+    # Llamar con _principal_lock tomado
+    entry = _principal_cache.pop(token, None)
+    if entry is None:
+        return
+    tokens = _tokens_by_email.get(entry[1].email)
+    if tokens is not None:
+        tokens.discard(token)
+        if not tokens:
+            del _tokens_by_email[entry[1].email]
+
+def invalidate_principal(email: str) -> None:
+    """Olvida todos los tokens cacheados de un usuario (p. ej. al desactivarlo)."""
+    global _principal_generation
+    with _principal_lock:
+        _principal_generation += 1
+        for token in list(_tokens_by_email.get(email, ())):
+            _cache_drop(token)
+
+# La caché es por proceso: los demás workers de gunicorn solo ven una desactivación o
+# un cambio de rol cuando vence AUTH_CACHE_TTL_SECONDS. En este proceso se invalida al
+# hacer flush y otra vez tras el commit, porque entre ambos otra petición pudo leer
+# la fila vieja.
+def _invalidate_emails(session, emails) -> None:
+    for email in emails:
+        invalidate_principal(email)
+    if session is not None:
+        session.info.setdefault("principals_changed", set()).update(emails)
+
+@event.listens_for(models.User, "after_update")
+def _invalidate_on_user_update(mapper, connection, target):
+    state = inspect(target)
+    changed = any(state.attrs[attr].history.has_changes() for attr in ("is_active", "is_admin", "email"))
+    if changed:
+        # si cambió el email, los tokens viejos están indexados bajo el anterior
+        emails = {target.email, *(state.attrs.email.history.deleted or ())}
+        _invalidate_emails(object_session(target), emails)
+
+@event.listens_for(models.User, "after_delete")
+def _invalidate_on_user_delete(mapper, connection, target):
+    _invalidate_emails(object_session(target), {target.email})
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for email in session.info.pop("principals_changed", ()):
+        invalidate_principal(email)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session):
+    session.info.pop("principals_changed", None)
+
+# Síncrona a propósito: FastAPI la ejecuta en el threadpool y la consulta no bloquea el event loop
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> Principal:
+    # Token ya validado y vigente: evita jwt.decode y el SELECT a users
+    cached = _cache_get(token)
+    if cached is not None:
+        return cached
+    generation = _principal_generation
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciales inválidas",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -57,9 +215,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
 
-    return user
+    principal = Principal(id=user.id, email=user.email, is_admin=bool(user.is_admin), is_active=True)
+    _cache_put(token, principal, payload.get("exp"), generation)
+    return principal
 
-async def get_admin_user(current_user: models.User = Depends(get_current_user)):
+async def get_admin_user(current_user: Principal = Depends(get_current_user)):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="No tienes permisos de administrador")
     return current_user
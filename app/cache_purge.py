@@ -0,0 +1,107 @@
+"""
+Purga del micro-caché de nginx tras las escrituras del catálogo.
+
+nginx guarda unos segundos los GET públicos de ``/api/furniture``, ``/api/posts`` e
+``/api/images`` (``X-Accel-Expires``, ver micro_cache y nginx.conf), así que un pico
+de visitas anónimas lo absorbe nginx. Para que una escritura no espere a que venza
+el caché, este middleware detecta las escrituras exitosas (POST/PUT/PATCH/DELETE
+con 2xx) sobre esas rutas y, con ``NGINX_PURGE_URL``, manda ``PURGE`` con comodín
+para cada prefijo público.
+
+Se purga todo el catálogo y no solo la URL escrita: el detalle de un mueble incluye
+sus imágenes y publicaciones, y los listados y búsquedas dependen de cualquier
+mueble. Por eso se excluyen las reservas y liberaciones de stock, que llegan una
+por checkout: purgar en cada una vaciaría el caché justo durante un pico de ventas,
+y el stock mostrado ya se refresca al vencer ``NGINX_CACHE_SECONDS``. Las demás
+escrituras (ediciones de admin, importaciones por lotes) se agrupan: como mucho una
+purga cada ``NGINX_PURGE_MIN_INTERVAL_SECONDS``.
+
+nginx open source no trae purga: requiere el módulo ``ngx_cache_purge`` (o nginx
+Plus). Sin él se deja ``NGINX_PURGE_URL`` vacío y un cambio tarda como mucho
+``NGINX_CACHE_SECONDS`` en verse; aun así nginx revalida con el ETag, que el app
+contesta con un 304 barato.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Rutas del app (nginx les quita el /api) y claves públicas del caché en nginx
+CATALOG_PATHS = ("/furniture", "/posts", "/images")
+EXCLUDED_PATHS = {"/furniture/stock/reserve", "/furniture/stock/release"}
+PURGE_KEYS = ("/api/furniture/*", "/api/posts/*", "/api/images/*")
+
+_dirty = False
+_task: Optional[asyncio.Task] = None
+
+
+async def purge() -> None:
+    import httpx
+
+    base = settings.NGINX_PURGE_URL.rstrip("/")
+    async with httpx.AsyncClient(timeout=settings.NGINX_PURGE_TIMEOUT_SECONDS) as client:
+        for key in PURGE_KEYS:
+            try:
+                resp = await client.request("PURGE", base + key)
+            except httpx.HTTPError as e:
+                logger.warning(f"No se pudo purgar {key} en nginx: {e}")
+                continue
+            # 404: no había nada en caché con esa clave
+            if resp.status_code not in (200, 404):
+                logger.warning(f"Purga de {key} en nginx respondió {resp.status_code}")
+
+
+async def _purge_loop() -> None:
+    global _dirty
+    # Una escritura que llega durante una purga en curso pide otra vuelta: la
+    # purga en vuelo pudo correr antes de su commit. Entre vueltas se espera el
+    # intervalo mínimo, así una ráfaga de escrituras cuesta una purga más
+    while _dirty:
+        _dirty = False
+        await purge()
+        await asyncio.sleep(settings.NGINX_PURGE_MIN_INTERVAL_SECONDS)
+
+
+def schedule_purge() -> None:
+    """Agenda una purga; las escrituras simultáneas se agrupan en una sola."""
+    global _dirty, _task
+    _dirty = True
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_purge_loop())
+
+
+class CachePurgeMiddleware:
+    """Middleware ASGI: purga el micro-caché tras cada escritura exitosa del catálogo."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in WRITE_METHODS
+            or not settings.NGINX_PURGE_URL
+            or not scope["path"].startswith(CATALOG_PATHS)
+            or scope["path"].rstrip("/") in EXCLUDED_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # El handler ya hizo commit al responder; una escritura fallida no purga
+            if 200 <= status < 300:
+                schedule_purge()
@@ -12,21 +12,98 @@ class Settings:
     MYSQL_PORT: str = os.getenv("MYSQL_PORT")
     MYSQL_DATABASE: str = os.getenv("MYSQL_DATABASE")
 
+    # Pool de conexiones y threadpool de AnyIO (endpoints síncronos). Por defecto el
+    # threadpool no supera las conexiones disponibles: ningún hilo se queda esperando
+    # en el pool y la cola visible es la del threadpool, que es la que se limita abajo.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+    THREADPOOL_LIMIT: int = int(os.getenv("THREADPOOL_LIMIT") or DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # Control de admisión: 503 + Retry-After si hay N tareas esperando hilo en el threadpool
+    ADMISSION_QUEUE_LIMIT: int = int(os.getenv("ADMISSION_QUEUE_LIMIT", str(2 * THREADPOOL_LIMIT)))
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+    # Calentamiento al arrancar: conexiones abiertas por adelantado, consultas
+    # calientes compiladas y caché de categorías; /ready responde 503 hasta terminar
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_POOL_CONNECTIONS: int = int(os.getenv("WARMUP_POOL_CONNECTIONS", str(DB_POOL_SIZE)))
+    WARMUP_TOP_ITEMS: int = int(os.getenv("WARMUP_TOP_ITEMS", "20"))
+    WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "15"))
+    # Caché en memoria de la tabla de categorías (0 = desactivada); los otros workers
+    # ven los cambios a más tardar tras este TTL
+    CATEGORY_CACHE_TTL_SECONDS: float = float(os.getenv("CATEGORY_CACHE_TTL_SECONDS", "60"))
+    # Tope de unidades por mueble en una reserva de stock (POST /furniture/stock/reserve)
+    STOCK_MAX_RESERVE_QUANTITY: int = int(os.getenv("STOCK_MAX_RESERVE_QUANTITY", "20"))
+
     # Seguridad
     SECRET_KEY: str = os.getenv("SECRET_KEY", "clave_secreta_por_defecto_no_usar_en_produccion")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # Caché token -> usuario autenticado (por proceso). El TTL acota cuánto tarda un
+    # usuario desactivado o degradado en perder acceso en los otros workers; 0 = hasta
+    # que expire el token
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+    # bcrypt: costo y pool dedicado (hilos: bcrypt libera el GIL) con cola acotada.
+    # workers + cola se recorta a la mitad de THREADPOOL_LIMIT y de DB_POOL_SIZE (ver auth)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_QUEUE: int = int(os.getenv("PASSWORD_HASH_QUEUE", "4"))
+    # Rate limit de login/registro/reset (token bucket por IP y por email; 0 = sin límite)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_IP_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "30"))
+    RATE_LIMIT_IP_BURST: float = float(os.getenv("RATE_LIMIT_IP_BURST", "10"))
+    RATE_LIMIT_EMAIL_PER_MINUTE: float = float(os.getenv("RATE_LIMIT_EMAIL_PER_MINUTE", "5"))
+    RATE_LIMIT_EMAIL_BURST: float = float(os.getenv("RATE_LIMIT_EMAIL_BURST", "5"))
+    # "memory" (por proceso) o redis://host:6379/0 para compartir entre workers
+    RATE_LIMIT_STORAGE_URL: str = os.getenv("RATE_LIMIT_STORAGE_URL", "memory")
+    # Proxies cuyo X-Forwarded-For se respeta (IPs o CIDR, separados por coma). Por
+    # defecto loopback y las redes privadas, donde Docker crea sus redes: así el nginx
+    # de nginx.conf (que llega a api:8000 por la red del compose) es de confianza. Si
+    # el app es alcanzable en la red privada sin pasar por nginx, fija aquí solo la IP
+    # o red del nginx. "*" confía en cualquier peer y permite falsear la IP.
+    TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7")
 
     # Email
     SMTP_USER: str = os.getenv("SMTP_USER")
     SMTP_PASS: str = os.getenv("SMTP_PASS")
     SMTP_SERVER: str = os.getenv("SMTP_SERVER")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "465"))
+    # TLS implícito (puerto 465); false para un servidor local de pruebas (aiosmtpd)
+    SMTP_USE_TLS: bool = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+    # Outbox: cola en memoria, lotes sobre una conexión reutilizada y reintentos con backoff
+    SMTP_OUTBOX_MAX: int = int(os.getenv("SMTP_OUTBOX_MAX", "1000"))
+    SMTP_BATCH_SIZE: int = int(os.getenv("SMTP_BATCH_SIZE", "20"))
+    SMTP_IDLE_SECONDS: float = float(os.getenv("SMTP_IDLE_SECONDS", "30"))
+    SMTP_MAX_RETRIES: int = int(os.getenv("SMTP_MAX_RETRIES", "5"))
+    SMTP_RETRY_BASE_SECONDS: float = float(os.getenv("SMTP_RETRY_BASE_SECONDS", "2"))
+    SMTP_RETRY_MAX_SECONDS: float = float(os.getenv("SMTP_RETRY_MAX_SECONDS", "300"))
+    SMTP_DRAIN_SECONDS: float = float(os.getenv("SMTP_DRAIN_SECONDS", "10"))
 
     # Aplicación
     APP_NAME: str = os.getenv("APP_NAME", "Mueblería Plaza Reforma")
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
 
+    # Imágenes en disco para que nginx las entregue (vacío = se sirven desde la DB).
+    # Con prefijo X-Accel-Redirect el app solo responde cabeceras y nginx envía el
+    # archivo desde su location interna (ver nginx.conf); sin él se usa FileResponse.
+    IMAGE_STORAGE_DIR: str = os.getenv("IMAGE_STORAGE_DIR", "")
+    IMAGE_ACCEL_REDIRECT_PREFIX: str = os.getenv("IMAGE_ACCEL_REDIRECT_PREFIX", "")
+
+    # Micro-caché de nginx para los GET públicos del catálogo (ver nginx.conf,
+    # app/micro_cache.py y app/cache_purge.py). Segundos que nginx guarda cada
+    # respuesta (X-Accel-Expires; 0 = no cachear) y URL base a la que se envían los
+    # PURGE tras escribir (vacío = sin purga: los cambios se ven al vencer el micro-caché).
+    NGINX_CACHE_SECONDS: int = int(os.getenv("NGINX_CACHE_SECONDS", "5"))
+    NGINX_IMAGE_CACHE_SECONDS: int = int(os.getenv("NGINX_IMAGE_CACHE_SECONDS", "60"))
+    NGINX_PURGE_URL: str = os.getenv("NGINX_PURGE_URL", "")
+    NGINX_PURGE_TIMEOUT_SECONDS: float = float(os.getenv("NGINX_PURGE_TIMEOUT_SECONDS", "2"))
+    NGINX_PURGE_MIN_INTERVAL_SECONDS: float = float(os.getenv("NGINX_PURGE_MIN_INTERVAL_SECONDS", "1"))
+
+    # Perfilado bajo demanda (solo administradores)
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+
     # Validación de base de datos
     def validate_database_settings(self) -> Optional[str]:
         """Valida que todas las configuraciones de base de datos estén presentes"""
@@ -2,8 +2,9 @@ from sqlalchemy.orm import Session
 from . import models, schemas, auth
 from datetime import datetime, timedelta
 import random
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 import re
 import logging
 
@@ -16,46 +17,84 @@ def get_user_by_email(db: Session, email: str):
         logger.error(f"Error al buscar usuario: {e}")
         raise HTTPException(status_code=500, detail="Error al buscar usuario")
 
-def create_user(db: Session, user: schemas.UserCreate):
+# Los flujos con bcrypt son async: las consultas van al threadpool en llamadas cortas y
+# la sesión se cierra antes de hashear, así el hash (~250 ms en el pool de auth) no
+# retiene ni un hilo del threadpool ni una conexión del pool.
+def _release(db: Session):
+    # Devuelve la conexión al pool; los objetos cargados quedan desligados pero legibles
+    db.close()
+
+def _validate_password(password: str, strict: bool = True):
+    if len(password) < 8:
+        raise HTTPException(status_code=400, detail="La contraseña debe tener al menos 8 caracteres")
+    if not strict:
+        return
+    # Validar complejidad de la contraseña (opcional)
+    if not re.search(r'[A-Z]', password):
+        raise HTTPException(status_code=400, detail="La contraseña debe contener al menos una letra mayúscula")
+    if not re.search(r'[0-9]', password):
+        raise HTTPException(status_code=400, detail="La contraseña debe contener al menos un número")
+
+def _check_new_user(db: Session, user: schemas.UserCreate, strict: bool):
     try:
         # Verificar si ya existe un usuario con ese email
-        existing_user = get_user_by_email(db, user.email)
-        if existing_user:
+        if get_user_by_email(db, user.email):
             raise HTTPException(status_code=400, detail="El correo electrónico ya está registrado")
+        _validate_password(user.password, strict)
+    finally:
+        _release(db)
 
-        # Validar contraseña
-        if len(user.password) < 8:
-            raise HTTPException(status_code=400, detail="La contraseña debe tener al menos 8 caracteres")
-
-        # Validar complejidad de la contraseña (opcional)
-        if not re.search(r'[A-Z]', user.password):
-            raise HTTPException(status_code=400, detail="La contraseña debe contener al menos una letra mayúscula")
-
-        if not re.search(r'[0-9]', user.password):
-            raise HTTPException(status_code=400, detail="La contraseña debe contener al menos un número")
-
-        hashed_password = auth.get_password_hash(user.password)
-        db_user = models.User(email=user.email, hashed_password=hashed_password)
+def _insert_user(db: Session, user: schemas.UserCreate, hashed_password: str, is_admin: bool):
+    try:
+        db_user = models.User(email=user.email, hashed_password=hashed_password, is_admin=is_admin)
         db.add(db_user)
         db.commit()
         db.refresh(db_user)
         return db_user
-    except HTTPException:
-        raise
+    except IntegrityError:
+        # Otro registro con el mismo email ganó la carrera mientras se hasheaba
+        db.rollback()
+        raise HTTPException(status_code=400, detail="El correo electrónico ya está registrado")
     except SQLAlchemyError as e:
         db.rollback()
-        logger.error(f"Error al crear usuario: {e}")
-        raise HTTPException(status_code=500, detail="Error al crear usuario")
+        label = "usuario administrador" if is_admin else "usuario"
+        logger.error(f"Error al crear {label}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error al crear {label}")
 
-def authenticate_user(db: Session, email: str, password: str):
+async def create_user(db: Session, user: schemas.UserCreate):
+    await run_in_threadpool(_check_new_user, db, user, True)
+    hashed_password = await auth.get_password_hash(user.password)
+    return await run_in_threadpool(_insert_user, db, user, hashed_password, False)
+
+def _get_login_user(db: Session, email: str):
     try:
-        user = get_user_by_email(db, email)
+        return get_user_by_email(db, email)
+    finally:
+        _release(db)
+
+def _save_password_hash(db: Session, user_id: int, new_hash: str):
+    # Rehash oportunista: el hash guardado usa un costo distinto a BCRYPT_ROUNDS
+    try:
+        db.query(models.User).filter(models.User.id == user_id).update(
+            {models.User.hashed_password: new_hash}, synchronize_session=False
+        )
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"No se pudo actualizar el hash del usuario {user_id}: {e}")
+
+async def authenticate_user(db: Session, email: str, password: str):
+    try:
+        user = await run_in_threadpool(_get_login_user, db, email)
         if not user:
             return False
-        if not auth.verify_password(password, user.hashed_password):
+        valid, new_hash = await auth.verify_and_update_password(password, user.hashed_password)
+        if not valid:
             return False
         if not user.is_active:
             raise HTTPException(status_code=400, detail="Usuario inactivo")
+        if new_hash:
+            await run_in_threadpool(_save_password_hash, db, user.id, new_hash)
         return user
     except HTTPException:
         raise
@@ -90,28 +129,30 @@ def verify_reset_code(db: Session, email: str, code: str):
         logger.exception(f"Error al verificar código: {e}")
         raise HTTPException(status_code=500, detail="Error al verificar código")
 
-def reset_password(db: Session, email: str, code: str, new_password: str):
+def _reset_code_ok(user, code: str) -> bool:
+    return bool(user) and user.reset_code == code and user.reset_code_expiry > datetime.utcnow()
+
+def _check_reset(db: Session, email: str, code: str, new_password: str) -> bool:
     try:
-        user = get_user_by_email(db, email)
-        if not user:
-            return False
-        if user.reset_code != code:
+        if not _reset_code_ok(get_user_by_email(db, email), code):
             return False
-        if user.reset_code_expiry <= datetime.utcnow():
-            return False
-
-        # Validar contraseña
-        if len(new_password) < 8:
-            raise HTTPException(status_code=400, detail="La contraseña debe tener al menos 8 caracteres")
-
-        # Validar complejidad de la contraseña (opcional)
-        if not re.search(r'[A-Z]', new_password):
-            raise HTTPException(status_code=400, detail="La contraseña debe contener al menos una letra mayúscula")
-
-        if not re.search(r'[0-9]', new_password):
-            raise HTTPException(status_code=400, detail="La contraseña debe contener al menos un número")
+        _validate_password(new_password)
+        return True
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        logger.error(f"Error al verificar código: {e}")
+        raise HTTPException(status_code=500, detail="Error al restablecer contraseña")
+    finally:
+        _release(db)
 
-        user.hashed_password = auth.get_password_hash(new_password)
+def _save_reset_password(db: Session, email: str, code: str, hashed_password: str) -> bool:
+    try:
+        user = get_user_by_email(db, email)
+        # El código se vuelve a comprobar: pudo usarse mientras se hasheaba
+        if not _reset_code_ok(user, code):
+            return False
+        user.hashed_password = hashed_password
         user.reset_code = None
         user.reset_code_expiry = None
         db.commit()
@@ -123,31 +164,14 @@ def reset_password(db: Session, email: str, code: str, new_password: str):
         logger.error(f"Error al restablecer contraseña: {e}")
         raise HTTPException(status_code=500, detail="Error al restablecer contraseña")
 
-def create_admin_user(db: Session, user: schemas.UserCreate):
-    """Función para crear un usuario administrador"""
-    try:
-        # Verificar si ya existe un usuario con ese email
-        existing_user = get_user_by_email(db, user.email)
-        if existing_user:
-            raise HTTPException(status_code=400, detail="El correo electrónico ya está registrado")
-
-        # Validar contraseña
-        if len(user.password) < 8:
-            raise HTTPException(status_code=400, detail="La contraseña debe tener al menos 8 caracteres")
+async def reset_password(db: Session, email: str, code: str, new_password: str):
+    if not await run_in_threadpool(_check_reset, db, email, code, new_password):
+        return False
+    hashed_password = await auth.get_password_hash(new_password)
+    return await run_in_threadpool(_save_reset_password, db, email, code, hashed_password)
 
-        hashed_password = auth.get_password_hash(user.password)
-        db_user = models.User(
-            email=user.email, 
-            hashed_password=hashed_password,
-            is_admin=True
-        )
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        return db_user
-    except HTTPException:
-        raise
-    except SQLAlchemyError as e:
-        db.rollback()
-        logger.error(f"Error al crear usuario administrador: {e}")
-        raise HTTPException(status_code=500, detail="Error al crear usuario administrador")
+async def create_admin_user(db: Session, user: schemas.UserCreate):
+    """Función para crear un usuario administrador"""
+    await run_in_threadpool(_check_new_user, db, user, False)
+    hashed_password = await auth.get_password_hash(user.password)
+    return await run_in_threadpool(_insert_user, db, user, hashed_password, True)
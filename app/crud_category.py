@@ -1,11 +1,89 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import TYPE_CHECKING, List, Optional
+import threading
+import time
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException, status
 
 from . import models, schemas
+from .config import settings
 from .image_utils import validate_base64_image
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# ===== Caché de categorías =====
+# La tabla es pequeña y casi no cambia: los GET públicos se sirven desde memoria.
+# Se invalida al escribir categorías en este proceso (eventos de mapper y, de nuevo,
+# tras el commit) y caduca tras CATEGORY_CACHE_TTL_SECONDS para recoger los cambios
+# hechos en otros workers. Las escrituras de muebles siguen validando contra la DB.
+_cache_lock = threading.Lock()
+_cache_generation = 0
+_cache_entry = None  # (cargada_en, categorías ordenadas por nombre, por id)
+
+
+def _cache_get():
+    entry = _cache_entry
+    if entry is None or time.monotonic() - entry[0] >= settings.CATEGORY_CACHE_TTL_SECONDS:
+        return None
+    return entry
+
+
+def _cache_store(rows, generation: int) -> List[schemas.CategoryOut]:
+    global _cache_entry
+    ordered = [schemas.CategoryOut.from_orm(c) for c in rows]
+    with _cache_lock:
+        # Si hubo una escritura mientras se leía, la lectura puede ser vieja: no se guarda
+        if generation == _cache_generation and settings.CATEGORY_CACHE_TTL_SECONDS > 0:
+            _cache_entry = (time.monotonic(), ordered, {c.id: c for c in ordered})
+    return ordered
+
+
+def invalidate_category_cache() -> None:
+    global _cache_entry, _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        _cache_entry = None
+
+
+def load_category_cache(db: Session) -> List[schemas.CategoryOut]:
+    """Lee la tabla completa y la deja en caché (usado también por el warm-up)."""
+    generation = _cache_generation
+    try:
+        rows = db.query(models.Category).order_by(models.Category.name.asc()).all()
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Error al listar categorías")
+    return _cache_store(rows, generation)
+
+
+def get_category_cached(db: Session, category_id: int):
+    """Categoría para los GET públicos; si no está en caché (p. ej. recién creada en otro worker) va a la DB."""
+    entry = _cache_get()
+    if entry is None:
+        entry = (None, None, {c.id: c for c in load_category_cache(db)})
+    cat = entry[2].get(category_id)
+    return cat if cat is not None else get_category_by_id(db, category_id)
+
+
+def _mark_categories_changed(mapper, connection, target):
+    invalidate_category_cache()
+    session = object_session(target)
+    if session is not None:
+        session.info["categories_changed"] = True
+
+
+for _evt in ("after_insert", "after_update", "after_delete"):
+    event.listen(models.Category, _evt, _mark_categories_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    # Un lector concurrente pudo recargar la caché entre el flush y el commit
+    if session.info.pop("categories_changed", False):
+        invalidate_category_cache()
+
 
 def create_category(db: Session, category: schemas.CategoryCreate) -> models.Category:
     try:
@@ -37,13 +115,34 @@ def get_category_by_id(db: Session, category_id: int) -> Optional[models.Categor
         raise HTTPException(status_code=500, detail="Error al obtener categoría")
 
 
-def get_all_categories(db: Session, skip: int = 0, limit: int = 100) -> List[models.Category]:
+def get_all_categories(db: Session, skip: int = 0, limit: int = 100) -> List[schemas.CategoryOut]:
+    limit = max(1, min(500, int(limit)))
+    skip = max(0, int(skip))
+    entry = _cache_get()
+    categories = entry[1] if entry is not None else load_category_cache(db)
+    return categories[skip:skip + limit]
+
+
+async def get_category_by_id_async(db: "AsyncSession", category_id: int) -> Optional[models.Category]:
+    try:
+        result = await db.execute(select(models.Category).where(models.Category.id == category_id))
+        return result.scalars().first()
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Error al obtener categoría")
+
+
+async def get_all_categories_async(db: "AsyncSession", skip: int = 0, limit: int = 100) -> List[schemas.CategoryOut]:
+    limit = max(1, min(500, int(limit)))
+    skip = max(0, int(skip))
+    entry = _cache_get()
+    if entry is not None:
+        return entry[1][skip:skip + limit]
+    generation = _cache_generation
     try:
-        limit = max(1, min(500, int(limit)))
-        skip = max(0, int(skip))
-        return db.query(models.Category).order_by(models.Category.name.asc()).offset(skip).limit(limit).all()
+        result = await db.execute(select(models.Category).order_by(models.Category.name.asc()))
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Error al listar categorías")
+    return _cache_store(result.scalars().all(), generation)[skip:skip + limit]
 
 
 def update_category(db: Session, category_id: int, category: schemas.CategoryUpdate) -> models.Category:
@@ -2,16 +2,22 @@ from __future__ import annotations
 
 import base64
 import hashlib
+from datetime import datetime, timezone
 from decimal import Decimal
-from typing import List, Optional, Dict
+from typing import TYPE_CHECKING, List, Optional, Dict
 
 from fastapi import HTTPException, status
+from sqlalchemy import case, func, inspect, select, update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session, defer, noload, selectinload
 
 from . import models, schemas
+from .config import settings
 from .crud_category import get_category_by_id
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 
 # ====================== Helpers base ======================
 
@@ -47,6 +53,22 @@ def _split_data_url(s: str) -> tuple[Optional[str], str]:
         return mime, payload
     return None, s
 
+def _decode_images(images_b64: List[str], dedupe: bool = True) -> List[tuple[str, bytes, bytes]]:
+    """Decodifica base64 (con o sin data URL) a (mime, bytes, sha256), opcionalmente sin repetidos."""
+    decoded, seen = [], set()
+    for raw in images_b64:
+        mime, payload = _split_data_url(raw)
+        try:
+            data = base64.b64decode(payload, validate=True)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Imagen base64 inválida")
+        sha = hashlib.sha256(data).digest()
+        if dedupe and sha in seen:
+            continue
+        seen.add(sha)
+        decoded.append((mime or "application/octet-stream", data, sha))
+    return decoded
+
 def _to_data_url(mime: str, data: bytes) -> str:
     return f"data:{mime};base64," + base64.b64encode(data).decode("ascii")
 
@@ -143,6 +165,134 @@ def get_furniture(db: Session, furniture_id: int) -> Optional[models.Furniture]:
         raise HTTPException(status_code=500, detail="Error al obtener mueble")
 
 
+def _get_furniture_for_write(db: Session, furniture_id: int) -> models.Furniture:
+    """
+    Cargador del camino de escritura: solo columnas escalares, sin posts ni imágenes
+    (noload) y sin la columna legado img_base64, que puede pesar varios MB.
+    404 si no existe.
+    """
+    obj = (
+        db.query(models.Furniture)
+        .options(noload("*"), defer(models.Furniture.img_base64))
+        .filter(models.Furniture.id == furniture_id)
+        .first()
+    )
+    return _ensure_found(obj, "Mueble")
+
+
+def _reload_images(db: Session, objs: List[models.FurnitureImage]) -> List[models.FurnitureImage]:
+    """Recarga en una sola consulta las imágenes recién creadas (expiradas por el commit)."""
+    if not objs:
+        return []
+    # inspect().identity no dispara la recarga por objeto que haría o.id tras el commit
+    ids = [inspect(o).identity[0] for o in objs]
+    by_id = {o.id: o for o in db.query(models.FurnitureImage).filter(models.FurnitureImage.id.in_(ids)).populate_existing()}
+    return [by_id[i] for i in ids]
+
+
+def _furniture_criteria(
+        term: Optional[str] = None,
+        category_id: Optional[str] = None,
+        category_ids: Optional[List[int]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+) -> list:
+    """Filtros comunes de listado/búsqueda (válidos para Query.filter y select().where)."""
+    criteria = []
+    if term:
+        like = f"%{term.strip()}%"
+        criteria.append(
+            (models.Furniture.name.ilike(like)) |
+            (models.Furniture.description.ilike(like))
+        )
+    # Filtrar por lista de categorías si se provee, si no usar category_id
+    if category_ids:
+        criteria.append(models.Furniture.category_id.in_(category_ids))
+    elif category_id:
+        criteria.append(models.Furniture.category_id == category_id)
+
+    if min_price is not None:
+        criteria.append(models.Furniture.price >= float(min_price))
+
+    if max_price is not None:
+        criteria.append(models.Furniture.price <= float(max_price))
+    return criteria
+
+
+# ====================== Validadores HTTP (ETag / Last-Modified) ======================
+# updated_at del mueble cubre todo su JSON: las escrituras de imágenes lo marcan aquí
+# y las de posts vía evento en crud_post. Un listado se resume en (count, max(updated_at))
+# del conjunto filtrado, una agregación sobre índices sin cargar filas ni blobs.
+
+def _stamp_stmt(criteria: list):
+    return select(func.count(models.Furniture.id), func.max(models.Furniture.updated_at)).where(*criteria)
+
+
+def furniture_list_stamp(
+        db: Session,
+        term: Optional[str] = None,
+        category_id: Optional[str] = None,
+        category_ids: Optional[List[int]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+) -> tuple:
+    """(count, max(updated_at)) de los muebles que cumplen los filtros."""
+    try:
+        return tuple(db.execute(_stamp_stmt(_furniture_criteria(term, category_id, category_ids, min_price, max_price))).one())
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Error al listar muebles")
+
+
+def furniture_stamp(db: Session, furniture_id: int) -> Optional[tuple]:
+    """(1, updated_at) del mueble o None si no existe."""
+    try:
+        row = db.execute(select(models.Furniture.updated_at).where(models.Furniture.id == furniture_id)).first()
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Error al obtener mueble")
+    return None if row is None else (1, row[0])
+
+
+async def furniture_list_stamp_async(
+        db: AsyncSession,
+        term: Optional[str] = None,
+        category_id: Optional[str] = None,
+        category_ids: Optional[List[int]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+) -> tuple:
+    try:
+        result = await db.execute(_stamp_stmt(_furniture_criteria(term, category_id, category_ids, min_price, max_price)))
+        return tuple(result.one())
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Error al listar muebles")
+
+
+async def furniture_stamp_async(db: AsyncSession, furniture_id: int) -> Optional[tuple]:
+    try:
+        result = await db.execute(select(models.Furniture.updated_at).where(models.Furniture.id == furniture_id))
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Error al obtener mueble")
+    row = result.first()
+    return None if row is None else (1, row[0])
+
+
+def _furniture_order(order_by: str):
+    mapping = {
+        "created_at": models.Furniture.created_at,
+        "price": models.Furniture.price,
+        "name": models.Furniture.name,
+        "stock": models.Furniture.stock,
+    }
+    descending = order_by.startswith("-")
+    key = order_by[1:] if descending else order_by
+    col = mapping.get(key, models.Furniture.created_at)
+    return col.desc() if descending else col.asc()
+
+
+def _page(skip: int, limit: int) -> tuple[int, int]:
+    return max(0, int(skip)), max(1, min(500, int(limit)))
+
+
 def get_all_furniture(
         db: Session,
         skip: int = 0,
@@ -156,77 +306,49 @@ def get_all_furniture(
             selectinload(models.Furniture.images),
         )
         # Filtrar por category_id (compatibilidad) o por category_ids (lista)
-        if category_ids:
-            # asegurarse que category_ids sea lista de ints
-            q = q.filter(models.Furniture.category_id.in_(category_ids))
-        elif category_id:
-            q = q.filter(models.Furniture.category_id == category_id)
-
-        mapping = {
-            "created_at": models.Furniture.created_at,
-            "price": models.Furniture.price,
-            "name": models.Furniture.name,
-            "stock": models.Furniture.stock,
-        }
-        descending = order_by.startswith("-")
-        key = order_by[1:] if descending else order_by
-        col = mapping.get(key, models.Furniture.created_at)
-        q = q.order_by(col.desc() if descending else col.asc())
-
-        limit = max(1, min(500, int(limit)))
-        skip = max(0, int(skip))
+        q = q.filter(*_furniture_criteria(category_id=category_id, category_ids=category_ids))
+        q = q.order_by(_furniture_order(order_by))
+
+        skip, limit = _page(skip, limit)
         return q.offset(skip).limit(limit).all()
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Error al listar muebles")
 
 
 def update_furniture(db: Session, furniture_id: int, furniture: schemas.FurnitureUpdate) -> models.Furniture:
-    db_obj = _ensure_found(get_furniture(db, furniture_id), "Mueble")
+    db_obj = _get_furniture_for_write(db, furniture_id)
     data = furniture.dict(exclude_unset=True)
 
     # Si vienen imágenes, reemplazamos toda la colección
     if "images" in data:
         imgs = data.get("images")
-        if imgs is None:
-            # borrar todas
-            db.query(models.FurnitureImage).filter(
-                models.FurnitureImage.furniture_id == db_obj.id
-            ).delete(synchronize_session=False)
-            db_obj.img_base64 = None
-        else:
-            if not isinstance(imgs, list):
-                raise HTTPException(status_code=422, detail="El campo 'images' debe ser una lista de cadenas")
-            cleaned = [s.strip() for s in imgs if isinstance(s, str) and s.strip()]
-            # reemplazo completo
-            db.query(models.FurnitureImage).filter(
-                models.FurnitureImage.furniture_id == db_obj.id
-            ).delete(synchronize_session=False)
-            db.flush()
-            _insert_images_blob(db, db_obj, cleaned, start_position=0, dedupe=True)
-            _sync_legacy_first_image(db, db_obj)
-
-    # Si cambia la categoría, validar que exista y sincronizar texto legado
+        if imgs is not None and not isinstance(imgs, list):
+            raise HTTPException(status_code=422, detail="El campo 'images' debe ser una lista de cadenas")
+        _replace_image_rows(db, db_obj, [s.strip() for s in (imgs or []) if isinstance(s, str) and s.strip()])
+
+    # Si cambia la categoría, validar que exista y sincronizar texto legado (una sola consulta)
     if data.get("category_id") is not None:
         cat = get_category_by_id(db, data["category_id"])
         if not cat:
             raise HTTPException(status_code=404, detail="Categoría no encontrada")
         db_obj.category_name = getattr(cat, "name", "") or ""
 
-    # Duplicado por (name, category_id)
+    # Duplicado por (name, category_id): solo si alguno de los dos cambia
     new_name = data.get("name", db_obj.name)
     new_cat_id = data.get("category_id", db_obj.category_id)
-    duplicate = (
-        db.query(models.Furniture)
-        .filter(models.Furniture.id != db_obj.id)
-        .filter(models.Furniture.name == new_name)
-        .filter(models.Furniture.category_id == new_cat_id)
-        .first()
-    )
-    if duplicate:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Ya existe un mueble con nombre '{new_name}' en la categoría '{new_cat_id}'.",
+    if (new_name, new_cat_id) != (db_obj.name, db_obj.category_id):
+        duplicate = (
+            db.query(models.Furniture.id)
+            .filter(models.Furniture.id != db_obj.id)
+            .filter(models.Furniture.name == new_name)
+            .filter(models.Furniture.category_id == new_cat_id)
+            .first()
         )
+        if duplicate:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Ya existe un mueble con nombre '{new_name}' en la categoría '{new_cat_id}'.",
+            )
 
     # Aplicar resto de campos
     for k, v in data.items():
@@ -237,28 +359,186 @@ def update_furniture(db: Session, furniture_id: int, furniture: schemas.Furnitur
                 v = Decimal(str(v))
             except Exception:
                 raise HTTPException(status_code=400, detail="Precio inválido")
-        if k == "category_id" and v is not None:
-            # Si se actualiza la categoría, también actualizar el nombre
-            cat = get_category_by_id(db, v)
-            if not cat:
-                raise HTTPException(status_code=404, detail="Categoría no encontrada")
-            db_obj.category_name = getattr(cat, "name", "") or ""
         if isinstance(v, str):
             v = v.strip() or None
         setattr(db_obj, k, v)
 
     _commit_or_rollback(db)
-    db.refresh(db_obj)
-    return db_obj
+    # La respuesta sí incluye posts e imágenes: una sola recarga completa al final
+    return get_furniture(db, furniture_id)
+
+
+# ====================== Actualizaciones masivas ======================
+
+_BULK_PATCH_CHUNK = 1000
+
+
+def bulk_patch_furniture(db: Session, items: List[schemas.FurniturePatchItem]) -> dict:
+    """
+    Aplica cambios de stock/precio por id en un solo UPDATE por bloque de 1000 ids
+    (``SET stock = CASE id WHEN ... END``), más un SELECT de ids por bloque para
+    reportar los inexistentes. Sin cargar objetos ORM. Si un id se repite, cada campo
+    toma el último valor enviado.
+    """
+    stock_by_id: Dict[int, int] = {}
+    price_by_id: Dict[int, Decimal] = {}
+    for item in items:
+        if item.stock is not None:
+            stock_by_id[item.id] = item.stock
+        if item.price is not None:
+            price_by_id[item.id] = Decimal(str(item.price))
+    ids = list(dict.fromkeys(item.id for item in items))
+    not_found: List[int] = []
+    updated = 0
+    try:
+        for start in range(0, len(ids), _BULK_PATCH_CHUNK):
+            chunk = ids[start:start + _BULK_PATCH_CHUNK]
+            existing = {r[0] for r in db.query(models.Furniture.id).filter(models.Furniture.id.in_(chunk))}
+            not_found += [i for i in chunk if i not in existing]
+            stocks = {i: stock_by_id[i] for i in chunk if i in existing and i in stock_by_id}
+            prices = {i: price_by_id[i] for i in chunk if i in existing and i in price_by_id}
+            values = {}
+            if stocks:
+                values["stock"] = case(stocks, value=models.Furniture.id, else_=models.Furniture.stock)
+            if prices:
+                values["price"] = case(prices, value=models.Furniture.id, else_=models.Furniture.price)
+            if not values:
+                continue
+            result = db.execute(
+                update(models.Furniture)
+                .where(models.Furniture.id.in_(set(stocks) | set(prices)))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+        _commit_or_rollback(db)
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error al actualizar muebles en lote")
+    return {"requested": len(ids), "updated": updated, "not_found": not_found}
+
+
+def adjust_category_prices(db: Session, category_id: int, percent: float) -> int:
+    """Cambia en porcentaje el precio de toda una categoría con un único UPDATE."""
+    if not get_category_by_id(db, category_id):
+        raise HTTPException(status_code=404, detail="Categoría no encontrada")
+    factor = Decimal(str(1 + percent / 100))
+    new_price = func.round(models.Furniture.price * factor, 2)
+    try:
+        result = db.execute(
+            update(models.Furniture)
+            .where(models.Furniture.category_id == category_id)
+            # El precio nunca baja de 0.01 (el esquema exige price > 0)
+            .values(price=case((new_price < Decimal("0.01"), Decimal("0.01")), else_=new_price))
+            .execution_options(synchronize_session=False)
+        )
+        _commit_or_rollback(db)
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error al ajustar precios")
+    return result.rowcount
+
+
+# ====================== Reserva de stock ======================
+
+def _stock_quantities(items: List[schemas.StockItem]) -> Dict[int, int]:
+    """Suma cantidades por id y ordena por id: las filas se bloquean siempre en el mismo orden."""
+    totals: Dict[int, int] = {}
+    for item in items:
+        totals[item.id] = totals.get(item.id, 0) + item.quantity
+    return dict(sorted(totals.items()))
+
+
+def reserve_stock(db: Session, items: List[schemas.StockItem]) -> Dict[int, int]:
+    """
+    Descuenta el stock de todo el carrito con un único UPDATE condicional:
+    ``SET stock = stock - CASE id ... END WHERE id IN (...) AND stock >= CASE id ... END``.
+
+    Todo o nada: si alguna fila no cumple la condición el número de filas afectadas
+    no cuadra y se hace rollback; solo entonces se consulta qué faltó para el 409.
+    """
+    quantities = _stock_quantities(items)
+    over = [i for i, q in quantities.items() if q > settings.STOCK_MAX_RESERVE_QUANTITY]
+    if over:
+        # Tope por mueble y por carrito: acota lo que una sola reserva puede retener
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": f"Máximo {settings.STOCK_MAX_RESERVE_QUANTITY} unidades por mueble", "ids": over},
+        )
+    wanted = case(quantities, value=models.Furniture.id)
+    try:
+        result = db.execute(
+            update(models.Furniture)
+            .where(models.Furniture.id.in_(quantities), models.Furniture.stock >= wanted)
+            .values(stock=models.Furniture.stock - wanted)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == len(quantities):
+            _commit_or_rollback(db)
+            return quantities
+        db.rollback()
+        available = dict(
+            db.query(models.Furniture.id, models.Furniture.stock).filter(models.Furniture.id.in_(quantities)).all()
+        )
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error al reservar stock")
+
+    missing = [i for i in quantities if i not in available]
+    if missing:
+        raise HTTPException(status_code=404, detail={"message": "Mueble no encontrado", "ids": missing})
+    short = [i for i, q in quantities.items() if (available[i] or 0) < q]
+    # Si entre el UPDATE y esta lectura otra transacción devolvió stock, ya no falta
+    # nada: se reportan todos los pedidos con lo disponible ahora y el cliente reintenta
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "message": "Stock insuficiente",
+            "items": [
+                {"id": i, "requested": quantities[i], "available": available[i] or 0}
+                for i in (short or quantities)
+            ],
+        },
+    )
+
+
+def release_stock(db: Session, items: List[schemas.StockItem]) -> Dict[int, int]:
+    """Devuelve stock reservado (carrito abandonado o cancelado) con un único UPDATE."""
+    quantities = _stock_quantities(items)
+    try:
+        result = db.execute(
+            update(models.Furniture)
+            .where(models.Furniture.id.in_(quantities))
+            .values(stock=func.coalesce(models.Furniture.stock, 0) + case(quantities, value=models.Furniture.id))
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(quantities):
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Mueble no encontrado")
+        _commit_or_rollback(db)
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error al liberar stock")
+    return quantities
 
 
 def delete_furniture(db: Session, furniture_id: int) -> bool:
-    db_obj = _ensure_found(get_furniture(db, furniture_id), "Mueble")
+    """
+    Borra el mueble con 3 DELETE masivos (imágenes, publicaciones, mueble) sin cargar
+    objetos. Los FK tienen ON DELETE CASCADE, pero se borran los hijos explícitamente
+    para bases creadas antes de ese cambio y para SQLite sin PRAGMA foreign_keys.
+    """
     try:
-        db.delete(db_obj)
+        db.query(models.FurnitureImage).filter(models.FurnitureImage.furniture_id == furniture_id).delete(synchronize_session=False)
+        db.query(models.Post).filter(models.Post.furniture_id == furniture_id).delete(synchronize_session=False)
+        deleted = db.query(models.Furniture).filter(models.Furniture.id == furniture_id).delete(synchronize_session=False)
+        if not deleted:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Mueble no encontrado")
         _commit_or_rollback(db)
         return True
     except SQLAlchemyError:
+        db.rollback()
         raise HTTPException(status_code=500, detail="Error al eliminar mueble")
 
 
@@ -275,42 +555,130 @@ def search_furniture(
 ) -> List[models.Furniture]:
     try:
         q = db.query(models.Furniture).options(selectinload(models.Furniture.images))
-        if term:
-            like = f"%{term.strip()}%"
-            q = q.filter(
-                (models.Furniture.name.ilike(like)) |
-                (models.Furniture.description.ilike(like))
-            )
-        # Filtrar por lista de categorías si se provee, si no usar category_id
-        if category_ids:
-            q = q.filter(models.Furniture.category_id.in_(category_ids))
-        elif category_id:
-            q = q.filter(models.Furniture.category_id == category_id)
-
-        if min_price is not None:
-            q = q.filter(models.Furniture.price >= float(min_price))
-
-        if max_price is not None:
-            q = q.filter(models.Furniture.price <= float(max_price))
-
-        mapping = {
-            "created_at": models.Furniture.created_at,
-            "price": models.Furniture.price,
-            "name": models.Furniture.name,
-            "stock": models.Furniture.stock,
-        }
-        descending = order_by.startswith("-")
-        key = order_by[1:] if descending else order_by
-        col = mapping.get(key, models.Furniture.created_at)
-        q = q.order_by(col.desc() if descending else col.asc())
-
-        limit = max(1, min(500, int(limit)))
-        skip = max(0, int(skip))
+        q = q.filter(*_furniture_criteria(term, category_id, category_ids, min_price, max_price))
+        q = q.order_by(_furniture_order(order_by))
+
+        skip, limit = _page(skip, limit)
         return q.offset(skip).limit(limit).all()
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Error al buscar muebles")
 
 
+# ====================== Lecturas async (DB_ASYNC=1) ======================
+# En modo async no hay lazy loading: posts e imágenes se cargan siempre con selectinload.
+
+async def get_furniture_async(db: AsyncSession, furniture_id: int) -> Optional[models.Furniture]:
+    try:
+        result = await db.execute(
+            select(models.Furniture)
+            .options(selectinload(models.Furniture.posts), selectinload(models.Furniture.images))
+            .where(models.Furniture.id == furniture_id)
+        )
+        return result.scalars().first()
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Error al obtener mueble")
+
+
+async def search_furniture_async(
+        db: AsyncSession,
+        term: Optional[str] = None,
+        category_id: Optional[str] = None,
+        category_ids: Optional[List[int]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: str = "-created_at",
+) -> List[models.Furniture]:
+    try:
+        skip, limit = _page(skip, limit)
+        result = await db.execute(
+            select(models.Furniture)
+            .options(selectinload(models.Furniture.posts), selectinload(models.Furniture.images))
+            .where(*_furniture_criteria(term, category_id, category_ids, min_price, max_price))
+            .order_by(_furniture_order(order_by))
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Error al buscar muebles")
+
+
+async def get_all_furniture_async(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        category_id: Optional[str] = None,
+        category_ids: Optional[List[int]] = None,
+        order_by: str = "-created_at",
+) -> List[models.Furniture]:
+    return await search_furniture_async(
+        db, category_id=category_id, category_ids=category_ids, skip=skip, limit=limit, order_by=order_by
+    )
+
+
+# ====================== Exportación ======================
+
+_EXPORT_COLUMNS = (
+    models.Furniture.id, models.Furniture.name, models.Furniture.description, models.Furniture.price,
+    models.Furniture.category_id, models.Furniture.category_name, models.Furniture.stock,
+    models.Furniture.brand, models.Furniture.color, models.Furniture.material,
+    models.Furniture.dimensions, models.Furniture.created_at, models.Furniture.updated_at,
+)
+
+
+def iter_furniture_export(db: Session, include_posts: bool = False, page_size: int = 1000):
+    """
+    Recorre todo el catálogo como dicts planos, en orden de id y con memoria constante.
+
+    Pagina por keyset (``id > último``) en vez de un cursor del servidor: el dialecto
+    mysql-connector fuerza cursores con buffer, así que ``stream_results`` cargaría el
+    resultado completo en memoria. Por página se hacen 2 o 3 consultas de columnas
+    escalares (muebles, metadatos de imágenes y, si se pide, publicaciones); nunca se
+    leen los blobs ni la columna legado ``img_base64``.
+    """
+    image_cols = (models.FurnitureImage.furniture_id, models.FurnitureImage.id, models.FurnitureImage.position,
+                  models.FurnitureImage.mime, models.FurnitureImage.size_bytes, models.FurnitureImage.sha256)
+    post_cols = (models.Post.furniture_id, models.Post.id, models.Post.title, models.Post.content,
+                 models.Post.is_active, models.Post.publication_date, models.Post.updated_at)
+    last_id = 0
+    while True:
+        rows = (
+            db.query(*_EXPORT_COLUMNS)
+            .filter(models.Furniture.id > last_id)
+            .order_by(models.Furniture.id.asc())
+            .limit(page_size)
+            .all()
+        )
+        if not rows:
+            return
+        ids = [r.id for r in rows]
+        images: Dict[int, list] = {}
+        for fid, image_id, position, mime, size_bytes, sha in (
+            db.query(*image_cols).filter(models.FurnitureImage.furniture_id.in_(ids))
+            .order_by(models.FurnitureImage.furniture_id, models.FurnitureImage.position, models.FurnitureImage.id)
+        ):
+            images.setdefault(fid, []).append({
+                "id": image_id, "position": position, "mime": mime, "size_bytes": size_bytes, "sha256": sha.hex(),
+            })
+        posts: Dict[int, list] = {}
+        if include_posts:
+            for fid, *values in (
+                db.query(*post_cols).filter(models.Post.furniture_id.in_(ids)).order_by(models.Post.furniture_id, models.Post.id)
+            ):
+                posts.setdefault(fid, []).append(dict(zip(("id", "title", "content", "is_active", "publication_date", "updated_at"), values)))
+
+        for r in rows:
+            item = dict(r._mapping)
+            item["category"] = item.pop("category_name")
+            item["images"] = images.get(r.id, [])
+            if include_posts:
+                item["posts"] = posts.get(r.id, [])
+            yield item
+        last_id = ids[-1]
+
+
 def get_furniture_categories(db: Session) -> List[str]:
     try:
         rows = db.query(models.Category.name).order_by(models.Category.name.asc()).all()
@@ -319,61 +687,161 @@ def get_furniture_categories(db: Session) -> List[str]:
         raise HTTPException(status_code=500, detail="Error al obtener categorías")
 
 
-def create_furniture_batch(db: Session, furniture_list: List[schemas.FurnitureCreate]) -> List[models.Furniture]:
-    created: List[models.Furniture] = []
-    try:
-        for furniture in furniture_list:
-            category = get_category_by_id(db, furniture.category_id)
-            if not category:
-                raise HTTPException(status_code=404, detail=f"Categoría no encontrada para '{furniture.name}'")
-
-            exists = (
-                db.query(models.Furniture)
-                .filter(models.Furniture.name == furniture.name)
-                .filter(models.Furniture.category_id == furniture.category_id)
-                .first()
-            )
-            if exists:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail=f"Ya existe un mueble con nombre '{furniture.name}' en la categoría '{category.name}'."
-                )
-
-            db_obj = models.Furniture(
-                name=furniture.name.strip(),
-                description=(furniture.description or "").strip() or None,
-                price=Decimal(str(furniture.price)),
-                category_id=furniture.category_id,
-                category_name=(getattr(category, "name", "") or ""),
-                img_base64=None,
-                stock=int(furniture.stock or 0),
-                brand=(furniture.brand or "").strip() or None,
-                color=(furniture.color or "").strip() or None,
-                material=(furniture.material or "").strip() or None,
-                dimensions=(furniture.dimensions or "").strip() or None,
-            )
-            db.add(db_obj)
-            db.flush()
+# Tope de bytes por executemany de imágenes (max_allowed_packet de MySQL es 64MB por defecto)
+_BULK_IMAGE_CHUNK_BYTES = 16 * 1024 * 1024
 
-            images_b64 = []
-            if getattr(furniture, "images", None) is not None:
-                if not isinstance(furniture.images, list):
-                    raise HTTPException(status_code=422, detail="El campo 'images' debe ser una lista de cadenas")
-                images_b64 = [s.strip() for s in furniture.images if isinstance(s, str) and s.strip()]
 
-            _insert_images_blob(db, db_obj, images_b64, start_position=0, dedupe=True)
-            _sync_legacy_first_image(db, db_obj)
+def _clean(value) -> Optional[str]:
+    return (value or "").strip() or None
+
+
+def _item_error(index: int, name, status_code: int, detail: str) -> dict:
+    return {"index": index, "name": name, "status_code": status_code, "detail": detail}
+
+
+def bulk_insert_furniture(db: Session, furniture_list: List[schemas.FurnitureCreate]) -> tuple[List[int], List[dict]]:
+    """
+    Inserta un lote de muebles con un número fijo de sentencias, sin importar su tamaño:
+    categorías (1 SELECT), duplicados (1 SELECT), muebles (executemany), ids (1 SELECT)
+    e imágenes (executemany por bloques de bytes).
+
+    Los ítems inválidos no se insertan y se reportan en la lista de errores
+    (``index``, ``name``, ``status_code``, ``detail``). No hace commit.
+    Regresa (ids creados en el orden de entrada, errores).
+    """
+    errors: List[dict] = []
+    pending = []  # (index, item, name, imágenes decodificadas)
+    for index, furniture in enumerate(furniture_list):
+        name = (furniture.name or "").strip()
+        if not name:
+            errors.append(_item_error(index, furniture.name, 422, "El campo 'name' es obligatorio y no puede estar vacío"))
+            continue
+        images_b64 = [s.strip() for s in (furniture.images or []) if isinstance(s, str) and s.strip()]
+        try:
+            images = _decode_images(images_b64)
+        except HTTPException as e:
+            errors.append(_item_error(index, name, e.status_code, e.detail))
+            continue
+        pending.append((index, furniture, name, images))
+
+    if not pending:
+        return [], errors
+
+    # Categorías y duplicados: una consulta cada una para todo el lote
+    category_ids = {f.category_id for _, f, _, _ in pending}
+    categories = dict(
+        db.query(models.Category.id, models.Category.name).filter(models.Category.id.in_(category_ids)).all()
+    )
+    names = {name for _, _, name, _ in pending}
+    # casefold: la colación de MySQL compara sin distinguir mayúsculas
+    taken = {
+        (n.casefold(), c)
+        for n, c in db.query(models.Furniture.name, models.Furniture.category_id)
+        .filter(models.Furniture.name.in_(names), models.Furniture.category_id.in_(category_ids))
+        .all()
+    }
+
+    rows, accepted = [], []
+    for index, furniture, name, images in pending:
+        if furniture.category_id not in categories:
+            errors.append(_item_error(index, name, 404, f"Categoría no encontrada para '{name}'"))
+            continue
+        key = (name, furniture.category_id)
+        if (name.casefold(), furniture.category_id) in taken:
+            errors.append(_item_error(
+                index, name, status.HTTP_409_CONFLICT,
+                f"Ya existe un mueble con nombre '{name}' en la categoría '{categories[furniture.category_id]}'."
+            ))
+            continue
+        taken.add((name.casefold(), furniture.category_id))  # también detecta duplicados dentro del mismo lote
+        rows.append({
+            "name": name,
+            "description": _clean(furniture.description),
+            "price": Decimal(str(furniture.price)),
+            "category_id": furniture.category_id,
+            "category_name": categories[furniture.category_id] or "",
+            # columna legado: primera imagen por posición
+            "img_base64": _to_data_url(images[0][0], images[0][1]) if images else None,
+            "stock": int(furniture.stock or 0),
+            "brand": _clean(furniture.brand),
+            "color": _clean(furniture.color),
+            "material": _clean(furniture.material),
+            "dimensions": _clean(furniture.dimensions),
+        })
+        accepted.append((index, key, images))
+
+    errors.sort(key=lambda e: e["index"])
+    if not rows:
+        return [], errors
+
+    db.bulk_insert_mappings(models.Furniture, rows)
+    ids = {
+        (n, c): i
+        for i, n, c in db.query(models.Furniture.id, models.Furniture.name, models.Furniture.category_id)
+        .filter(models.Furniture.name.in_({k[0] for _, k, _ in accepted}),
+                models.Furniture.category_id.in_({k[1] for _, k, _ in accepted}))
+        .all()
+    }
+
+    created_ids = []
+    image_rows, chunk_bytes = [], 0
+    for _, key, images in accepted:
+        furniture_id = ids[key]
+        created_ids.append(furniture_id)
+        for position, (mime, data, sha) in enumerate(images):
+            image_rows.append({
+                "furniture_id": furniture_id, "position": position, "mime": mime,
+                "bytes": data, "size_bytes": len(data), "sha256": sha,
+            })
+            chunk_bytes += len(data)
+            if chunk_bytes >= _BULK_IMAGE_CHUNK_BYTES:
+                db.bulk_insert_mappings(models.FurnitureImage, image_rows)
+                image_rows, chunk_bytes = [], 0
+    if image_rows:
+        db.bulk_insert_mappings(models.FurnitureImage, image_rows)
+
+    return created_ids, errors
+
+
+def _load_created(db: Session, ids: List[int]) -> List[models.Furniture]:
+    """Recarga los muebles creados con sus relaciones en 3 consultas, en el orden dado."""
+    if not ids:
+        return []
+    objs = (
+        db.query(models.Furniture)
+        .options(selectinload(models.Furniture.images), selectinload(models.Furniture.posts))
+        .filter(models.Furniture.id.in_(ids))
+        .all()
+    )
+    by_id = {o.id: o for o in objs}
+    return [by_id[i] for i in ids]
 
-            created.append(db_obj)
 
+def create_furniture_batch(db: Session, furniture_list: List[schemas.FurnitureCreate]) -> List[models.Furniture]:
+    """
+    Crea el lote completo o nada. Si algún ítem falla se responde con todos los
+    errores del lote (uno por ítem) en ``detail.errors``.
+    """
+    try:
+        ids, errors = bulk_insert_furniture(db, furniture_list)
+        if errors:
+            db.rollback()
+            codes = {e["status_code"] for e in errors}
+            raise HTTPException(
+                status_code=codes.pop() if len(codes) == 1 else 400,
+                detail={"message": f"{len(errors)} de {len(furniture_list)} muebles con errores; no se creó ninguno",
+                        "errors": errors},
+            )
         _commit_or_rollback(db)
-        for o in created:
-            db.refresh(o)
-        return created
+        return _load_created(db, ids)
 
     except HTTPException:
         db.rollback()
         raise
+    except IntegrityError:
+        # Otro proceso insertó el mismo (name, category_id) entre la verificación y el INSERT
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Registro duplicado")
     except SQLAlchemyError:
         db.rollback()
         raise HTTPException(status_code=500, detail="Error al crear muebles en lote")
@@ -382,6 +850,22 @@ def create_furniture_batch(db: Session, furniture_list: List[schemas.FurnitureCr
         raise HTTPException(status_code=500, detail="Error inesperado al crear muebles en lote")
 
 
+def import_furniture_chunk(db: Session, furniture_list: List[schemas.FurnitureCreate]) -> tuple[int, List[dict]]:
+    """
+    Inserta y confirma un bloque de una importación. A diferencia del lote, los
+    ítems inválidos no frenan al resto. Regresa (creados, errores por índice).
+    """
+    try:
+        ids, errors = bulk_insert_furniture(db, furniture_list)
+        db.commit()
+        return len(ids), errors
+    except SQLAlchemyError as e:
+        db.rollback()
+        code = status.HTTP_409_CONFLICT if isinstance(e, IntegrityError) else 500
+        detail = "Registro duplicado" if code == status.HTTP_409_CONFLICT else "Error de base de datos al importar el bloque"
+        return 0, [_item_error(i, f.name, code, detail) for i, f in enumerate(furniture_list)]
+
+
 # ====================== CRUD de Imágenes (servicio) ======================
 
 def _insert_images_blob(
@@ -390,29 +874,25 @@ def _insert_images_blob(
         images_b64: List[str],
         start_position: int,
         dedupe: bool = True,
+        existing_sha: Optional[set] = None,
 ) -> List[models.FurnitureImage]:
     """
     Inserta imágenes LONGBLOB a partir de base64.
     - dedupe=True: evita duplicar por sha256 dentro del mismo mueble.
+    - existing_sha: hashes ya presentes si el llamador los conoce (evita la consulta).
     """
     new_objs: List[models.FurnitureImage] = []
-    existing_sha = set()
-    if dedupe:
-        existing_sha = {
-            r[0]
-            for r in db.query(models.FurnitureImage.sha256)
-            .filter(models.FurnitureImage.furniture_id == furniture.id)
-            .all()
-        }
-
-    for raw in images_b64:
-        mime, payload = _split_data_url(raw)
-        try:
-            data = base64.b64decode(payload, validate=True)
-        except Exception:
-            raise HTTPException(status_code=400, detail="Imagen base64 inválida")
-
-        sha = hashlib.sha256(data).digest()
+    if existing_sha is None:
+        existing_sha = set()
+        if dedupe:
+            existing_sha = {
+                r[0]
+                for r in db.query(models.FurnitureImage.sha256)
+                .filter(models.FurnitureImage.furniture_id == furniture.id)
+                .all()
+            }
+
+    for mime, data, sha in _decode_images(images_b64, dedupe=False):
         if dedupe and sha in existing_sha:
             continue
         existing_sha.add(sha)
@@ -420,7 +900,7 @@ def _insert_images_blob(
         obj = models.FurnitureImage(
             furniture_id=furniture.id,
             position=start_position + len(new_objs),
-            mime=mime or "application/octet-stream",
+            mime=mime,
             bytes=data,
             size_bytes=len(data),
             sha256=sha,
@@ -431,8 +911,21 @@ def _insert_images_blob(
     return new_objs
 
 
+def _replace_image_rows(db: Session, furniture: models.Furniture, images_b64: List[str]) -> List[models.FurnitureImage]:
+    """Borra las imágenes con un DELETE masivo e inserta las nuevas; la portada legado
+    sale de la primera imagen nueva, ya en memoria."""
+    db.query(models.FurnitureImage).filter(
+        models.FurnitureImage.furniture_id == furniture.id
+    ).delete(synchronize_session=False)
+    objs = _insert_images_blob(db, furniture, images_b64, start_position=0, existing_sha=set())
+    furniture.img_base64 = _to_data_url(objs[0].mime, objs[0].bytes) if objs else None
+    # Las imágenes no tienen updated_at: el del mueble es el validador HTTP de su JSON
+    furniture.updated_at = datetime.now(timezone.utc)
+    return objs
+
+
 def add_images(db: Session, furniture_id: int, images_b64: List[str]) -> List[models.FurnitureImage]:
-    mueble = _ensure_found(get_furniture(db, furniture_id), "Mueble")
+    mueble = _get_furniture_for_write(db, furniture_id)
     if not isinstance(images_b64, list):
         raise HTTPException(status_code=422, detail="'images' debe ser una lista")
     images_b64 = [s.strip() for s in images_b64 if isinstance(s, str) and s.strip()]
@@ -446,95 +939,119 @@ def add_images(db: Session, furniture_id: int, images_b64: List[str]) -> List[mo
     start = (last_pos[0] + 1) if last_pos else 0
 
     objs = _insert_images_blob(db, mueble, images_b64, start_position=start, dedupe=True)
-    if mueble.img_base64 is None and objs:
-        # setea legacy con la primera agregada en esta operación
+    if last_pos is None and objs:
+        # sin imágenes previas: la primera agregada pasa a ser la portada legado
         first = objs[0]
         mueble.img_base64 = _to_data_url(first.mime, first.bytes)
+    if objs:
+        mueble.updated_at = datetime.now(timezone.utc)
 
     _commit_or_rollback(db)
-    for o in objs:
-        db.refresh(o)
-    return objs
+    return _reload_images(db, objs)
 
 
 def replace_images(db: Session, furniture_id: int, images_b64: List[str]) -> List[models.FurnitureImage]:
-    mueble = _ensure_found(get_furniture(db, furniture_id), "Mueble")
+    mueble = _get_furniture_for_write(db, furniture_id)
     if not isinstance(images_b64, list):
         raise HTTPException(status_code=422, detail="'images' debe ser una lista")
     images_b64 = [s.strip() for s in images_b64 if isinstance(s, str) and s.strip()]
 
-    db.query(models.FurnitureImage).filter(
-        models.FurnitureImage.furniture_id == mueble.id
-    ).delete(synchronize_session=False)
-    db.flush()
+    objs = _replace_image_rows(db, mueble, images_b64)
+    _commit_or_rollback(db)
+    return _reload_images(db, objs)
 
-    objs = _insert_images_blob(db, mueble, images_b64, start_position=0, dedupe=True)
-    _sync_legacy_first_image(db, mueble)
 
-    _commit_or_rollback(db)
-    for o in objs:
-        db.refresh(o)
-    return objs
+def _image_positions(db: Session, furniture_id: int) -> List[tuple]:
+    """(id, position) de las imágenes del mueble, en orden; nunca lee los blobs. 404 si no existe el mueble."""
+    if db.query(models.Furniture.id).filter(models.Furniture.id == furniture_id).first() is None:
+        raise HTTPException(status_code=404, detail="Mueble no encontrado")
+    return [
+        tuple(r) for r in db.query(models.FurnitureImage.id, models.FurnitureImage.position)
+        .filter(models.FurnitureImage.furniture_id == furniture_id)
+        .order_by(models.FurnitureImage.position.asc(), models.FurnitureImage.id.asc())
+    ]
+
+
+def _apply_positions(db: Session, furniture_id: int, current: Dict[int, int], target: Dict[int, int]) -> None:
+    """
+    Mueve solo las imágenes cuya posición cambia, en 2 UPDATE sin importar cuántas sean:
+    primero a posiciones negativas (evita choques con un UNIQUE(furniture_id, position))
+    y luego a la posición final con ``CASE id WHEN ... END``.
+    """
+    changed = {i: p for i, p in target.items() if current.get(i) != p}
+    if not changed:
+        return
+    image = models.FurnitureImage
+    where = (image.furniture_id == furniture_id, image.id.in_(changed))
+    db.execute(update(image).where(*where).values(position=-1 - image.position)
+               .execution_options(synchronize_session=False))
+    db.execute(update(image).where(*where).values(position=case(changed, value=image.id))
+               .execution_options(synchronize_session=False))
+
+
+def _touch_after_images(db: Session, furniture_id: int, first_before: Optional[int], first_after: Optional[int]) -> None:
+    """Marca updated_at del mueble y, solo si cambió la primera imagen, resincroniza la
+    columna legado img_base64 (única lectura de blob: la nueva portada)."""
+    values = {"updated_at": datetime.now(timezone.utc)}
+    if first_after != first_before:
+        values["img_base64"] = None
+        if first_after is not None:
+            mime, data = (
+                db.query(models.FurnitureImage.mime, models.FurnitureImage.bytes)
+                .filter(models.FurnitureImage.id == first_after).one()
+            )
+            values["img_base64"] = _to_data_url(mime, data)
+    db.execute(update(models.Furniture).where(models.Furniture.id == furniture_id).values(**values)
+               .execution_options(synchronize_session=False))
 
 
 def reorder_images(db: Session, furniture_id: int, order: Dict[int, int]) -> None:
     """
-    Reordena usando técnica de posiciones negativas para evitar colisiones con UNIQUE(furniture_id, position).
+    Reordena con consultas de solo (id, position): como máximo 6 sentencias sin
+    importar la cantidad de imágenes.
     order: {image_id: new_position}
     """
-    mueble = _ensure_found(get_furniture(db, furniture_id), "Mueble")
-    imgs = db.query(models.FurnitureImage).filter(
-        models.FurnitureImage.furniture_id == mueble.id
-    ).all()
-
-    ids_in_db = {im.id for im in imgs}
-    if not set(order.keys()).issubset(ids_in_db):
+    rows = _image_positions(db, furniture_id)
+    current = dict(rows)
+    if not set(order.keys()).issubset(current):
         raise HTTPException(status_code=400, detail="Una o más imágenes no pertenecen al mueble")
 
-    # Paso 1: mover a posiciones negativas
-    for im in imgs:
-        if im.id in order:
-            im.position = -(abs(im.position) + 1)
-    db.flush()
-
-    # Paso 2: aplicar nuevas posiciones explícitas
-    for im in imgs:
-        if im.id in order:
-            im.position = int(order[im.id])
-
-    # Paso 3: rellenar huecos para las no mencionadas
-    used = set(order.values())
-    rest = [im for im in imgs if im.id not in order]
+    # Posiciones explícitas y huecos rellenados por las no mencionadas, en su orden actual
+    target = {int(i): int(p) for i, p in order.items()}
+    used = set(target.values())
     next_pos = 0
-    while next_pos in used:
-        next_pos += 1
-    for im in sorted(rest, key=lambda x: (x.position, x.id)):
+    for image_id, _ in rows:
+        if image_id in target:
+            continue
         while next_pos in used:
             next_pos += 1
-        im.position = next_pos
+        target[image_id] = next_pos
         used.add(next_pos)
 
-    _sync_legacy_first_image(db, mueble)
+    first_before = rows[0][0] if rows else None
+    first_after = min(target, key=lambda i: (target[i], i)) if target else None
+    try:
+        _apply_positions(db, furniture_id, current, target)
+        _touch_after_images(db, furniture_id, first_before, first_after)
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error al reordenar imágenes")
     _commit_or_rollback(db)
 
 
 def delete_image(db: Session, furniture_id: int, image_id: int) -> None:
-    mueble = _ensure_found(get_furniture(db, furniture_id), "Mueble")
-    obj = db.query(models.FurnitureImage).filter_by(id=image_id, furniture_id=mueble.id).first()
-    _ensure_found(obj, "Imagen")
-
-    db.delete(obj)
-    db.flush()
+    """Elimina la imagen y renumera 0..N-1 sin leer blobs (máximo 7 sentencias)."""
+    rows = _image_positions(db, furniture_id)
+    if image_id not in dict(rows):
+        raise HTTPException(status_code=404, detail="Imagen no encontrado")
 
-    # Renumerar 0..N-1
-    imgs = (
-        db.query(models.FurnitureImage)
-        .filter(models.FurnitureImage.furniture_id == mueble.id)
-        .order_by(models.FurnitureImage.position.asc(), models.FurnitureImage.id.asc())
-        .all()
-    )
-    for idx, im in enumerate(imgs):
-        im.position = idx
-
-    _sync_legacy_first_image(db, mueble)
+    remaining = [(i, p) for i, p in rows if i != image_id]
+    target = {i: idx for idx, (i, _) in enumerate(remaining)}
+    try:
+        db.query(models.FurnitureImage).filter(models.FurnitureImage.id == image_id).delete(synchronize_session=False)
+        _apply_positions(db, furniture_id, dict(remaining), target)
+        _touch_after_images(db, furniture_id, rows[0][0], remaining[0][0] if remaining else None)
+    except SQLAlchemyError:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Error al eliminar la imagen")
     _commit_or_rollback(db)
@@ -1,13 +1,59 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import event, func, inspect, select, update
 from . import models, schemas
 from sqlalchemy.exc import SQLAlchemyError
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 from fastapi import HTTPException
 import datetime
 import logging
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 logger = logging.getLogger(__name__)
 
+
+# Los posts van embebidos en FurnitureOut: cualquier cambio en un post marca
+# updated_at del mueble, que es el validador HTTP (ETag) de su JSON.
+def _touch_furniture(mapper, connection, target):
+    ids = {target.furniture_id}
+    ids.update(inspect(target).attrs.furniture_id.history.deleted or ())
+    ids.discard(None)
+    if ids:
+        connection.execute(
+            update(models.Furniture.__table__)
+            .where(models.Furniture.__table__.c.id.in_(ids))
+            .values(updated_at=datetime.datetime.now(datetime.timezone.utc))
+        )
+
+
+for _evt in ("after_insert", "after_update", "after_delete"):
+    event.listen(models.Post, _evt, _touch_furniture)
+
+
+def _stamp_stmt():
+    return (
+        select(func.count(models.Post.id), func.max(models.Post.updated_at))
+        .where(models.Post.is_active == True)
+    )
+
+
+def posts_stamp(db: Session) -> tuple:
+    """(count, max(updated_at)) de las publicaciones activas: validador HTTP del listado."""
+    try:
+        return tuple(db.execute(_stamp_stmt()).one())
+    except SQLAlchemyError as e:
+        logger.error(f"Error al listar publicaciones: {e}")
+        raise HTTPException(status_code=500, detail="Error al listar publicaciones")
+
+
+async def posts_stamp_async(db: "AsyncSession") -> tuple:
+    try:
+        return tuple((await db.execute(_stamp_stmt())).one())
+    except SQLAlchemyError as e:
+        logger.error(f"Error al listar publicaciones: {e}")
+        raise HTTPException(status_code=500, detail="Error al listar publicaciones")
+
 def create_post(db: Session, post: schemas.PostCreate):
     try:
         # Verificar que el mueble existe
@@ -67,6 +113,46 @@ def get_posts_by_furniture(db: Session, furniture_id: int, skip: int = 0, limit:
         logger.error(f"Error al listar publicaciones del mueble: {e}")
         raise HTTPException(status_code=500, detail="Error al listar publicaciones del mueble")
 
+# ===== Lecturas async (DB_ASYNC=1) =====
+async def get_post_async(db: "AsyncSession", post_id: int) -> Optional[models.Post]:
+    try:
+        result = await db.execute(select(models.Post).where(models.Post.id == post_id))
+        return result.scalars().first()
+    except SQLAlchemyError as e:
+        logger.error(f"Error al obtener publicación: {e}")
+        raise HTTPException(status_code=500, detail="Error al obtener publicación")
+
+async def get_all_posts_async(db: "AsyncSession", skip: int = 0, limit: int = 100) -> List[models.Post]:
+    try:
+        result = await db.execute(
+            select(models.Post).where(models.Post.is_active == True)
+            .order_by(models.Post.publication_date.desc()).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
+    except SQLAlchemyError as e:
+        logger.error(f"Error al listar publicaciones: {e}")
+        raise HTTPException(status_code=500, detail="Error al listar publicaciones")
+
+async def get_posts_by_furniture_async(db: "AsyncSession", furniture_id: int, skip: int = 0, limit: int = 100) -> List[models.Post]:
+    try:
+        # Verificar que el mueble existe
+        exists = await db.execute(select(models.Furniture.id).where(models.Furniture.id == furniture_id))
+        if exists.first() is None:
+            raise HTTPException(status_code=404, detail="El mueble especificado no existe")
+
+        result = await db.execute(
+            select(models.Post).where(
+                models.Post.furniture_id == furniture_id,
+                models.Post.is_active == True
+            ).order_by(models.Post.publication_date.desc()).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        logger.error(f"Error al listar publicaciones del mueble: {e}")
+        raise HTTPException(status_code=500, detail="Error al listar publicaciones del mueble")
+
 def update_post(db: Session, post_id: int, post: schemas.PostUpdate):
     db_post = get_post(db, post_id)
     if not db_post:
@@ -1,11 +1,13 @@
 # app/database.py
-import os, logging
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.engine import URL
-import mysql.connector
+import os, logging, threading, time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.engine import URL, make_url
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from .config import settings
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def env(name, default=None):
@@ -19,8 +21,18 @@ DB_USER = env("DB_USER") or env("MYSQL_USER", "root")
 DB_PASSWORD = env("DB_PASSWORD") or env("MYSQL_PASSWORD", "")
 ENVIRONMENT = env("ENVIRONMENT", "production")
 AUTO_CREATE_DB = env("AUTO_CREATE_DB", "0") == "1"
+# Modo async opcional para las lecturas del catálogo (aiomysql en MySQL, aiosqlite en local)
+DB_ASYNC = env("DB_ASYNC", "0") == "1"
+# URL completa opcional (p. ej. sqlite:///bench.db para benchmarks locales); tiene prioridad sobre DB_*
+DATABASE_URL = env("DATABASE_URL")
+# Réplicas de lectura opcionales (URLs separadas por coma) para los GET del catálogo
+DB_READ_REPLICA_URLS = [u.strip() for u in env("DB_READ_REPLICA_URLS", "").split(",") if u.strip()]
+DB_REPLICA_MAX_LAG_SECONDS = float(env("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_SECONDS = float(env("DB_REPLICA_LAG_CHECK_SECONDS", "2"))
 
 def create_database_if_not_exists():
+    import mysql.connector
+
     try:
         conn = mysql.connector.connect(
             host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD
@@ -37,10 +49,6 @@ def create_database_if_not_exists():
     except Exception as e:
         logger.error(f"No se pudo crear la base: {e}")
 
-# Sólo intenta crear DB si lo pides y no estás en tests
-if AUTO_CREATE_DB and ENVIRONMENT != "test":
-    create_database_if_not_exists()
-
 # Construye URL segura (soporta símbolos en password)
 connection_url = URL.create(
     "mysql+mysqlconnector",
@@ -52,10 +60,203 @@ connection_url = URL.create(
     query={"charset": "utf8mb4"},
 )
 
+if DATABASE_URL:
+    connection_url = DATABASE_URL
+
+connect_args = {}
+if str(connection_url).startswith("sqlite"):
+    # las sesiones se crean y usan desde el threadpool de FastAPI
+    connect_args["check_same_thread"] = False
+
+def pool_args(url):
+    """Tamaños del pool desde Settings (SQLite en archivo usa NullPool y no los acepta)."""
+    if str(url).startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+# create_engine importa el driver (mysql.connector en producción) al crear el engine,
+# o sea al importar este módulo; lo que no hace es conectarse. El import de
+# mysql.connector que se quitó del nivel de módulo solo ahorraba el import directo.
 engine = create_engine(
     connection_url,
     pool_pre_ping=True,
     pool_recycle=3600,
+    connect_args=connect_args,
+    **pool_args(connection_url),
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+if engine.dialect.name == "sqlite":
+    # SQLite ignora los FK (y su ON DELETE CASCADE) salvo que se activen por conexión
+    @event.listens_for(engine, "connect")
+    def _sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+def init_db(create_tables=False):
+    """
+    Preparación de la base al arrancar (lifespan), nunca al importar: importar la
+    app no debe abrir conexiones.
+    """
+    # Sólo intenta crear DB si lo pides y no estás en tests
+    if AUTO_CREATE_DB and ENVIRONMENT != "test" and not DATABASE_URL:
+        create_database_if_not_exists()
+    if create_tables:
+        Base.metadata.create_all(bind=engine)
+
+# ===== Réplicas de lectura (DB_READ_REPLICA_URLS) =====
+def _engine_for(url):
+    args = {"check_same_thread": False} if str(url).startswith("sqlite") else {}
+    return create_engine(url, pool_pre_ping=True, pool_recycle=3600, connect_args=args, **pool_args(url))
+
+read_engines = []
+_replica_lock = threading.Lock()
+_replica_next = 0
+_replica_lag = {}  # engine -> (revisado_en, retraso en segundos o None si no replica)
+
+def configure_read_replicas(urls):
+    """Crea los engines de réplica (al importar, desde DB_READ_REPLICA_URLS)."""
+    global read_engines, _replica_next
+    for old in read_engines:
+        old.dispose()
+    read_engines = [_engine_for(u) for u in urls]
+    _replica_next = 0
+    _replica_lag.clear()
+
+configure_read_replicas(DB_READ_REPLICA_URLS)
+
+def _measure_lag(read_engine):
+    """Retraso de la réplica en segundos; None si no se puede confirmar que replique."""
+    if read_engine.dialect.name != "mysql":
+        # SQLite u otros motores locales: no hay replicación que medir, solo se
+        # comprueba que responda
+        with read_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return 0.0
+    with read_engine.connect() as conn:
+        try:
+            row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+        except Exception:
+            # MySQL < 8.0.22
+            row = conn.execute(text("SHOW SLAVE STATUS")).mappings().first()
+    if row is None:
+        return None
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return None if lag is None else float(lag)
+
+def _replica_ok(read_engine):
+    now = time.monotonic()
+    checked_at, lag = _replica_lag.get(read_engine, (None, None))
+    if checked_at is None or now - checked_at >= DB_REPLICA_LAG_CHECK_SECONDS:
+        try:
+            lag = _measure_lag(read_engine)
+        except Exception as e:
+            logger.warning(f"Réplica {read_engine.url.host or read_engine.url.database} no disponible: {e}")
+            lag = None
+        _replica_lag[read_engine] = (now, lag)
+    return lag is not None and lag <= DB_REPLICA_MAX_LAG_SECONDS
+
+def pick_read_engine():
+    """Round-robin entre réplicas sanas; si ninguna está al día se usa el primario."""
+    global _replica_next
+    for _ in range(len(read_engines)):
+        with _replica_lock:
+            candidate = read_engines[_replica_next % len(read_engines)]
+            _replica_next += 1
+        if _replica_ok(candidate):
+            return candidate
+    return engine
+
+@event.listens_for(Session, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    if session.info.get("read_only"):
+        raise RuntimeError("Intento de escritura en una sesión de solo lectura (réplica)")
+
+class ReadSession(Session):
+    """
+    Sesión de solo lectura que elige la réplica en su primera consulta.
+
+    Elegirla puede medir el retraso de la réplica (una consulta cada
+    DB_REPLICA_LAG_CHECK_SECONDS); así eso ocurre en el hilo del handler y no en el
+    event loop al crear la sesión, ni en peticiones que terminan sin consultar.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.bind is None:
+            self.bind = pick_read_engine() if read_engines else engine
+        return super().get_bind(mapper, clause, **kw)
+
+_ReadSessionFactory = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False)
+
+def ReadSessionLocal():
+    """Sesión de solo lectura sobre una réplica (o el primario si no hay réplicas sanas)."""
+    db = _ReadSessionFactory()
+    db.info["read_only"] = True
+    return db
+
+# ===== Sesión por request =====
+async def _yield_session(factory):
+    # Crear la sesión no toca el pool: la conexión se pide en la primera consulta
+    db = factory()
+    try:
+        yield db
+    finally:
+        if db.in_transaction():
+            # Devolver la conexión (rollback incluido) es I/O: fuera del event loop
+            await run_in_threadpool(db.close)
+        else:
+            db.close()
+
+async def get_db():
+    """
+    Dependencia única de sesión. FastAPI la cachea por request, así que el
+    handler y ``auth.get_current_user`` comparten la misma sesión y conexión.
+    """
+    async for db in _yield_session(SessionLocal):
+        yield db
+
+async def get_read_db(request: Request):
+    """
+    Sesión para los GET públicos del catálogo.
+
+    Las peticiones autenticadas (los administradores que acaban de escribir) se
+    quedan en el primario para leer sus propios cambios sin esperar a la réplica.
+    """
+    factory = SessionLocal if request.headers.get("authorization") else ReadSessionLocal
+    async for db in _yield_session(factory):
+        yield db
+
+# ===== Stack async (DB_ASYNC=1) =====
+_ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+def async_url(url):
+    """Traduce la URL síncrona al driver async equivalente del mismo motor."""
+    url = make_url(str(url)) if not isinstance(url, URL) else url
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"DB_ASYNC no soporta el motor '{backend}'")
+    return url.set(drivername=_ASYNC_DRIVERS[backend])
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    async_engine = create_async_engine(
+        async_url(connection_url),
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        **pool_args(connection_url),
+    )
+    # expire_on_commit=False: los objetos se serializan después de cerrar la sesión
+    AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,15 +1,165 @@
 from email.message import EmailMessage
-import aiosmtplib
 from .config import settings
+import asyncio
 import logging
+import random
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+
+def _build_message(subject, to_email, content, html_content=None):
+    message = EmailMessage()
+    message["From"] = settings.SMTP_USER
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.set_content(content)
+
+    # Añadir contenido HTML si está disponible
+    if html_content:
+        message.add_alternative(html_content, subtype="html")
+    return message
+
+
+class EmailOutbox:
+    """
+    Cola de salida de correos con un worker en segundo plano.
+
+    Las peticiones HTTP solo encolan el mensaje; el worker los entrega por lotes
+    sobre una única conexión SMTP que se reutiliza mientras haya tráfico y se
+    cierra tras ``SMTP_IDLE_SECONDS`` sin mensajes. Un envío fallido se reintenta
+    con backoff exponencial (reconectando) hasta ``SMTP_MAX_RETRIES`` veces.
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._worker = None
+        self._smtp = None
+        self._retries = set()
+
+    @property
+    def running(self):
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.SMTP_OUTBOX_MAX)
+        self._worker = asyncio.get_running_loop().create_task(self._run(), name="email-outbox")
+        logger.info("Outbox de correo iniciado")
+
+    async def stop(self, timeout=None):
+        """Intenta vaciar la cola antes de detener el worker."""
+        if not self.running:
+            return
+        timeout = settings.SMTP_DRAIN_SECONDS if timeout is None else timeout
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Outbox detenido con {self._queue.qsize()} correos sin enviar")
+        if self._retries:
+            logger.warning(f"Outbox detenido con {len(self._retries)} reintentos pendientes")
+        for task in [self._worker, *self._retries]:
+            task.cancel()
+        await asyncio.gather(self._worker, *self._retries, return_exceptions=True)
+        await self._disconnect()
+        self._worker = None
+
+    def enqueue(self, message):
+        """Encola el mensaje. Devuelve False si la cola está llena."""
+        try:
+            self._queue.put_nowait((message, 0))
+            return True
+        except asyncio.QueueFull:
+            logger.error(f"Outbox lleno, se descarta el correo a {message['To']}")
+            return False
+
+    async def _connect(self):
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        # aiosmtplib solo se carga cuando de verdad hay correo que enviar
+        import aiosmtplib
+
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.SMTP_SERVER,
+            port=settings.SMTP_PORT,
+            use_tls=settings.SMTP_USE_TLS,
+            timeout=settings.SMTP_TIMEOUT_SECONDS,
+        )
+        await smtp.connect()
+        # Un servidor local de pruebas (aiosmtpd) no anuncia AUTH
+        if settings.SMTP_USER and settings.SMTP_PASS and smtp.supports_extension("auth"):
+            await smtp.login(settings.SMTP_USER, settings.SMTP_PASS)
+        self._smtp = smtp
+        return smtp
+
+    async def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def _next_batch(self):
+        """Espera el primer mensaje y junta los que ya estén en cola (hasta SMTP_BATCH_SIZE)."""
+        try:
+            first = await asyncio.wait_for(self._queue.get(), settings.SMTP_IDLE_SECONDS)
+        except asyncio.TimeoutError:
+            await self._disconnect()
+            first = await self._queue.get()
+        batch = [first]
+        while len(batch) < settings.SMTP_BATCH_SIZE and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _deliver(self, message):
+        try:
+            smtp = await self._connect()
+            await smtp.send_message(message)
+        except Exception:
+            # La conexión puede quedar en un estado inválido: se abre otra en el reintento
+            await self._disconnect()
+            raise
+
+    async def _retry_later(self, message, attempt):
+        delay = min(settings.SMTP_RETRY_MAX_SECONDS, settings.SMTP_RETRY_BASE_SECONDS * 2 ** attempt)
+        await asyncio.sleep(delay * (0.5 + random.random() / 2))
+        try:
+            self._queue.put_nowait((message, attempt + 1))
+        except asyncio.QueueFull:
+            logger.error(f"Outbox lleno, se descarta el reintento a {message['To']}")
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            for message, attempt in batch:
+                try:
+                    await self._deliver(message)
+                    logger.info(f"Correo enviado a {message['To']}")
+                except Exception as e:
+                    if attempt + 1 >= settings.SMTP_MAX_RETRIES:
+                        logger.error(f"Error enviando correo a {message['To']} (sin más reintentos): {str(e)}")
+                    else:
+                        logger.warning(f"Error enviando correo a {message['To']}, intento {attempt + 1}: {str(e)}")
+                        task = asyncio.get_running_loop().create_task(self._retry_later(message, attempt))
+                        self._retries.add(task)
+                        task.add_done_callback(self._retries.discard)
+                finally:
+                    self._queue.task_done()
+
+
+outbox = EmailOutbox()
+
+
 async def send_email(subject, to_email, content, html_content=None):
     """
     Envía un correo electrónico.
 
+    Si el outbox está corriendo (arranque de la app) el correo solo se encola y la
+    entrega ocurre en segundo plano; si no (scripts, consola) se envía directamente.
+
     Args:
         subject (str): Asunto del correo
         to_email (str): Dirección de correo del destinatario
@@ -17,7 +167,7 @@ async def send_email(subject, to_email, content, html_content=None):
         html_content (str, optional): Contenido del correo en HTML. Por defecto es None.
 
     Returns:
-        bool: True si el correo se envió correctamente, False en caso contrario
+        bool: True si el correo se envió (o encoló) correctamente, False en caso contrario
     """
     # Validar configuración de email
     email_validation = settings.validate_email_settings()
@@ -25,15 +175,11 @@ async def send_email(subject, to_email, content, html_content=None):
         logger.error(f"Error en configuración de email: {email_validation}")
         return False
 
-    message = EmailMessage()
-    message["From"] = settings.SMTP_USER
-    message["To"] = to_email
-    message["Subject"] = subject
-    message.set_content(content)
+    message = _build_message(subject, to_email, content, html_content)
+    if outbox.running:
+        return outbox.enqueue(message)
 
-    # Añadir contenido HTML si está disponible
-    if html_content:
-        message.add_alternative(html_content, subtype="html")
+    import aiosmtplib
 
     try:
         await aiosmtplib.send(
@@ -42,7 +188,7 @@ async def send_email(subject, to_email, content, html_content=None):
             port=settings.SMTP_PORT,
             username=settings.SMTP_USER,
             password=settings.SMTP_PASS,
-            use_tls=True
+            use_tls=settings.SMTP_USE_TLS
         )
         logger.info(f"Correo enviado a {to_email}")
         return True
@@ -59,7 +205,7 @@ async def send_reset_code_email(to_email, code):
         code (str): Código de recuperación
 
     Returns:
-        bool: True si el correo se envió correctamente, False en caso contrario
+        bool: True si el correo se envió (o encoló) correctamente, False en caso contrario
     """
     subject = f"Código de recuperación - {settings.APP_NAME}"
     text_content = f"""
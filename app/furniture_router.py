@@ -1,26 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from . import schemas, crud_furniture, crud_post, database, auth, crud_category
-from typing import List, Optional, Dict
+from . import schemas, crud_furniture, crud_post, database, auth, crud_category, http_cache
+from typing import List, Literal, Optional, Dict
+from decimal import Decimal
+import csv
+import io
+import json
 import logging
 
 router = APIRouter(prefix="/furniture", tags=["furniture"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@router.post("/", response_model=schemas.FurnitureOut, status_code=status.HTTP_201_CREATED)
-async def create_furniture(request: Request, db: Session = Depends(get_db),
-                    current_user: schemas.UserOut = Depends(auth.get_admin_user)):
-    # Leer y loguear body crudo para depuración
+def _parse_furniture_body(raw: bytes) -> schemas.FurnitureCreate:
+    """Decodifica, adapta y valida el body de creación (se ejecuta en el threadpool)."""
     logger = logging.getLogger(__name__)
     try:
-        body = await request.json()
-        logger.info(f"create_furniture RAW BODY: {body}")
+        body = json.loads(raw)
+        logger.info(f"create_furniture body recibido: {len(raw)} bytes")
     except Exception:
         logger.exception("No se pudo leer body crudo")
         body = None
@@ -36,8 +34,10 @@ async def create_furniture(request: Request, db: Session = Depends(get_db),
             body.pop('img_base64', None)
             logger.info("Mapped legacy 'img_base64' to 'images' list for compatibility")
 
-    # Log body mapeado antes de la validación Pydantic
-    logger.info(f"create_furniture MAPPED BODY: {body}")
+    # Log body mapeado antes de la validación Pydantic. Solo en DEBUG: formatear un body
+    # con imágenes de varios MB retiene el GIL durante segundos y frena a todo el worker.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"create_furniture MAPPED BODY: {body}")
 
     # Parsear con Pydantic
     try:
@@ -47,21 +47,21 @@ async def create_furniture(request: Request, db: Session = Depends(get_db),
         raise HTTPException(status_code=422, detail=f"Error de validación: {e}")
 
     # Log del objeto Pydantic antes de crear
-    try:
-        logger.info(f"create_furniture PARSED furniture.images: {getattr(furniture, 'images', None)}")
-        logger.info(f"create_furniture PARSED furniture.dict(): {furniture.dict()}")
-    except Exception:
-        logger.exception("Error al loguear furniture parsed")
+    if logger.isEnabledFor(logging.DEBUG):
+        try:
+            logger.debug(f"create_furniture PARSED furniture.images: {getattr(furniture, 'images', None)}")
+            logger.debug(f"create_furniture PARSED furniture.dict(): {furniture.dict()}")
+        except Exception:
+            logger.exception("Error al loguear furniture parsed")
 
-    return crud_furniture.create_furniture(db, furniture)
+    return furniture
 
-@router.post("/batch", response_model=List[schemas.FurnitureOut], status_code=status.HTTP_201_CREATED)
-async def create_furniture_batch(request: Request, db: Session = Depends(get_db),
-                          current_user: schemas.UserOut = Depends(auth.get_admin_user)):
+def _parse_furniture_batch_body(raw: bytes) -> List[schemas.FurnitureCreate]:
+    """Decodifica, adapta y valida el body del lote (se ejecuta en el threadpool)."""
     logger = logging.getLogger(__name__)
     try:
-        body = await request.json()
-        logger.info(f"create_furniture_batch RAW BODY: {body}")
+        body = json.loads(raw)
+        logger.info(f"create_furniture_batch body recibido: {len(raw)} bytes")
     except Exception:
         logger.exception("No se pudo leer body crudo en batch")
         body = None
@@ -78,8 +78,9 @@ async def create_furniture_batch(request: Request, db: Session = Depends(get_db)
                 item.pop('img_base64', None)
                 logger.info(f"Mapped legacy 'img_base64' to 'images' for batch item idx={idx}")
 
-    # Log mapped batch body
-    logger.info(f"create_furniture_batch MAPPED BODY: {body}")
+    # Log mapped batch body (solo DEBUG, ver _parse_furniture_body)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"create_furniture_batch MAPPED BODY: {body}")
 
     try:
         furniture_list = [schemas.FurnitureCreate(**item) for item in body]
@@ -88,29 +89,247 @@ async def create_furniture_batch(request: Request, db: Session = Depends(get_db)
         raise HTTPException(status_code=422, detail=f"Error de validación en batch: {e}")
 
     # Log parsed images for each item
-    for i, f in enumerate(furniture_list):
-        logger.info(f"create_furniture_batch PARSED item {i} images: {getattr(f, 'images', None)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, f in enumerate(furniture_list):
+            logger.debug(f"create_furniture_batch PARSED item {i} images: {getattr(f, 'images', None)}")
 
-    return crud_furniture.create_furniture_batch(db, furniture_list)
+    return furniture_list
+
+def _map_legacy_image(item) -> None:
+    """Compatibilidad: 'img_base64' legacy se mapea a 'images' (lista)."""
+    if isinstance(item, dict) and 'images' not in item and 'img_base64' in item and item.get('img_base64'):
+        img_val = item.pop('img_base64')
+        if isinstance(img_val, str) and img_val.strip():
+            item['images'] = [img_val]
+
+def _import_chunk(db: Session, lines: List[tuple]) -> tuple:
+    """Parsea, valida e inserta un bloque de líneas NDJSON (se ejecuta en el threadpool)."""
+    errors, parsed, line_nos = [], [], []
+    for line_no, raw in lines:
+        try:
+            item = json.loads(raw)
+        except ValueError as e:
+            errors.append({"line": line_no, "status_code": 400, "detail": f"JSON inválido: {e}"})
+            continue
+        _map_legacy_image(item)
+        try:
+            parsed.append(schemas.FurnitureCreate(**item))
+        except Exception as e:
+            name = item.get("name") if isinstance(item, dict) else None
+            errors.append({"line": line_no, "name": name, "status_code": 422, "detail": f"Error de validación: {e}"})
+            continue
+        line_nos.append(line_no)
+
+    created = 0
+    if parsed:
+        created, item_errors = crud_furniture.import_furniture_chunk(db, parsed)
+        for e in item_errors:
+            errors.append({"line": line_nos[e.pop("index")], **e})
+    errors.sort(key=lambda e: e["line"])
+    return created, errors
+
+def _created_response(content) -> JSONResponse:
+    """Serializa a JSON (imágenes en base64 incluidas) fuera del event loop."""
+    return JSONResponse(jsonable_encoder(content), status_code=status.HTTP_201_CREATED)
+
+def _create_one(db: Session, raw: bytes) -> JSONResponse:
+    furniture = _parse_furniture_body(raw)
+    obj = crud_furniture.create_furniture(db, furniture)
+    return _created_response(schemas.FurnitureOut.from_orm(obj))
+
+def _create_batch(db: Session, raw: bytes) -> JSONResponse:
+    furniture_list = _parse_furniture_batch_body(raw)
+    objs = crud_furniture.create_furniture_batch(db, furniture_list)
+    return _created_response([schemas.FurnitureOut.from_orm(o) for o in objs])
+
+# Los handlers son async solo para leer el body; el parseo (JSON/base64 de varios MB),
+# el CRUD síncrono y la serialización van al threadpool para no congelar el event loop.
+@router.post("/", response_model=schemas.FurnitureOut, status_code=status.HTTP_201_CREATED)
+async def create_furniture(request: Request, db: Session = Depends(database.get_db),
+                    current_user: schemas.UserOut = Depends(auth.get_admin_user)):
+    raw = await request.body()
+    return await run_in_threadpool(_create_one, db, raw)
+
+@router.post("/batch", response_model=List[schemas.FurnitureOut], status_code=status.HTTP_201_CREATED)
+async def create_furniture_batch(request: Request, db: Session = Depends(database.get_db),
+                          current_user: schemas.UserOut = Depends(auth.get_admin_user)):
+    raw = await request.body()
+    return await run_in_threadpool(_create_batch, db, raw)
+
+# Tope por línea: una línea sin salto de línea no puede hacer crecer el buffer sin límite
+IMPORT_MAX_LINE_BYTES = 32 * 1024 * 1024
+IMPORT_MAX_REPORTED_ERRORS = 1000
+
+@router.post("/import", response_model=schemas.ImportSummary)
+async def import_furniture(
+    request: Request,
+    chunk_size: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(database.get_db),
+    current_user: schemas.UserOut = Depends(auth.get_admin_user)
+):
+    """Importación de catálogo en NDJSON (un mueble por línea).
+
+    El body se consume en streaming y se confirma cada `chunk_size` líneas, así que
+    la memoria depende del tamaño del bloque y no del archivo. Los bloques ya
+    confirmados se conservan aunque una línea posterior falle; el resumen reporta
+    los errores por número de línea.
+    """
+    logger = logging.getLogger(__name__)
+    summary = {"lines": 0, "created": 0, "failed": 0, "chunks": 0, "errors": [], "errors_truncated": False}
+    pending: List[tuple] = []
+
+    async def flush():
+        created, errors = await run_in_threadpool(_import_chunk, db, pending[:])
+        pending.clear()
+        summary["chunks"] += 1
+        summary["created"] += created
+        summary["failed"] += len(errors)
+        room = IMPORT_MAX_REPORTED_ERRORS - len(summary["errors"])
+        summary["errors"] += errors[:max(room, 0)]
+        summary["errors_truncated"] = summary["errors_truncated"] or len(errors) > room
+        logger.info(f"Importación: bloque {summary['chunks']}, {summary['lines']} líneas, "
+                    f"{summary['created']} creados, {summary['failed']} con error")
+
+    buffer = bytearray()
+    async for piece in request.stream():
+        buffer += piece
+        if b"\n" in piece:
+            *complete, buffer = buffer.split(b"\n")
+            for raw in complete:
+                summary["lines"] += 1
+                if raw.strip():
+                    pending.append((summary["lines"], bytes(raw)))
+                if len(pending) >= chunk_size:
+                    await flush()
+        if len(buffer) > IMPORT_MAX_LINE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Línea {summary['lines'] + 1} demasiado grande")
+    if buffer.strip():
+        summary["lines"] += 1
+        pending.append((summary["lines"], bytes(buffer)))
+    if pending:
+        await flush()
+    return summary
+
+@router.patch("/bulk", response_model=schemas.FurnitureBulkPatchResult)
+def bulk_patch_furniture(
+    patch: schemas.FurnitureBulkPatch,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.UserOut = Depends(auth.get_admin_user)
+):
+    """Actualiza stock y/o precio de muchos muebles por id (sincronización de inventario)."""
+    return crud_furniture.bulk_patch_furniture(db, patch.items)
+
+@router.post("/stock/reserve", response_model=schemas.StockResult)
+def reserve_stock(
+    request: schemas.StockRequest,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.UserOut = Depends(auth.get_admin_user)
+):
+    """Reserva el stock de un carrito completo (todo o nada). 409 si algún mueble no alcanza.
+
+    Mismo principal que la liberación (admin o servicio de checkout con token de
+    admin): las reservas no se registran por usuario ni caducan, así que un cliente
+    cualquiera podría agotar el stock sin poder devolverlo."""
+    quantities = crud_furniture.reserve_stock(db, request.items)
+    return {"items": [{"id": i, "quantity": q} for i, q in quantities.items()]}
+
+@router.post("/stock/release", response_model=schemas.StockResult)
+def release_stock(
+    request: schemas.StockRequest,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.UserOut = Depends(auth.get_admin_user)
+):
+    """Libera stock previamente reservado. Solo administradores (o el servicio de
+    checkout con token de admin): no hay registro de reservas por usuario."""
+    quantities = crud_furniture.release_stock(db, request.items)
+    return {"items": [{"id": i, "quantity": q} for i, q in quantities.items()]}
+
+_EXPORT_CSV_FIELDS = ["id", "name", "description", "price", "category_id", "category", "stock", "brand",
+                      "color", "material", "dimensions", "created_at", "updated_at", "image_ids", "image_sha256"]
+_EXPORT_FLUSH_BYTES = 64 * 1024
+
+def _export_value(value):
+    """Fechas y Decimal a texto (JSON no los serializa; en CSV evita notación científica)."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def _export_rows(export_format: str, include_posts: bool):
+    """Genera el archivo por bloques de ~64KB. Es dueño de su propia sesión: la del
+    request se cierra antes de que termine el streaming."""
+    db = database.ReadSessionLocal()
+    out = io.StringIO()
+    writer = None
+    if export_format == "csv":
+        fields = _EXPORT_CSV_FIELDS + (["post_ids"] if include_posts else [])
+        writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+    try:
+        for item in crud_furniture.iter_furniture_export(db, include_posts):
+            if writer:
+                row = {k: _export_value(v) for k, v in item.items() if k not in ("images", "posts")}
+                row["image_ids"] = "|".join(str(i["id"]) for i in item["images"])
+                row["image_sha256"] = "|".join(i["sha256"] for i in item["images"])
+                if include_posts:
+                    row["post_ids"] = "|".join(str(p["id"]) for p in item["posts"])
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(item, default=_export_value, ensure_ascii=False))
+                out.write("\n")
+            if out.tell() >= _EXPORT_FLUSH_BYTES:
+                yield out.getvalue()
+                out.seek(0)
+                out.truncate()
+        if out.tell():
+            yield out.getvalue()
+    finally:
+        db.close()
+
+@router.get("/export")
+def export_furniture(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    include_posts: bool = False,
+    current_user: schemas.UserOut = Depends(auth.get_admin_user)
+):
+    """Exporta todo el catálogo en streaming (NDJSON o CSV) con memoria constante.
+    Las imágenes van como referencias (id y sha256), nunca como bytes."""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"furniture.{'csv' if format == 'csv' else 'ndjson'}"
+    return StreamingResponse(
+        _export_rows(format, include_posts),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 @router.get("/", response_model=List[schemas.FurnitureOut])
 def list_furniture(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     category_id: Optional[int] = None,
     category_ids: Optional[List[int]] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(database.get_read_db)
 ):
     """Listado de muebles. Puede filtrar por `category_id` (único) o `category_ids` (múltiples).
     Ejemplos:
       /furniture/?category_id=1
       /furniture/?category_ids=1&category_ids=2
     """
+    # 304 si el conjunto filtrado no cambió, antes de cargar la página
+    stamp = crud_furniture.furniture_list_stamp(db, category_id=category_id, category_ids=category_ids)
+    not_modified = http_cache.check(request, response, stamp, collection=True)
+    if not_modified is not None:
+        return not_modified
     # Si se provee category_ids, pasarlo al CRUD; si no, pasar category_id como antes
     return crud_furniture.get_all_furniture(db, skip, limit, category_id, category_ids)
 
 @router.get("/search", response_model=List[schemas.FurnitureOut])
 def search_furniture(
+    request: Request,
+    response: Response,
     term: Optional[str] = None,
     category_id: Optional[int] = None,
     category_ids: Optional[List[int]] = Query(None),
@@ -118,25 +337,39 @@ def search_furniture(
     max_price: Optional[float] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(database.get_read_db)
 ):
     """Búsqueda flexible con término, categorías (single o multiple) y rango de precio."""
+    stamp = crud_furniture.furniture_list_stamp(db, term, category_id, category_ids, min_price, max_price)
+    not_modified = http_cache.check(request, response, stamp, collection=True)
+    if not_modified is not None:
+        return not_modified
     return crud_furniture.search_furniture(db, term, category_id, category_ids, min_price, max_price, skip, limit)
 
 @router.get("/categories", response_model=List[schemas.CategoryOut])
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(db: Session = Depends(database.get_read_db)):
     # Devolver categorías completas desde la tabla `categories`
     return crud_category.get_all_categories(db)
 
 @router.post("/categories", response_model=schemas.CategoryOut, status_code=status.HTTP_201_CREATED)
-def create_category(category: schemas.CategoryCreate, db: Session = Depends(get_db),
+def create_category(category: schemas.CategoryCreate, db: Session = Depends(database.get_db),
                     current_user: schemas.UserOut = Depends(auth.get_admin_user)):
     # Solo administradores pueden crear categorías
     return crud_category.create_category(db, category)
 
+@router.patch("/categories/{category_id}/prices", response_model=schemas.CategoryPriceAdjustmentResult)
+def adjust_category_prices(
+    category_id: int,
+    adjustment: schemas.CategoryPriceAdjustment,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.UserOut = Depends(auth.get_admin_user)
+):
+    updated = crud_furniture.adjust_category_prices(db, category_id, adjustment.percent)
+    return {"category_id": category_id, "percent": adjustment.percent, "updated": updated}
+
 @router.get("/categories/{category_id}", response_model=schemas.CategoryOut)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    cat = crud_category.get_category_by_id(db, category_id)
+def get_category(category_id: int, db: Session = Depends(database.get_read_db)):
+    cat = crud_category.get_category_cached(db, category_id)
     if not cat:
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     return cat
@@ -145,7 +378,7 @@ def get_category(category_id: int, db: Session = Depends(get_db)):
 def update_category(
     category_id: int,
     category: schemas.CategoryUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     updated = crud_category.update_category(db, category_id, category)
@@ -156,7 +389,7 @@ def update_category(
 @router.delete("/categories/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     deleted = crud_category.delete_category(db, category_id)
@@ -165,7 +398,13 @@ def delete_category(
     return None
 
 @router.get("/{furniture_id}", response_model=schemas.FurnitureOut)
-def get_furniture(furniture_id: int, db: Session = Depends(get_db)):
+def get_furniture(furniture_id: int, request: Request, response: Response, db: Session = Depends(database.get_read_db)):
+    stamp = crud_furniture.furniture_stamp(db, furniture_id)
+    if stamp is None:
+        raise HTTPException(status_code=404, detail="Mueble no encontrado")
+    not_modified = http_cache.check(request, response, stamp)
+    if not_modified is not None:
+        return not_modified
     furniture = crud_furniture.get_furniture(db, furniture_id)
     if not furniture:
         raise HTTPException(status_code=404, detail="Mueble no encontrado")
@@ -175,7 +414,7 @@ def get_furniture(furniture_id: int, db: Session = Depends(get_db)):
 def update_furniture(
     furniture_id: int, 
     furniture: schemas.FurnitureUpdate, 
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     # Solo administradores pueden actualizar muebles
@@ -187,7 +426,7 @@ def update_furniture(
 @router.delete("/{furniture_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_furniture(
     furniture_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     """Elimina un mueble por id (requiere administrador)."""
@@ -199,7 +438,7 @@ def delete_furniture(
 @router.delete("/{furniture_id}/", status_code=status.HTTP_204_NO_CONTENT)
 def delete_furniture_trailing(
     furniture_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     """Alias con slash final para borrar un mueble (compatibilidad con clientes que agregan trailing slash)."""
@@ -213,7 +452,7 @@ def delete_furniture_trailing(
 def add_images(
     furniture_id: int,
     images: List[str],
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     """Agrega imágenes (lista base64/data URLs) al mueble."""
@@ -224,7 +463,7 @@ def add_images(
 def replace_images(
     furniture_id: int,
     images: List[str],
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     """Reemplaza todas las imágenes del mueble por la lista proporcionada."""
@@ -235,7 +474,7 @@ def replace_images(
 def reorder_images(
     furniture_id: int,
     order: Dict[int, int],
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     """Reordena imágenes. Body: {image_id: new_position, ...}"""
@@ -246,7 +485,7 @@ def reorder_images(
 def delete_image(
     furniture_id: int,
     image_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     """Elimina una imagen específica del mueble."""
@@ -259,7 +498,7 @@ def list_posts_for_furniture(
     furniture_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(database.get_read_db)
 ):
     return crud_post.get_posts_by_furniture(db, furniture_id, skip, limit)
 
@@ -267,7 +506,7 @@ def list_posts_for_furniture(
 def create_post_for_furniture(
     furniture_id: int,
     post: schemas.PostCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_db),
     current_user: schemas.UserOut = Depends(auth.get_admin_user)
 ):
     # Enforce path furniture_id over body furniture_id to avoid inconsistencias
@@ -0,0 +1,97 @@
+"""
+Validadores HTTP para los GET JSON del catálogo: ETag débil + Last-Modified.
+
+El handler obtiene primero un "sello" barato, ``(count, max(updated_at))``, con una
+agregación de crud. Si el cliente ya tiene esa versión (If-None-Match o
+If-Modified-Since) se responde 304 sin ejecutar la consulta completa ni serializar.
+
+Los listados y búsquedas (``collection=True``) no llevan Last-Modified: borrar un
+elemento baja la cuenta pero no adelanta ``max(updated_at)``, así que una fecha no
+basta para saber si el conjunto cambió. Para ellos solo vale el ETag, que incluye
+la cuenta.
+
+El ETag incluye la ruta y los parámetros de la petición, porque dos páginas del mismo
+conjunto filtrado comparten sello. Es débil (``W/``) porque el cuerpo puede variar
+byte a byte (compresión, orden de claves) sin cambiar su significado. Una columna
+DATETIME de MySQL sin fracciones tiene resolución de segundos: dos escrituras sobre
+el mismo conjunto en el mismo segundo, sin cambiar la cuenta, comparten validador.
+
+El micro-caché de nginx (``X-Accel-Expires``) lo marca ``micro_cache`` para todas las
+lecturas públicas del catálogo; el navegador solo ve ``Cache-Control``.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+
+
+# Los clientes revalidan siempre; el 304 es lo que ahorra trabajo
+CACHE_CONTROL = "no-cache"
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    # SQLite y MySQL devuelven DATETIME sin zona: se guardan en UTC
+    value = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def validators(request: Request, stamp: Tuple[int, Optional[datetime]]) -> Tuple[str, Optional[datetime]]:
+    count, updated_at = stamp
+    updated_at = _utc(updated_at)
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    # El ETag usa la precisión completa de la columna; Last-Modified solo admite segundos
+    key = f"{request.url.path}?{query}|{count}|{updated_at.isoformat() if updated_at else '-'}"
+    last_modified = updated_at.replace(microsecond=0) if updated_at else None
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:24]}"', last_modified
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Comparación débil (RFC 9110 §13.1.2); If-None-Match manda sobre If-Modified-Since
+        tags = [t for t in if_none_match.split(",") if t.strip()]
+        return any(t.strip() == "*" or _opaque(t) == _opaque(etag) for t in tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return since is not None and last_modified <= _utc(since).replace(microsecond=0)
+    return False
+
+
+def shared_cache_headers(seconds: int) -> dict:
+    """Tiempo de vida en el micro-caché de nginx distinto del de ``micro_cache``; 0 = no cachear."""
+    return {"X-Accel-Expires": str(max(0, seconds))}
+
+
+def _headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def check(request: Request, response: Response, stamp, collection: bool = False) -> Optional[Response]:
+    """
+    Devuelve un 304 listo si el cliente está al día; si no, agrega los validadores a
+    ``response`` (la respuesta inyectada del handler) y devuelve None.
+    """
+    etag, last_modified = validators(request, stamp)
+    if collection:
+        last_modified = None
+    headers = _headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
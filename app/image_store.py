@@ -0,0 +1,70 @@
+"""
+Copia en disco de los bytes de imagen, direccionada por contenido (sha256).
+
+La DB sigue siendo la fuente de verdad. El directorio ``IMAGE_STORAGE_DIR`` solo
+existe para que nginx entregue los bytes con ``sendfile`` (``X-Accel-Redirect``) y
+los workers de Python no los copien. Los archivos se escriben al primer pedido de
+cada imagen (backfill perezoso) y son inmutables: el nombre es el hash del
+contenido, así que dos filas con los mismos bytes comparten archivo.
+
+Ruta: ``<dir>/<h[0:2]>/<h[2:4]>/<h><ext>``. La extensión sale del MIME para que
+nginx también pueda deducir el Content-Type.
+"""
+import logging
+import mimetypes
+import os
+import tempfile
+from typing import Callable, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def enabled() -> bool:
+    return bool(settings.IMAGE_STORAGE_DIR)
+
+
+def relative_path(sha256: bytes, mime: str) -> str:
+    digest = sha256.hex()
+    ext = mimetypes.guess_extension(mime or "") or ""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def ensure_file(sha256: bytes, mime: str, load_bytes: Callable[[], Optional[bytes]]) -> Optional[str]:
+    """
+    Devuelve la ruta relativa del archivo, escribiéndolo si aún no existe.
+
+    ``load_bytes`` solo se llama cuando falta el archivo. Devuelve None si no se pudo
+    escribir (disco lleno, permisos): el llamador sirve los bytes desde la DB.
+    """
+    rel = relative_path(sha256, mime)
+    path = os.path.join(settings.IMAGE_STORAGE_DIR, rel)
+    if os.path.exists(path):
+        return rel
+
+    data = load_bytes()
+    if data is None:
+        return None
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # Escritura atómica: nginx nunca ve un archivo a medias, y dos workers que
+        # escriban la misma imagen a la vez producen el mismo contenido
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError as e:
+        logger.warning(f"No se pudo escribir la imagen en {path}: {e}")
+        return None
+    return rel
+
+
+def absolute_path(rel: str) -> str:
+    return os.path.join(settings.IMAGE_STORAGE_DIR, rel)
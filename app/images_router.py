@@ -1,32 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException, Response
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from . import database, models
+from . import database, http_cache, image_store, models
+from .config import settings
 import io
 
 router = APIRouter(prefix="/images", tags=["images"])
 
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+@router.get("/{image_id}/content")
+def get_image_content(image_id: int, db: Session = Depends(database.get_read_db)):
+    """Retorna el contenido binario de la imagen con el MIME correcto.
 
+    Con IMAGE_STORAGE_DIR los bytes se sirven desde disco: vía X-Accel-Redirect
+    (nginx los envía con sendfile) o, sin nginx, con FileResponse. El blob solo se
+    lee de la DB la primera vez, para escribir el archivo.
 
-@router.get("/{image_id}/content")
-def get_image_content(image_id: int, db: Session = Depends(get_db)):
-    """Retorna el contenido binario de la imagen (stream) con el MIME correcto."""
-    img = db.query(models.FurnitureImage).filter(models.FurnitureImage.id == image_id).first()
-    if not img:
+    El contenido de un id no cambia (reemplazar imágenes crea ids nuevos), así que
+    nginx lo guarda NGINX_IMAGE_CACHE_SECONDS en su micro-caché.
+    """
+    # Solo metadatos: el blob no se toca si el archivo ya está en disco
+    meta = (
+        db.query(models.FurnitureImage.mime, models.FurnitureImage.size_bytes, models.FurnitureImage.sha256)
+        .filter(models.FurnitureImage.id == image_id)
+        .first()
+    )
+    if not meta:
         raise HTTPException(status_code=404, detail="Imagen no encontrada")
+    cache_headers = http_cache.shared_cache_headers(settings.NGINX_IMAGE_CACHE_SECONDS)
+
+    def load_bytes():
+        return db.query(models.FurnitureImage.bytes).filter(models.FurnitureImage.id == image_id).scalar()
+
+    if image_store.enabled():
+        rel = image_store.ensure_file(meta.sha256, meta.mime, load_bytes)
+        if rel is not None:
+            prefix = settings.IMAGE_ACCEL_REDIRECT_PREFIX
+            if prefix:
+                return Response(media_type=meta.mime, headers={**cache_headers, "X-Accel-Redirect": prefix.rstrip("/") + "/" + rel})
+            return FileResponse(image_store.absolute_path(rel), media_type=meta.mime, headers=cache_headers)
 
     # usar StreamingResponse para no cargar en memoria adicional
     try:
-        stream = io.BytesIO(img.bytes)
-        headers = {"Content-Length": str(img.size_bytes)}
-        return StreamingResponse(stream, media_type=img.mime, headers=headers)
+        stream = io.BytesIO(load_bytes())
+        headers = {**cache_headers, "Content-Length": str(meta.size_bytes)}
+        return StreamingResponse(stream, media_type=meta.mime, headers=headers)
     except Exception:
         raise HTTPException(status_code=500, detail="Error al leer el contenido de la imagen")
-
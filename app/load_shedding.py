@@ -0,0 +1,148 @@
+"""
+Control de admisión para el threadpool de AnyIO.
+
+Los endpoints ``def`` y el trabajo síncrono de los ``async`` corren en el threadpool de AnyIO (``THREADPOOL_LIMIT`` hilos,
+alineado con el pool de conexiones). Cuando hay más de ``ADMISSION_QUEUE_LIMIT``
+tareas esperando hilo, una petición nueva solo alargaría la cola hasta vencer el
+timeout del cliente, así que se rechaza de inmediato con 503 y ``Retry-After``.
+
+La admisión se decide en el limitador y no por el tipo de endpoint: se envuelve
+``anyio.to_thread.run_sync``, por donde pasan los endpoints y dependencias ``def`` y
+también los ``run_in_threadpool`` de los endpoints ``async`` (altas, lotes e
+importación de muebles). La primera vez que una petición pide hilo, si ya hay
+``ADMISSION_QUEUE_LIMIT`` tareas esperando en el limitador, se rechaza con 503. Una
+petición admitida no se vuelve a evaluar: cortar una importación a medias dejaría
+bloques confirmados y una respuesta de error. Tampoco se evalúa nada tras empezar la
+respuesta (exportación en streaming) ni fuera de una petición (arranque, outbox).
+
+Un pool de conexiones agotado (``TimeoutError`` de SQLAlchemy tras ``DB_POOL_TIMEOUT``)
+también responde 503. Los CRUD capturan ``SQLAlchemyError`` y lo convierten en un
+HTTPException 500, así que el manejador de HTTPException busca el timeout en la
+cadena de excepciones en lugar de depender de que llegue sin capturar.
+"""
+import logging
+from contextvars import ContextVar
+from typing import Optional
+
+import anyio.to_thread
+from fastapi import HTTPException
+from fastapi.exception_handlers import http_exception_handler as default_http_exception_handler
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.responses import JSONResponse
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# El healthcheck de Docker no debe reiniciar el contenedor por estar ocupado, y la
+# readiness no debe sacar al worker del balanceo por una ráfaga pasajera
+EXEMPT_PATHS = {"/health", "/ready"}
+
+
+def configure_threadpool() -> None:
+    """Aplica THREADPOOL_LIMIT al limitador por defecto (llamar dentro del event loop)."""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.THREADPOOL_LIMIT
+    logger.info(
+        f"Threadpool: {settings.THREADPOOL_LIMIT} hilos; pool DB: "
+        f"{settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW} conexiones"
+    )
+
+
+def _overloaded_response() -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Servidor saturado, intenta más tarde"},
+        status_code=503,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+
+class _Admission:
+    __slots__ = ("decided",)
+
+    def __init__(self):
+        self.decided = False
+
+
+# Estado de admisión de la petición en curso; None fuera de una petición HTTP
+_current_admission: ContextVar[Optional[_Admission]] = ContextVar("admission", default=None)
+_hook_installed = False
+
+
+def _install_admission_hook() -> None:
+    """Envuelve ``anyio.to_thread.run_sync`` para decidir la admisión al pedir hilo."""
+    global _hook_installed
+    if _hook_installed:
+        return
+    original = anyio.to_thread.run_sync
+
+    async def run_sync(func, *args, **kwargs):
+        admission = _current_admission.get()
+        if admission is not None and not admission.decided:
+            admission.decided = True
+            limiter = kwargs.get("limiter") or anyio.to_thread.current_default_thread_limiter()
+            waiting = limiter.statistics().tasks_waiting
+            if waiting >= settings.ADMISSION_QUEUE_LIMIT:
+                logger.warning(f"Petición rechazada: {waiting} tareas esperando hilo")
+                # HTTPException: los CRUD la dejan pasar (``except HTTPException: raise``)
+                raise HTTPException(
+                    status_code=503,
+                    detail="Servidor saturado, intenta más tarde",
+                    headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+                )
+        # Sin await entre la comprobación y la cola del limitador: una ráfaga se cuenta
+        # completa aunque todas sus peticiones lleguen aquí en la misma vuelta del loop
+        return await original(func, *args, **kwargs)
+
+    anyio.to_thread.run_sync = run_sync
+    _hook_installed = True
+
+
+class LoadSheddingMiddleware:
+    """Middleware ASGI que marca cada petición para el control de admisión del threadpool."""
+
+    def __init__(self, app):
+        self.app = app
+        _install_admission_hook()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        admission = _Admission()
+
+        async def send_wrapper(message):
+            # Con la respuesta en marcha ya no se puede contestar 503
+            if message["type"] == "http.response.start":
+                admission.decided = True
+            await send(message)
+
+        token = _current_admission.set(admission)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_admission.reset(token)
+
+
+def _caused_by_pool_timeout(exc: BaseException) -> bool:
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, PoolTimeoutError):
+            return True
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def pool_timeout_handler(request, exc) -> JSONResponse:
+    """QueuePool agotado tras DB_POOL_TIMEOUT: fallar rápido con 503 en vez de 500."""
+    logger.warning(f"Pool de conexiones agotado en {request.url.path}")
+    return _overloaded_response()
+
+
+async def http_exception_handler(request, exc):
+    """El 500 que un CRUD levanta al capturar el timeout del pool se responde como 503."""
+    if exc.status_code == 500 and _caused_by_pool_timeout(exc):
+        return pool_timeout_handler(request, exc)
+    return await default_http_exception_handler(request, exc)
@@ -1,9 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from contextlib import asynccontextmanager
+import logging
 import os
 
-from . import models, schemas, crud, auth, database, email_utils
+from . import models, schemas, crud, auth, database, email_utils, rate_limit, warmup
+from .config import settings
+from .profiling import ProfilerMiddleware
+from .cache_purge import CachePurgeMiddleware
+from .micro_cache import MicroCacheMiddleware
+from .load_shedding import LoadSheddingMiddleware, configure_threadpool, http_exception_handler, pool_timeout_handler
 from .furniture_router import router as furniture_router
 from .post_router import router as post_router
 from .images_router import router as images_router
@@ -12,16 +22,42 @@ from .images_router import router as images_router
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development").lower()
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173").split(",")
 
-# En DEV puedes crear tablas automáticamente; en PROD usa Alembic
-if ENVIRONMENT != "production":
-    models.Base.metadata.create_all(bind=database.engine)
+# ===== Arranque / apagado =====
+# Importar este módulo no toca la DB ni abre conexiones: todo el trabajo de arranque
+# vive aquí, para que los workers (y los tests) arranquen rápido.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    logging.basicConfig(level=logging.INFO)
+    configure_threadpool()
+    # En DEV puedes crear tablas automáticamente; en PROD usa Alembic
+    await run_in_threadpool(database.init_db, ENVIRONMENT != "production")
+    # Outbox de correo (entrega en segundo plano)
+    email_utils.outbox.start()
+    # Pool, consultas calientes y categorías antes de aceptar tráfico
+    if settings.WARMUP_ENABLED:
+        await warmup.warm_up()
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        # Al apagar deja de anunciarse listo para que el balanceador drene el worker
+        app.state.ready = False
+        await email_utils.outbox.stop()
 
 app = FastAPI(
     title="Mueblería Plaza Reforma API",
     description="API para gestión de muebles y publicaciones",
-    version="2.0"
+    version="2.0",
+    lifespan=lifespan,
 )
 
+# ===== Control de admisión (503 si la cola del threadpool está llena) =====
+# Se registra antes que CORS para que el 503 también lleve las cabeceras CORS
+app.add_middleware(LoadSheddingMiddleware)
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+
 # ===== CORS =====
 from fastapi.middleware.cors import CORSMiddleware
 app.add_middleware(
@@ -32,17 +68,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ===== Sesión DB por request =====
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ===== Micro-caché de nginx: marca las lecturas públicas y purga tras escribir =====
+app.add_middleware(MicroCacheMiddleware)
+app.add_middleware(CachePurgeMiddleware)
+
+# ===== Perfilado bajo demanda (X-Profile: 1, solo admins) =====
+app.add_middleware(ProfilerMiddleware)
 
 # ===== Healthcheck (usado por Docker) =====
 @app.get("/health")
-def health(db: Session = Depends(get_db)):
+def health(db: Session = Depends(database.get_db)):
     try:
         db.execute(text("SELECT 1"))
         return {"status": "ok"}
@@ -50,47 +85,57 @@ def health(db: Session = Depends(get_db)):
         # que el healthcheck falle si la DB no responde
         raise HTTPException(status_code=500, detail=f"db_error: {e}")
 
+# ===== Readiness (listo tras el warm-up del arranque) =====
+@app.get("/ready")
+async def ready(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail="not_ready")
+    return {"status": "ready"}
+
 # ===== Auth / Usuarios =====
-@app.post("/register", response_model=schemas.UserOut, tags=["usuarios"])
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return crud.create_user(db, user)
+@app.post("/register", dependencies=[Depends(rate_limit.limit("register"))], response_model=schemas.UserOut, tags=["usuarios"])
+async def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+    # async: el bcrypt se espera sin ocupar hilo del threadpool ni conexión (ver crud)
+    return await crud.create_user(db, user)
 
-@app.post("/login", tags=["usuarios"])
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    user_db = crud.authenticate_user(db, user.email, user.password)
+@app.post("/login", dependencies=[Depends(rate_limit.limit("login"))], tags=["usuarios"])
+async def login(user: schemas.UserLogin, db: Session = Depends(database.get_db)):
+    user_db = await crud.authenticate_user(db, user.email, user.password)
     if not user_db:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
     access_token = auth.create_access_token({"sub": user_db.email})
     return {"access_token": access_token, "token_type": "bearer", "user_id": user_db.id, "is_admin": user_db.is_admin}
 
-@app.post("/request-reset", tags=["usuarios"])
-async def request_reset(data: schemas.RequestReset, db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, data.email)
+@app.post("/request-reset", dependencies=[Depends(rate_limit.limit("request-reset"))], tags=["usuarios"])
+async def request_reset(data: schemas.RequestReset, db: Session = Depends(database.get_db)):
+    # El trabajo de DB es síncrono: va al threadpool para no congelar el event loop
+    user = await run_in_threadpool(crud.get_user_by_email, db, data.email)
     if not user:
         raise HTTPException(status_code=404, detail="Email no encontrado")
-    code = crud.set_reset_code(db, user)
+    code = await run_in_threadpool(crud.set_reset_code, db, user)
+    # Solo encola: el outbox entrega el correo en segundo plano
     await email_utils.send_reset_code_email(user.email, code)
     return {"msg": "Código enviado al email"}
 
-@app.post("/verify-code", tags=["usuarios"])
-def verify_code(data: schemas.VerifyCode, db: Session = Depends(get_db)):
+@app.post("/verify-code", dependencies=[Depends(rate_limit.limit("verify-code"))], tags=["usuarios"])
+def verify_code(data: schemas.VerifyCode, db: Session = Depends(database.get_db)):
     if not crud.verify_reset_code(db, data.email, data.code):
         raise HTTPException(status_code=400, detail="Código inválido o expirado")
     return {"msg": "Código válido"}
 
-@app.post("/reset-password", tags=["usuarios"])
-def reset_password(data: schemas.ResetPassword, db: Session = Depends(get_db)):
-    if not crud.reset_password(db, data.email, data.code, data.new_password):
+@app.post("/reset-password", dependencies=[Depends(rate_limit.limit("reset-password"))], tags=["usuarios"])
+async def reset_password(data: schemas.ResetPassword, db: Session = Depends(database.get_db)):
+    if not await crud.reset_password(db, data.email, data.code, data.new_password):
         raise HTTPException(status_code=400, detail="Código inválido o expirado")
     return {"msg": "Contraseña actualizada"}
 
 @app.post("/admin", response_model=schemas.UserOut, tags=["admin"])
-def create_admin(
+async def create_admin(
         user: schemas.UserCreate,
-        db: Session = Depends(get_db),
+        db: Session = Depends(database.get_db),
         current_user: dict = Depends(auth.get_admin_user)
 ):
-    return crud.create_admin_user(db, user)
+    return await crud.create_admin_user(db, user)
 
 # ===== Root =====
 @app.get("/", tags=["general"])
@@ -102,6 +147,11 @@ def read_root():
     }
 
 # ===== Routers =====
+# Con DB_ASYNC=1 los GET del catálogo se atienden con la sesión async; van primero
+# para que ganen sobre las rutas síncronas equivalentes.
+if database.DB_ASYNC:
+    from .async_router import router as async_router
+    app.include_router(async_router)
 app.include_router(furniture_router)
 app.include_router(post_router)
 app.include_router(images_router)
@@ -0,0 +1,45 @@
+"""
+Marca para el micro-caché de nginx en todos los GET anónimos del catálogo.
+
+nginx.conf cachea ``/api/furniture``, ``/api/posts`` y ``/api/images``, pero no tiene
+``proxy_cache_valid``: solo guarda lo que el app marca con ``X-Accel-Expires``. En vez
+de que cada handler se acuerde de poner la cabecera (y alguno se olvide), este
+middleware la agrega a toda respuesta 200/304 de un GET/HEAD sin Authorization bajo
+esas rutas. Un handler que ya la fija conserva su valor (las imágenes usan
+``NGINX_IMAGE_CACHE_SECONDS``).
+"""
+from .cache_purge import CATALOG_PATHS
+from .config import settings
+
+CACHEABLE_METHODS = {"GET", "HEAD"}
+CACHEABLE_STATUS = {200, 304}
+
+
+class MicroCacheMiddleware:
+    """Middleware ASGI: agrega ``X-Accel-Expires`` a las lecturas públicas del catálogo."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in CACHEABLE_METHODS
+            or settings.NGINX_CACHE_SECONDS <= 0
+            or not scope["path"].startswith(CATALOG_PATHS)
+            or any(name == b"authorization" for name, _ in scope["headers"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] in CACHEABLE_STATUS:
+                headers = list(message.get("headers", []))
+                if not any(name.lower() == b"x-accel-expires" for name, _ in headers):
+                    # Primero: nginx < 1.23 procesa las cabeceras en orden y un
+                    # Cache-Control: no-cache previo deja la respuesta fuera del caché
+                    headers.insert(0, (b"x-accel-expires", str(settings.NGINX_CACHE_SECONDS).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -52,10 +52,10 @@ class Furniture(Base):
 
     # relación con categoría (objeto)
     category = relationship("Category", back_populates="furniture")
-    posts = relationship("Post", back_populates="furniture", cascade="all, delete-orphan")
+    posts = relationship("Post", back_populates="furniture", cascade="all, delete-orphan", passive_deletes=True)
 
     # nueva relación para múltiples imágenes
-    images = relationship("FurnitureImage", back_populates="furniture", cascade="all, delete-orphan", order_by="(FurnitureImage.position, FurnitureImage.id)")
+    images = relationship("FurnitureImage", back_populates="furniture", cascade="all, delete-orphan", passive_deletes=True, order_by="(FurnitureImage.position, FurnitureImage.id)")
 
 class Post(Base):
     __tablename__ = "posts"
@@ -63,7 +63,7 @@ class Post(Base):
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     publication_date = Column(DateTime(timezone=True), default=lambda: datetime.datetime.now(datetime.timezone.utc))
-    furniture_id = Column(Integer, ForeignKey("furniture.id"), nullable=False)
+    furniture_id = Column(Integer, ForeignKey("furniture.id", ondelete="CASCADE"), nullable=False)
 
     # relación inversa
     furniture = relationship("Furniture", back_populates="posts")
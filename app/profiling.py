@@ -0,0 +1,333 @@
+"""
+Perfilado bajo demanda de una sola petición.
+
+Un administrador puede pedir que una petición concreta se ejecute bajo un
+perfilador de muestreo enviando la cabecera ``X-Profile: 1`` (o el parámetro
+``?__profile=1``) junto con su token Bearer. El reporte (árbol de llamadas y
+tiempo de base de datos por separado) se escribe en ``settings.PROFILE_DIR`` y
+su nombre se devuelve en la cabecera ``X-Profile-Report``.
+
+Solo se muestrean las pilas de la petición perfilada: los hilos del threadpool
+mientras ejecutan trabajo suyo (se registran al entrar vía ``anyio.to_thread``) y
+el hilo del event loop mientras la tarea activa es la de la petición. Las demás
+peticiones concurrentes no aparecen en el reporte.
+
+Si la petición no trae el interruptor, el middleware solo revisa la cabecera y
+el query string y delega directamente en la aplicación.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import anyio.to_thread
+from fastapi import HTTPException
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from . import auth, database
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "__profile"
+
+_DB_PACKAGES = ("sqlalchemy", "mysql", "pymysql", "aiomysql", "sqlite3", "aiosqlite")
+
+_current: contextvars.ContextVar[Optional["_DBCollector"]] = contextvars.ContextVar("profile_db_collector", default=None)
+_current_sampler: contextvars.ContextVar[Optional["_Sampler"]] = contextvars.ContextVar("profile_sampler", default=None)
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+# ====================== Tiempo de base de datos ======================
+
+class _DBCollector:
+    """Acumula tiempo por sentencia SQL de la petición perfilada."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0.0
+        self.count = 0
+        self.by_statement: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+
+    def add(self, statement: str, elapsed: float) -> None:
+        with self._lock:
+            self.total += elapsed
+            self.count += 1
+            entry = self.by_statement[" ".join(statement.split())[:300]]
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("_profile_t0", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collector = _current.get()
+    if collector is None:
+        return
+    starts = conn.info.get("_profile_t0")
+    if starts:
+        collector.add(statement, time.perf_counter() - starts.pop())
+
+
+def _install_hooks() -> None:
+    """Registra los listeners de SQLAlchemy y el de hilos la primera vez que se perfila algo."""
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _install_thread_hook()
+        _hooks_installed = True
+
+
+def _install_thread_hook() -> None:
+    """
+    Envuelve ``anyio.to_thread.run_sync`` (por donde pasan ``run_in_threadpool`` y los
+    endpoints y dependencias ``def``) para registrar qué hilo ejecuta trabajo de la
+    petición perfilada. Fuera de una petición perfilada solo cuesta leer un contextvar.
+    """
+    original = anyio.to_thread.run_sync
+
+    async def run_sync(func, *args, **kwargs):
+        sampler = _current_sampler.get()
+        if sampler is not None:
+            func = sampler.track(func)
+        return await original(func, *args, **kwargs)
+
+    anyio.to_thread.run_sync = run_sync
+
+
+# ====================== Muestreo de pilas ======================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{code.co_name}:{frame.f_lineno}"
+
+
+class _Sampler(threading.Thread):
+    """
+    Toma una foto de las pilas de la petición perfilada cada ``interval`` segundos:
+    los hilos del threadpool que ejecutan su trabajo y el hilo del event loop cuando
+    su tarea es la que corre.
+    """
+
+    def __init__(self, interval: float, task: asyncio.Task):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.samples: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self.total_samples = 0
+        self._task = task
+        self._loop = task.get_loop()
+        self._loop_thread = threading.get_ident()
+        self._threads: Dict[int, int] = defaultdict(int)
+        self._threads_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def track(self, func):
+        """Envuelve ``func`` para que el hilo que la ejecute se muestree mientras dure."""
+        def tracked(*args):
+            tid = threading.get_ident()
+            with self._threads_lock:
+                self._threads[tid] += 1
+            try:
+                return func(*args)
+            finally:
+                with self._threads_lock:
+                    self._threads[tid] -= 1
+                    if not self._threads[tid]:
+                        del self._threads[tid]
+        return tracked
+
+    def _targets(self) -> set:
+        with self._threads_lock:
+            targets = set(self._threads)
+        # Otras peticiones también corren en el loop: solo cuenta si la tarea activa es la nuestra
+        if asyncio.current_task(self._loop) is self._task:
+            targets.add(self._loop_thread)
+        return targets
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            targets = self._targets()
+            if not targets:
+                continue
+            frames = sys._current_frames()
+            for tid in targets:
+                frame = frames.get(tid)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    self.samples[tuple(reversed(stack))] += 1
+                    self.total_samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+# ====================== Reporte ======================
+
+def _is_db_frame(label: str) -> bool:
+    return label.split(".", 1)[0] in _DB_PACKAGES
+
+
+def _render_tree(samples: Dict[Tuple[str, ...], int], total: int, min_pct: float = 1.0) -> List[str]:
+    tree: dict = {}
+    for stack, n in samples.items():
+        node = tree
+        for label in stack:
+            child = node.setdefault(label, {"_n": 0, "_db": 0, "_children": {}})
+            child["_n"] += n
+            if _is_db_frame(label):
+                child["_db"] += n
+            node = child["_children"]
+
+    lines: List[str] = []
+
+    def walk(children: dict, depth: int) -> None:
+        for label, info in sorted(children.items(), key=lambda kv: -kv[1]["_n"]):
+            pct = 100.0 * info["_n"] / total if total else 0.0
+            if pct < min_pct:
+                continue
+            mark = " [db]" if info["_db"] == info["_n"] else ""
+            lines.append(f"{'  ' * depth}{pct:5.1f}%  {label}{mark}")
+            walk(info["_children"], depth + 1)
+
+    walk(tree, 0)
+    return lines
+
+
+def _write_report(report_id: str, method: str, path: str, wall: float,
+                  sampler: _Sampler, collector: _DBCollector) -> str:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    db_samples = sum(n for stack, n in sampler.samples.items() if any(_is_db_frame(l) for l in stack))
+    lines = [
+        f"{method} {path}",
+        f"fecha: {datetime.utcnow().isoformat()}Z",
+        f"tiempo total: {wall * 1000:.1f} ms",
+        f"tiempo en DB: {collector.total * 1000:.1f} ms en {collector.count} sentencias",
+        f"tiempo fuera de DB: {max(0.0, wall - collector.total) * 1000:.1f} ms",
+        f"muestras: {sampler.total_samples} ({db_samples} dentro de la capa de DB)",
+        "",
+        "== Sentencias SQL (por tiempo acumulado) ==",
+    ]
+    for stmt, (count, elapsed) in sorted(collector.by_statement.items(), key=lambda kv: -kv[1][1]):
+        lines.append(f"{elapsed * 1000:9.1f} ms  x{count:<5} {stmt}")
+    lines += ["", "== Árbol de llamadas (muestreo) =="]
+    lines += _render_tree(sampler.samples, sampler.total_samples)
+
+    report_path = os.path.join(settings.PROFILE_DIR, f"{report_id}.txt")
+    with open(report_path, "w", encoding="utf-8") as fh:
+        fh.write("\n".join(lines) + "\n")
+    # Formato "folded" para herramientas de flamegraph
+    with open(os.path.join(settings.PROFILE_DIR, f"{report_id}.folded"), "w", encoding="utf-8") as fh:
+        for stack, n in sampler.samples.items():
+            fh.write(f"{';'.join(stack)} {n}\n")
+    return report_path
+
+
+# ====================== Middleware ======================
+
+def _profile_requested(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == PROFILE_HEADER:
+            return value.strip() not in (b"", b"0", b"false")
+    qs = scope.get("query_string", b"")
+    if PROFILE_QUERY_PARAM.encode() not in qs:
+        return False
+    values = parse_qs(qs.decode("latin-1")).get(PROFILE_QUERY_PARAM, [""])
+    return values[-1] not in ("", "0", "false")
+
+
+async def _authorize_admin(scope) -> None:
+    """Valida el token Bearer reutilizando las dependencias de ``auth``."""
+    authorization = ""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            break
+    scheme, token = get_authorization_scheme_param(authorization)
+    if not authorization or scheme.lower() != "bearer":
+        raise HTTPException(status_code=401, detail="No autenticado", headers={"WWW-Authenticate": "Bearer"})
+    db = database.SessionLocal()
+    try:
+        user = await run_in_threadpool(auth.get_current_user, token=token, db=db)
+        await auth.get_admin_user(current_user=user)
+    finally:
+        db.close()
+
+
+class ProfilerMiddleware:
+    """Middleware ASGI que perfila la petición solo si un administrador lo pide."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await _authorize_admin(scope)
+        except HTTPException as e:
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+            await response(scope, receive, send)
+            return
+
+        _install_hooks()
+        report_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        collector = _DBCollector()
+        sampler = _Sampler(max(settings.PROFILE_SAMPLE_INTERVAL_MS, 0.1) / 1000.0, asyncio.current_task())
+        token = _current.set(collector)
+        sampler_token = _current_sampler.set(sampler)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-profile-report", f"{report_id}.txt".encode()),
+                    (b"x-profile-wall-ms", f"{elapsed * 1000:.1f}".encode()),
+                    (b"x-profile-db-ms", f"{collector.total * 1000:.1f}".encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            wall = time.perf_counter() - started
+            sampler.stop()
+            _current.reset(token)
+            _current_sampler.reset(sampler_token)
+            try:
+                path = _write_report(report_id, scope.get("method", ""), scope.get("path", ""), wall, sampler, collector)
+                logger.info(f"Reporte de perfilado escrito en {path}")
+            except OSError as e:
+                logger.error(f"No se pudo escribir el reporte de perfilado: {e}")
@@ -0,0 +1,228 @@
+"""
+Limitador token bucket para los endpoints de autenticación.
+
+Cada endpoint protegido tiene dos cubetas: una por IP de cliente y otra por el
+email objetivo del body. Se evalúan como dependencia de la ruta, antes de abrir la
+sesión de DB y antes de cualquier hash bcrypt o envío SMTP; si alguna está vacía
+se responde 429 con ``Retry-After``.
+
+El almacenamiento es intercambiable: en memoria (un solo proceso) o Redis
+(``RATE_LIMIT_STORAGE_URL=redis://...``) para compartir cubetas entre workers. Redis
+se usa con su cliente asyncio: la dependencia corre en el event loop y una llamada
+de red bloqueante lo congelaría en cada login.
+"""
+import inspect
+import ipaddress
+import json
+import logging
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ====================== Almacenamiento ======================
+
+class MemoryBucketStorage:
+    """Cubetas en memoria del proceso. Suficiente con un único worker."""
+
+    _PRUNE_EVERY = 10_000
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """Descuenta ``cost`` fichas. Devuelve 0 si se permitió o los segundos a esperar."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts, _, _ = self._buckets.get(key, (capacity, now, rate, capacity))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now, rate, capacity)
+            self._calls += 1
+            if self._calls % self._PRUNE_EVERY == 0:
+                self._prune(now)
+            return wait
+
+    def _prune(self, now: float) -> None:
+        # Una cubeta que ya se habría rellenado por completo equivale a no tenerla
+        full = [k for k, (tokens, ts, rate, cap) in self._buckets.items() if tokens + (now - ts) * rate >= cap]
+        for k in full:
+            del self._buckets[k]
+
+
+class RedisBucketStorage:
+    """Cubetas compartidas en Redis (cliente asyncio); la actualización es atómica vía script Lua."""
+
+    _SCRIPT = """
+local tokens_ts = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local tokens = tonumber(tokens_ts[1]) or capacity
+local ts = tonumber(tokens_ts[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_STORAGE_URL usa Redis pero el paquete 'redis' no está instalado") from e
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self._SCRIPT)
+        self._prefix = prefix
+
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        wait = await self._script(keys=[self._prefix + key], args=[rate, capacity, time.time(), cost])
+        return float(wait)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                url = settings.RATE_LIMIT_STORAGE_URL
+                _storage = RedisBucketStorage(url) if url.startswith(("redis://", "rediss://")) else MemoryBucketStorage()
+    return _storage
+
+
+def set_storage(storage) -> None:
+    """Permite instalar otro backend (cualquier objeto con ``consume``, síncrono o async)."""
+    global _storage
+    _storage = storage
+
+
+# ====================== IP del cliente ======================
+
+def _trusted_proxies():
+    """IPs o redes (CIDR) de TRUSTED_PROXIES; "*" se conserva tal cual."""
+    trusted = set()
+    for p in settings.TRUSTED_PROXIES.split(","):
+        p = p.strip()
+        if not p:
+            continue
+        try:
+            trusted.add(p if p == "*" else ipaddress.ip_network(p, strict=False))
+        except ValueError:
+            logger.warning(f"TRUSTED_PROXIES: entrada inválida '{p}'")
+    return trusted
+
+
+def _is_trusted(host: str, trusted) -> bool:
+    try:
+        addr = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(net != "*" and addr in net for net in trusted)
+
+
+_warned_untrusted_proxy = False
+
+
+def _warn_untrusted_proxy(peer: str) -> None:
+    # Una vez por proceso: si el proxy real no es de confianza, todos los clientes
+    # comparten la cubeta de su IP y un atacante deja sin login a todos
+    global _warned_untrusted_proxy
+    if not _warned_untrusted_proxy:
+        _warned_untrusted_proxy = True
+        logger.error(
+            f"X-Forwarded-For recibido de {peer}, que no está en TRUSTED_PROXIES: el rate "
+            f"limit usará la IP del proxy para todos sus clientes. Agrega su IP o red."
+        )
+
+
+def client_ip(request: Request) -> str:
+    """IP real del cliente detrás de nginx.
+
+    nginx agrega ``$remote_addr`` al final de X-Forwarded-For, así que se recorre
+    de derecha a izquierda saltando los proxies de confianza; lo que haya más a la
+    izquierda lo puso el propio cliente y no sirve como identidad.
+    """
+    peer = request.client.host if request.client else "desconocido"
+    xff = request.headers.get("x-forwarded-for")
+    if not xff:
+        return peer
+    trusted = _trusted_proxies()
+    if not ("*" in trusted or _is_trusted(peer, trusted)):
+        _warn_untrusted_proxy(peer)
+        return peer
+    hops = [h.strip() for h in xff.split(",") if h.strip()]
+    if "*" in trusted:
+        # Solo se confía en el proxy inmediato: su entrada es la última
+        return hops[-1] if hops else peer
+    for hop in reversed(hops):
+        if not _is_trusted(hop, trusted):
+            return hop
+    return hops[0] if hops else peer
+
+
+# ====================== Dependencia ======================
+
+async def _body_email(request: Request) -> Optional[str]:
+    try:
+        data = json.loads(await request.body() or b"null")
+    except ValueError:
+        return None
+    email = data.get("email") if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+async def _check(key: str, per_minute: float, burst: float) -> None:
+    if per_minute <= 0:
+        return
+    try:
+        wait = get_storage().consume(key, per_minute / 60.0, max(1.0, burst))
+        if inspect.isawaitable(wait):
+            wait = await wait
+    except Exception as e:
+        # Si el backend compartido falla se deja pasar: el limitador no debe tumbar el login
+        logger.error(f"Rate limiter no disponible: {e}")
+        return
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas solicitudes, intenta más tarde",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+
+def limit(scope: str, by_email: bool = True):
+    """Dependencia de ruta: ``dependencies=[Depends(rate_limit.limit("login"))]``."""
+    async def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        await _check(f"{scope}:ip:{client_ip(request)}", settings.RATE_LIMIT_IP_PER_MINUTE, settings.RATE_LIMIT_IP_BURST)
+        if by_email:
+            email = await _body_email(request)
+            if email:
+                await _check(f"{scope}:email:{email}", settings.RATE_LIMIT_EMAIL_PER_MINUTE, settings.RATE_LIMIT_EMAIL_BURST)
+
+    return dependency
@@ -213,3 +213,58 @@ class FurnitureOut(FurnitureBase):
     class Config:
         orm_mode = True
         fields = {"category": "category_name"}  # Mapea el campo category al atributo category_name del modelo
+
+# Importación NDJSON: resumen con errores por línea
+class ImportLineError(BaseModel):
+    line: int
+    name: Optional[str] = None
+    status_code: int
+    detail: str
+
+class ImportSummary(BaseModel):
+    lines: int
+    created: int
+    failed: int
+    chunks: int
+    errors: List[ImportLineError] = Field(default_factory=list)
+    errors_truncated: bool = False
+
+# Actualización masiva de precio/stock
+class FurniturePatchItem(BaseModel):
+    id: int
+    stock: Optional[int] = Field(None, ge=0)
+    price: Optional[float] = Field(None, gt=0)
+
+    @validator('price', always=True)
+    def stock_or_price(cls, v, values):
+        if v is None and values.get('stock') is None:
+            raise ValueError('Se requiere stock o price')
+        return v
+
+class FurnitureBulkPatch(BaseModel):
+    items: List[FurniturePatchItem] = Field(..., min_items=1, max_items=50000)
+
+class FurnitureBulkPatchResult(BaseModel):
+    requested: int
+    updated: int
+    not_found: List[int] = Field(default_factory=list)
+
+class CategoryPriceAdjustment(BaseModel):
+    # Porcentaje: 10 sube 10%, -15 baja 15%
+    percent: float = Field(..., gt=-100, le=1000)
+
+class CategoryPriceAdjustmentResult(BaseModel):
+    category_id: int
+    percent: float
+    updated: int
+
+# Reserva / liberación de stock (carrito)
+class StockItem(BaseModel):
+    id: int
+    quantity: int = Field(..., gt=0)
+
+class StockRequest(BaseModel):
+    items: List[StockItem] = Field(..., min_items=1, max_items=500)
+
+class StockResult(BaseModel):
+    items: List[StockItem]
@@ -0,0 +1,129 @@
+"""
+Lanzador de producción: gunicorn como gestor de procesos con workers uvicorn.
+
+Uso:
+    python -m app.server
+    python -m app.server --bind 0.0.0.0:8000 --workers 4
+    python -m app.server --print-config      # muestra la configuración derivada y sale
+
+Decisiones:
+
+- Workers: ``2 × CPUs + 1`` (CPUs según cgroup/afinidad del contenedor), acotado para que
+  ``workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW)`` quepa en ``DB_MAX_CONNECTIONS`` de MySQL.
+  ``WEB_CONCURRENCY`` lo fija explícitamente.
+- uvloop + httptools en cada worker (``uvicorn[standard]``).
+- ``preload_app``: la app se importa una vez en el master (importar no abre conexiones)
+  y los workers la heredan por fork. Aun así, en ``post_fork`` cada worker descarta el
+  pool heredado con ``engine.dispose(close=False)`` para no compartir sockets con el
+  master ni con sus hermanos.
+- ``max_requests`` con jitter: los payloads grandes de imágenes fragmentan el heap y la
+  RSS solo crece; reciclar los workers escalonadamente la devuelve sin cortar el servicio.
+- Keep-alive 75 s, mayor que el ``keepalive_timeout`` del upstream en ``nginx.conf``
+  (60 s): así siempre cierra nginx primero y nunca reutiliza una conexión que el
+  worker ya cerró.
+- Recarga elegante: ``kill -HUP <master>`` levanta workers nuevos y los viejos terminan
+  sus peticiones en curso (hasta ``GUNICORN_GRACEFUL_TIMEOUT``). Con ``preload_app`` el
+  código lo carga el master, así que para desplegar código nuevo hay que reiniciar el
+  master (o ``USR2`` + ``WINCH``/``QUIT`` sobre el viejo).
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from uvicorn.workers import UvicornWorker
+
+logger = logging.getLogger(__name__)
+
+
+class AppWorker(UvicornWorker):
+    # proxy_headers desactivado: rate_limit.client_ip interpreta X-Forwarded-For y
+    # necesita ver como peer al nginx, no la IP ya reescrita por uvicorn
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on", "proxy_headers": False}
+
+
+def cpu_count() -> int:
+    """CPUs realmente disponibles: cuota de cgroup v2 si existe, si no la afinidad."""
+    try:
+        quota, period = open("/sys/fs/cgroup/cpu.max").read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    from .config import settings
+
+    explicit = os.getenv("WEB_CONCURRENCY")
+    if explicit:
+        return max(1, int(explicit))
+    per_worker = max(1, settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    by_db = max(1, int(os.getenv("DB_MAX_CONNECTIONS", "150")) // per_worker)
+    return max(1, min(2 * cpu_count() + 1, by_db))
+
+
+def post_fork(server, worker):
+    from . import database
+
+    # Conexiones abiertas antes del fork no pueden compartirse entre procesos
+    database.engine.dispose(close=False)
+    for engine in database.read_engines:
+        engine.dispose(close=False)
+    if database.async_engine is not None:
+        database.async_engine.sync_engine.dispose(close=False)
+
+
+def gunicorn_options(bind: str = None, workers: int = None) -> dict:
+    return {
+        "bind": bind or os.getenv("BIND", "0.0.0.0:8000"),
+        "workers": workers or default_workers(),
+        "worker_class": "app.server.AppWorker",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "max_requests": int(os.getenv("GUNICORN_MAX_REQUESTS", "2000")),
+        "max_requests_jitter": int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "400")),
+        "keepalive": int(os.getenv("GUNICORN_KEEPALIVE", "75")),
+        "timeout": int(os.getenv("GUNICORN_TIMEOUT", "60")),
+        "graceful_timeout": int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30")),
+        "backlog": int(os.getenv("GUNICORN_BACKLOG", "2048")),
+        "accesslog": os.getenv("GUNICORN_ACCESSLOG", "-"),
+        "errorlog": "-",
+        "loglevel": os.getenv("GUNICORN_LOGLEVEL", "info"),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bind", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--print-config", action="store_true")
+    args = parser.parse_args(argv)
+
+    options = gunicorn_options(args.bind, args.workers)
+    if args.print_config:
+        print(json.dumps({k: v for k, v in options.items() if not callable(v)}, indent=2))
+        return 0
+
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from .main import app
+            return app
+
+    Server().run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Calentamiento del worker antes de declararse listo (lifespan).
+
+Tras un deploy o un reinicio, las primeras peticiones pagaban tres costos que aquí
+se adelantan:
+
+- el pool abría conexiones de una en una (handshake + auth de MySQL);
+- SQLAlchemy compilaba cada consulta en su primer uso. Su caché de sentencias
+  (por engine, 1.4) guarda el SQL compilado por forma de consulta: ejecutar una
+  vez las consultas calientes de crud_furniture / crud_post basta, y los valores
+  de filtros, offset y limit viajan como parámetros;
+- la tabla de categorías se leía en el primer hit. Ahora se carga en su caché.
+
+El listado de los primeros ``WARMUP_TOP_ITEMS`` muebles también trae esas filas al
+buffer pool de la DB. Cada paso falla por separado: un error solo se registra.
+"""
+import asyncio
+import logging
+import time
+
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+
+from . import crud, crud_category, crud_furniture, crud_post, database
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def prefill_pool(engine, connections: int) -> int:
+    """Abre hasta ``connections`` conexiones a la vez y las devuelve al pool."""
+    if not isinstance(engine.pool, QueuePool) or connections <= 0:
+        # SQLite en archivo usa NullPool: no hay nada que conservar
+        return 0
+    conns = []
+    try:
+        for _ in range(min(connections, engine.pool.size())):
+            conns.append(engine.connect())
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
+
+
+def _step(name, fn, *args):
+    t0 = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception as e:
+        logger.warning(f"Warm-up: '{name}' falló: {e}")
+        return
+    logger.info(f"Warm-up: '{name}' en {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+
+def _warm_reads(db, top_items: int) -> None:
+    """Las formas de consulta de los GET públicos del catálogo."""
+    categories = crud_category.load_category_cache(db)
+    top = crud_furniture.get_all_furniture(db, 0, top_items)
+    crud_furniture.search_furniture(db, term="a", limit=top_items)
+    if categories:
+        crud_furniture.get_all_furniture(db, 0, top_items, category_ids=[categories[0].id])
+        crud_furniture.search_furniture(db, category_ids=[categories[0].id], limit=top_items)
+    if top:
+        crud_furniture.get_furniture(db, top[0].id)
+        crud_post.get_posts_by_furniture(db, top[0].id)
+    crud_post.get_all_posts(db, 0, top_items)
+
+
+def _with_session(factory, fn, *args):
+    db = factory()
+    try:
+        fn(db, *args)
+    finally:
+        db.close()
+
+
+def _read_session_on(engine):
+    def factory():
+        db = database.SessionLocal(bind=engine)
+        db.info["read_only"] = True
+        return db
+    return factory
+
+
+def warm_up_sync() -> None:
+    top_items = max(1, settings.WARMUP_TOP_ITEMS)
+    _step("pool primario", prefill_pool, database.engine, settings.WARMUP_POOL_CONNECTIONS)
+    # Login y get_current_user: misma consulta de usuario por email
+    _step("consultas de usuario", _with_session, database.SessionLocal, crud.get_user_by_email, "")
+    # La caché de sentencias es por engine: se calienta cada réplica por separado
+    read_targets = database.read_engines or [database.engine]
+    for i, engine in enumerate(read_targets):
+        if engine is not database.engine:
+            _step(f"pool réplica {i}", prefill_pool, engine, settings.WARMUP_POOL_CONNECTIONS)
+        _step(f"consultas de lectura ({i})", _with_session, _read_session_on(engine), _warm_reads, top_items)
+
+
+async def warm_up_async() -> None:
+    """Mismo calentamiento para el engine async (DB_ASYNC=1)."""
+    from sqlalchemy import text
+
+    async def connect_one():
+        async with database.async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    n = min(settings.WARMUP_POOL_CONNECTIONS, settings.DB_POOL_SIZE)
+    if n > 0:
+        await asyncio.gather(*(connect_one() for _ in range(n)))
+    async with database.AsyncSessionLocal() as db:
+        top = await crud_furniture.get_all_furniture_async(db, 0, max(1, settings.WARMUP_TOP_ITEMS))
+        if top:
+            await crud_furniture.get_furniture_async(db, top[0].id)
+
+
+async def warm_up() -> None:
+    """Corre el calentamiento con tope WARMUP_TIMEOUT_SECONDS; nunca impide arrancar."""
+    t0 = time.perf_counter()
+
+    async def run():
+        await run_in_threadpool(warm_up_sync)
+        if database.async_engine is not None:
+            await warm_up_async()
+
+    try:
+        await asyncio.wait_for(run(), settings.WARMUP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"Warm-up incompleto tras {settings.WARMUP_TIMEOUT_SECONDS}s; se continúa el arranque")
+        return
+    except Exception as e:
+        logger.warning(f"Warm-up incompleto: {e}")
+        return
+    logger.info(f"Warm-up completo en {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,85 @@
+"""
+Compara el modo síncrono (threadpool) contra DB_ASYNC=1 con un presupuesto de memoria fijo.
+
+Para cada modo sube la concurrencia (8, 16, 32, ...) sobre los mismos escenarios de
+``benchmarks.run`` y se queda con el mejor throughput cuyo pico de RSS no supere
+``--memory-budget-mb``. Reutiliza la base sembrada por ``benchmarks.run``.
+
+Uso:
+    python -m benchmarks.async_compare --scale 0.1 --memory-budget-mb 300 --out async.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.run import ROOT
+
+
+def _run(mode: str, concurrency: int, args) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as fh:
+        out = fh.name
+    cmd = [sys.executable, "-m", "benchmarks.run", "--db-mode", mode, "--concurrency", str(concurrency),
+           "--scale", str(args.scale), "--requests", str(args.requests), "--scenarios", args.scenarios,
+           "--out", out]
+    if args.db_url:
+        cmd += ["--db-url", args.db_url]
+    if args.force:
+        cmd.append("--force")
+    subprocess.run(cmd, cwd=ROOT, check=True, stderr=subprocess.DEVNULL)
+    with open(out) as fh:
+        report = json.load(fh)
+    os.unlink(out)
+    return report["scenarios"]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--scale", type=float, default=0.1)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--scenarios", default="list,detail")
+    parser.add_argument("--memory-budget-mb", type=float, default=300)
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--force", action="store_true", help="se pasa a benchmarks.run")
+    args = parser.parse_args(argv)
+
+    summary = {"memory_budget_mb": args.memory_budget_mb, "modes": {}}
+    for mode in ("sync", "async"):
+        runs = {}
+        best = {}
+        concurrency = 8
+        while concurrency <= args.max_concurrency:
+            scenarios = _run(mode, concurrency, args)
+            runs[concurrency] = scenarios
+            over_budget = False
+            for name, result in scenarios.items():
+                if "error" in result:
+                    continue
+                if result["peak_rss_mb"] > args.memory_budget_mb:
+                    over_budget = True
+                    continue
+                if result["throughput_rps"] > best.get(name, {}).get("throughput_rps", 0):
+                    best[name] = {**result, "concurrency": concurrency}
+            print(f"{mode} c={concurrency}: {scenarios}", file=sys.stderr)
+            if over_budget:
+                break
+            concurrency *= 2
+        summary["modes"][mode] = {"best_within_budget": best, "runs": runs}
+
+    payload = json.dumps(summary, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Prueba de concurrencia: el event loop sigue atendiendo durante una importación grande.
+
+Lanza un ``POST /furniture/batch`` con muchas imágenes en base64 y, en paralelo,
+sondea ``GET /`` cada pocos milisegundos sobre la misma aplicación en proceso. Si
+algún handler async hiciera trabajo síncrono pesado, los sondeos quedarían
+congelados hasta que termine la importación.
+
+Uso:
+    python -m benchmarks.event_loop --items 200 --image-kb 256
+
+Termina con código 1 si los sondeos no progresan mientras corre la importación.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+async def run(items: int, image_kb: int, images_per_item: int, probe_interval: float) -> dict:
+    import httpx
+    from sqlalchemy import create_engine
+
+    from app import auth, models
+    from app.main import app
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [{
+            "email": "loop-admin@example.com", "hashed_password": "x", "is_active": True, "is_admin": True,
+        }])
+        conn.execute(models.Category.__table__.insert(), [{"id": 1, "name": "sala"}])
+
+    token = auth.create_access_token({"sub": "loop-admin@example.com"})
+    payload = []
+    for i in range(items):
+        images = [
+            "data:image/jpeg;base64," + base64.b64encode(os.urandom(image_kb * 1024)).decode("ascii")
+            for _ in range(images_per_item)
+        ]
+        payload.append({"name": f"importado {i}", "price": 100 + i, "category_id": 1, "images": images})
+    body = json.dumps(payload).encode()
+
+    probe_latencies = []
+    probe_times = []
+    done = asyncio.Event()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loop", timeout=None) as client:
+        async def importer():
+            t0 = time.perf_counter()
+            r = await client.post("/furniture/batch", content=body, headers={
+                "Authorization": f"Bearer {token}", "Content-Type": "application/json",
+            })
+            done.set()
+            return r.status_code, time.perf_counter() - t0
+
+        async def prober():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await client.get("/")
+                probe_latencies.append(time.perf_counter() - t0)
+                probe_times.append(time.perf_counter())
+                await asyncio.sleep(probe_interval)
+
+        started = time.perf_counter()
+        (status, import_seconds), _ = await asyncio.gather(importer(), prober())
+        finished = time.perf_counter()
+
+    # Mayor intervalo sin ningún sondeo completado mientras corría la importación
+    marks = [started] + probe_times + [finished]
+    max_gap = max(b - a for a, b in zip(marks, marks[1:]))
+
+    return {
+        "import_status": status,
+        "import_seconds": round(import_seconds, 3),
+        "payload_mb": round(len(body) / 1024 / 1024, 1),
+        "probes_completed": len(probe_latencies),
+        "probe_max_ms": round(max(probe_latencies) * 1000, 1) if probe_latencies else None,
+        "max_gap_ms": round(max_gap * 1000, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--images-per-item", type=int, default=2)
+    parser.add_argument("--image-kb", type=int, default=256)
+    parser.add_argument("--probe-interval-ms", type=float, default=10)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="event-loop-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'loop.db')}"
+    os.environ["ENVIRONMENT"] = "benchmark"
+
+    result = asyncio.run(run(args.items, args.image_kb, args.images_per_item, args.probe_interval_ms / 1000))
+    print(json.dumps(result, indent=2))
+
+    # Durante la importación el loop debe atender sondeos de forma continua:
+    # ningún hueco sin sondeos puede durar más que la cuarta parte de la importación.
+    stalled = result["max_gap_ms"] > 0.25 * result["import_seconds"] * 1000
+    if result["import_status"] != 201 or stalled:
+        print("FALLO: el event loop quedó bloqueado durante la importación", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
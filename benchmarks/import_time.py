@@ -0,0 +1,116 @@
+"""
+Presupuesto de arranque: cuánto tarda ``import app.main`` en un intérprete limpio.
+
+Cada medición corre en un subproceso nuevo (sin caché de módulos) apuntando a un
+MySQL inalcanzable con ``AUTO_CREATE_DB=1`` y ``ENVIRONMENT=development``: si el
+import intentara conectarse (crear la base o las tablas) fallaría en vez de medir.
+También verifica que los componentes opcionales (jose, passlib, aiosmtplib) no se
+carguen al importar; se importan en su primer uso. El driver de MySQL
+(mysql.connector) sí se carga: ``create_engine`` importa el DBAPI al crear el engine
+en ``app.database``, aunque no abre conexiones.
+
+Uso:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 10 --budget-ms 700 --top 15
+
+Termina con código 1 si la mediana supera ``--budget-ms``, si el import falla o si
+se cargó algún módulo perezoso.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ["jose", "passlib", "aiosmtplib"]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - t0
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.pop("DATABASE_URL", None)
+    env.update({
+        "PYTHONPATH": ROOT,
+        "ENVIRONMENT": "development",
+        "AUTO_CREATE_DB": "1",
+        # Puerto 9 (discard): cualquier conexión al importar fallaría de inmediato
+        "DB_HOST": "127.0.0.1",
+        "DB_PORT": "9",
+        "DB_ASYNC": "0",
+    })
+    return env
+
+
+def measure_once() -> dict:
+    proc = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, env=_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import falló")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def top_modules(n: int) -> list:
+    """Módulos con mayor tiempo acumulado según ``python -X importtime``."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                          cwd=ROOT, env=_env(), capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue  # cabecera "self [us] | cumulative | imported package"
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        rows.append((cumulative_us, self_us, name))
+    rows.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(c / 1000, 1), "self_ms": round(s / 1000, 1)} for c, s, name in rows[:n]]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    parser.add_argument("--top", type=int, default=10, help="módulos más lentos a reportar (0 = ninguno)")
+    args = parser.parse_args(argv)
+
+    try:
+        runs = [measure_once() for _ in range(max(1, args.runs))]
+    except RuntimeError as e:
+        print(f"FALLO: importar app.main no debe tocar la DB: {e}", file=sys.stderr)
+        return 1
+
+    median_ms = statistics.median(r["seconds"] for r in runs) * 1000
+    loaded = sorted({m for r in runs for m in r["loaded"]})
+    result = {
+        "runs": len(runs),
+        "median_ms": round(median_ms, 1),
+        "max_ms": round(max(r["seconds"] for r in runs) * 1000, 1),
+        "budget_ms": args.budget_ms,
+        "lazy_modules_loaded": loaded,
+    }
+    if args.top:
+        result["slowest_imports"] = top_modules(args.top)
+    print(json.dumps(result, indent=2))
+
+    if loaded:
+        print(f"FALLO: se importaron al arrancar módulos que deben ser perezosos: {', '.join(loaded)}", file=sys.stderr)
+        return 1
+    if median_ms > args.budget_ms:
+        print(f"FALLO: import de app.main en {median_ms:.0f} ms (presupuesto {args.budget_ms:.0f} ms)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
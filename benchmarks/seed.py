@@ -0,0 +1,304 @@
+"""
+Generador de catálogo sintético con INSERTs masivos (executemany).
+
+Siembra categorías, usuarios, muebles, imágenes y publicaciones a través de las
+tablas de ``app.models`` sin pasar por el ORM fila por fila. Las distribuciones
+buscan parecerse a un catálogo real:
+
+- categorías de cola larga (pocas categorías concentran la mayoría de muebles),
+- número de imágenes por mueble sesgado (muchos con 1-3, pocos con decenas),
+- tamaños de imagen log-normales acotados por ``image_max_bytes``.
+
+Los ids se asignan explícitamente para que imágenes y publicaciones referencien a
+su mueble sin volver a consultar la base.
+
+Borra y recrea todas las tablas, así que solo acepta SQLite o bases cuyo nombre
+contenga "bench"; cualquier otra URL requiere ``--force``.
+
+Uso:
+    python -m benchmarks.seed --db-url sqlite:///catalogo.db --furniture 1000000
+    python -m benchmarks.seed --db-url mysql+mysqlconnector://u:p@localhost/bench_carga --scale 0.1
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import hashlib
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Sequence
+
+BENCH_ADMIN_EMAIL = "bench-admin@example.com"
+BENCH_USER_EMAIL = "bench-user@example.com"
+BENCH_PASSWORD = "BenchPass123"
+
+WORDS = [
+    "mesa", "silla", "sofa", "cama", "ropero", "buro", "comoda", "librero", "escritorio", "banco",
+    "roble", "nogal", "pino", "metal", "vidrio", "piel", "tela", "moderno", "rustico", "clasico",
+    "individual", "matrimonial", "king", "esquinero", "plegable", "reclinable", "infantil", "blanco",
+]
+BRANDS = ["Reforma", "Casa Bella", "Nordika", "Ébano", "Mimbre & Co", "Dormilón", None]
+COLORS = ["blanco", "negro", "nogal", "gris", "beige", "azul", None]
+MIMES = ["image/jpeg", "image/jpeg", "image/jpeg", "image/png", "image/webp"]
+
+CHUNK = 10_000
+
+
+def zipf_cum_weights(n: int, s: float) -> List[float]:
+    """Pesos acumulados de una Zipf(s) sobre los rangos 1..n (para ``random.choices``)."""
+    return list(itertools.accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+
+def _insert(conn, table, rows: Sequence[Dict]) -> None:
+    """executemany directo al driver.
+
+    Compila el INSERT una vez y aplica a mano solo los bind processors que el
+    dialecto necesita (p. ej. DateTime en SQLite); así se evita el costo por fila
+    de ``construct_params`` del Core, que dominaba el tiempo de carga.
+    """
+    if not rows:
+        return
+    dialect = conn.dialect
+    keys = list(rows[0])
+    compiled = table.insert().compile(dialect=dialect, column_keys=keys)
+    order = list(compiled.positiontup) if dialect.positional else keys
+    procs = [table.c[key].type.dialect_impl(dialect).bind_processor(dialect) for key in order]
+    sql = str(compiled)
+
+    for i in range(0, len(rows), CHUNK):
+        # created_at/updated_at suelen coincidir: cada valor distinto se procesa una sola vez
+        memo: Dict = {}
+        params = []
+        for row in rows[i:i + CHUNK]:
+            values = []
+            for key, proc in zip(order, procs):
+                value = row[key]
+                if proc is not None and value is not None:
+                    if value not in memo:
+                        memo[value] = proc(value)
+                    value = memo[value]
+                values.append(value)
+            params.append(tuple(values) if dialect.positional else dict(zip(order, values)))
+        conn.exec_driver_sql(sql, params)
+
+
+def _image_payloads(rnd: random.Random, pool: int, median: int, max_bytes: int):
+    """Payloads reutilizables con tamaños log-normales (mediana ``median``)."""
+    payloads = []
+    sigma = 0.8
+    for _ in range(max(1, pool)):
+        size = int(min(max_bytes, max(64, rnd.lognormvariate(math.log(median), sigma))))
+        data = rnd.randbytes(size)
+        payloads.append((data, hashlib.sha256(data).digest(), rnd.choice(MIMES)))
+    return payloads
+
+
+def check_disposable_url(url, force: bool = False) -> None:
+    """
+    Falla si ``url`` no parece una base desechable: los benchmarks hacen ``drop_all``
+    y un DATABASE_URL de .env apuntando a la base real la borraría entera.
+    """
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(str(url))
+    if force or parsed.get_backend_name() == "sqlite" or "bench" in (parsed.database or "").lower():
+        return
+    raise RuntimeError(
+        f"se niega a borrar la base '{parsed.database}' en {parsed.host or 'localhost'}: "
+        f"usa SQLite o una base con 'bench' en el nombre, o pasa --force"
+    )
+
+
+def seed_catalog(
+        engine,
+        furniture: int = 100_000,
+        images: int = 300_000,
+        posts: int = 50_000,
+        categories: int = 40,
+        users: int = 1_000,
+        category_skew: float = 1.2,
+        image_median_bytes: int = 1024,
+        image_max_bytes: int = 2 * 1024 * 1024,
+        image_pool: int = 64,
+        seed: int = 42,
+        log=None,
+        force: bool = False,
+) -> Dict[str, int]:
+    """Crea el esquema y lo llena. Devuelve el número de filas por tabla."""
+    from app import auth, models
+
+    check_disposable_url(engine.url, force)
+
+    log = log or (lambda msg: None)
+    rnd = random.Random(seed)
+    now = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    # Los índices secundarios se construyen al final: ordenar una vez es más barato que
+    # mantener el B-tree fila por fila con claves aleatorias (name)
+    secondary = [idx for table in models.Base.metadata.sorted_tables for idx in table.indexes]
+    with engine.begin() as conn:
+        for idx in secondary:
+            idx.drop(conn)
+
+    payloads = _image_payloads(rnd, image_pool, image_median_bytes, image_max_bytes)
+    # Un solo hash bcrypt para todos: hashear por usuario tomaría horas
+    hashed = auth.get_pwd_context().hash(BENCH_PASSWORD)
+    category_ids = list(range(1, categories + 1))
+    category_cum = zipf_cum_weights(categories, category_skew)
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Carga única: caché grande y sin fsync; los índices aleatorios (name) dominan el tiempo
+            conn.exec_driver_sql("PRAGMA cache_size=-262144")
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            conn.exec_driver_sql("PRAGMA journal_mode=MEMORY")
+        t0 = time.perf_counter()
+        rows = [
+            {"id": 1, "email": BENCH_ADMIN_EMAIL, "hashed_password": hashed, "is_active": True,
+             "is_admin": True, "created_at": now},
+            {"id": 2, "email": BENCH_USER_EMAIL, "hashed_password": hashed, "is_active": True,
+             "is_admin": False, "created_at": now},
+        ]
+        rows += [
+            {"id": i, "email": f"cliente{i}@example.com", "hashed_password": hashed, "is_active": True,
+             "is_admin": False, "created_at": now}
+            for i in range(3, users + 3)
+        ]
+        _insert(conn, models.User.__table__, rows)
+        _insert(conn, models.Category.__table__, [
+            {"id": c, "name": f"categoria-{c}", "description": None, "created_at": now}
+            for c in category_ids
+        ])
+        log(f"usuarios y categorías: {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        # Atributos generados por columna de una sola vez: mucho más barato que por fila
+        name_pool = [f"{a} {b}" for a in WORDS for b in WORDS]
+        description_pool = [" ".join(rnd.choices(WORDS, k=12)) for _ in range(512)]
+        cats = rnd.choices(category_ids, cum_weights=category_cum, k=furniture)
+        names = rnd.choices(name_pool, k=furniture)
+        descriptions = rnd.choices(description_pool, k=furniture)
+        brands = rnd.choices(BRANDS, k=furniture)
+        colors = rnd.choices(COLORS, k=furniture)
+        for start in range(0, furniture, CHUNK):
+            rows = []
+            for i in range(start, min(furniture, start + CHUNK)):
+                cat = cats[i]
+                ts = now + datetime.timedelta(seconds=i)
+                rows.append({
+                    "id": i + 1,
+                    "name": f"{names[i]} {i + 1}",
+                    "description": descriptions[i],
+                    "price": round(min(99_999.0, 99 + rnd.paretovariate(1.5) * 400), 2),
+                    "category_id": cat,
+                    "category": f"categoria-{cat}",
+                    "img_base64": None,
+                    "stock": int(rnd.random() * 51),
+                    "brand": brands[i],
+                    "color": colors[i],
+                    "material": None,
+                    "dimensions": None,
+                    "created_at": ts,
+                    "updated_at": ts,
+                })
+            _insert(conn, models.Furniture.__table__, rows)
+        log(f"muebles: {time.perf_counter() - t0:.1f}s")
+
+        # Imágenes: el mueble se elige con sesgo Zipf para que pocos acumulen muchas fotos
+        t0 = time.perf_counter()
+        owners = rnd.choices(range(1, furniture + 1), cum_weights=zipf_cum_weights(furniture, 0.6), k=images)
+        positions: Dict[int, int] = {}
+        rows = []
+        for i, fid in enumerate(owners, start=1):
+            pos = positions.get(fid, 0)
+            positions[fid] = pos + 1
+            data, sha, mime = payloads[int(rnd.random() * len(payloads))]
+            rows.append({
+                "id": i, "furniture_id": fid, "position": pos, "mime": mime,
+                "bytes": data, "size_bytes": len(data), "sha256": sha, "created_at": now,
+            })
+            if len(rows) >= CHUNK:
+                _insert(conn, models.FurnitureImage.__table__, rows)
+                rows = []
+        _insert(conn, models.FurnitureImage.__table__, rows)
+        log(f"imágenes: {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        content_pool = [" ".join(rnd.choices(WORDS, k=40)) for _ in range(512)]
+        contents = rnd.choices(content_pool, k=posts)
+        rows = []
+        for i in range(1, posts + 1):
+            ts = now + datetime.timedelta(seconds=i)
+            rows.append({
+                "id": i, "title": f"Publicación {i}", "content": contents[i - 1],
+                "publication_date": ts, "furniture_id": int(rnd.random() * furniture) + 1,
+                "created_at": ts, "updated_at": ts, "is_active": rnd.random() > 0.05,
+            })
+            if len(rows) >= CHUNK:
+                _insert(conn, models.Post.__table__, rows)
+                rows = []
+        _insert(conn, models.Post.__table__, rows)
+        log(f"publicaciones: {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        for idx in secondary:
+            idx.create(conn)
+        log(f"índices: {time.perf_counter() - t0:.1f}s")
+
+    return {"categories": categories, "users": users + 2, "furniture": furniture, "images": images, "posts": posts}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default=os.getenv("DATABASE_URL"), help="URL SQLAlchemy (o DATABASE_URL)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplica todos los conteos")
+    parser.add_argument("--furniture", type=int, default=100_000)
+    parser.add_argument("--images", type=int, default=300_000)
+    parser.add_argument("--posts", type=int, default=50_000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--category-skew", type=float, default=1.2, help="exponente Zipf de categorías")
+    parser.add_argument("--image-median-kb", type=float, default=1.0)
+    parser.add_argument("--image-max-kb", type=float, default=2048)
+    parser.add_argument("--image-pool", type=int, default=64, help="payloads distintos a reutilizar")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="permite borrar una base que no es SQLite ni '*bench*'")
+    args = parser.parse_args(argv)
+
+    if not args.db_url:
+        parser.error("se requiere --db-url o la variable DATABASE_URL")
+    try:
+        check_disposable_url(args.db_url, args.force)
+    except RuntimeError as e:
+        parser.error(str(e))
+    os.environ["DATABASE_URL"] = args.db_url
+    from sqlalchemy import create_engine
+
+    scale = lambda n: max(1, int(n * args.scale))
+    t0 = time.perf_counter()
+    counts = seed_catalog(
+        create_engine(args.db_url),
+        furniture=scale(args.furniture),
+        images=scale(args.images),
+        posts=scale(args.posts),
+        categories=args.categories,
+        users=scale(args.users),
+        category_skew=args.category_skew,
+        image_median_bytes=int(args.image_median_kb * 1024),
+        image_max_bytes=int(args.image_max_kb * 1024),
+        image_pool=args.image_pool,
+        seed=args.seed,
+        log=lambda msg: print(msg, file=sys.stderr),
+        force=args.force,
+    )
+    print(f"{counts} en {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Contención de stock: muchos compradores concurrentes sobre un mueble "caliente".
+
+Cada comprador intenta apartar 1 unidad hasta que se agota. Se comparan dos modos:
+
+- ``reserve``: ``POST /furniture/stock/reserve`` (un UPDATE condicional).
+- ``put``: leer con ``GET /furniture/{id}`` y escribir ``stock - 1`` con
+  ``PUT /furniture/{id}`` (lectura-modificación-escritura, como antes).
+
+Reporta throughput, reservas exitosas y si hubo sobreventa (más unidades vendidas
+que el stock inicial). La aplicación corre en proceso (httpx + ASGITransport).
+Cada modo borra y recrea las tablas: con ``--db-url`` solo acepta SQLite o una base
+con "bench" en el nombre, salvo ``--force``.
+
+Uso:
+    python -m benchmarks.stock_contention --buyers 64 --stock 200 --mode reserve,put
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+async def _run_mode(mode: str, buyers: int, stock: int, extra_items: int) -> dict:
+    import httpx
+    from sqlalchemy import create_engine, text
+
+    from app import auth, models
+    from app.main import app
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [{
+            "email": "stock-admin@example.com", "hashed_password": "x", "is_active": True, "is_admin": True,
+        }])
+        conn.execute(models.Category.__table__.insert(), [{"id": 1, "name": "sala"}])
+        conn.execute(models.Furniture.__table__.insert(), [
+            {"id": i, "name": f"mueble {i}", "price": 100, "category_id": 1, "category": "sala",
+             "stock": stock if i == 1 else 10 ** 6}
+            for i in range(1, extra_items + 2)
+        ])
+
+    headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'stock-admin@example.com'})}"}
+    sold = 0
+    attempts = 0
+    errors = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stock", headers=headers, timeout=None) as client:
+        async def buyer(n: int):
+            nonlocal sold, attempts, errors
+            # carrito: el mueble caliente y, opcionalmente, otro poco disputado
+            cart = [{"id": 1, "quantity": 1}] + ([{"id": 2 + n % extra_items, "quantity": 1}] if extra_items else [])
+            while True:
+                attempts += 1
+                if mode == "reserve":
+                    r = await client.post("/furniture/stock/reserve", json={"items": cart})
+                    if r.status_code == 200:
+                        sold += 1
+                        continue
+                    if r.status_code == 409:
+                        return
+                else:
+                    # Con sobreventa el modo put puede no terminar nunca: se corta al doble del stock
+                    if sold >= 2 * stock:
+                        return
+                    current = (await client.get("/furniture/1")).json()["stock"]
+                    if current <= 0:
+                        return
+                    r = await client.put("/furniture/1", json={"stock": current - 1})
+                    if r.status_code == 200:
+                        sold += 1
+                        continue
+                errors += 1
+                if errors > 10 * buyers:
+                    return
+
+        started = time.perf_counter()
+        await asyncio.gather(*(buyer(n) for n in range(buyers)))
+        elapsed = time.perf_counter() - started
+
+    with engine.connect() as conn:
+        final = conn.execute(text("SELECT stock FROM furniture WHERE id = 1")).scalar()
+    engine.dispose()
+    return {
+        "mode": mode,
+        "buyers": buyers,
+        "initial_stock": stock,
+        "sold": sold,
+        "final_stock": final,
+        "oversold": sold > stock or sold + final != stock,
+        "attempts": attempts,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "reservations_per_s": round(sold / elapsed, 1) if elapsed else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default=None, help="URL SQLAlchemy; por defecto un SQLite temporal")
+    parser.add_argument("--buyers", type=int, default=64)
+    parser.add_argument("--stock", type=int, default=200)
+    parser.add_argument("--extra-items", type=int, default=0, help="muebles adicionales por carrito (multi-ítem)")
+    parser.add_argument("--mode", default="reserve,put")
+    parser.add_argument("--force", action="store_true", help="permite borrar una base que no es SQLite ni '*bench*'")
+    args = parser.parse_args(argv)
+
+    if args.db_url:
+        from benchmarks.seed import check_disposable_url
+
+        try:
+            check_disposable_url(args.db_url, args.force)
+        except RuntimeError as e:
+            parser.error(str(e))
+        os.environ["DATABASE_URL"] = args.db_url
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='stock-'), 'stock.db')}"
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("ADMISSION_QUEUE_LIMIT", "100000")
+
+    results = [asyncio.run(_run_mode(m.strip(), args.buyers, args.stock, args.extra_items))
+               for m in args.mode.split(",") if m.strip()]
+    print(json.dumps(results, indent=2))
+    return 1 if any(r["mode"] == "reserve" and r["oversold"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Generador de tráfico sintético con acceso Zipfiano.
+
+Produce peticiones de catálogo (listado, detalle, búsqueda, imágenes) donde unos
+pocos muebles reciben la mayor parte de las visitas. Puede escribir la traza a un
+archivo (formato de targets de vegeta: ``GET http://...``) o reproducirla contra un
+servidor real con una tasa objetivo.
+
+Uso:
+    python -m benchmarks.traffic --base-url http://localhost:8000 --duration 60 --rps 200
+    python -m benchmarks.traffic --base-url http://localhost/api --dump trafico.txt --count 100000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from benchmarks.seed import WORDS, zipf_cum_weights
+
+DEFAULT_MIX = "list=0.35,detail=0.35,search=0.1,image=0.2"
+
+
+def _parse_mix(mix: str) -> Tuple[List[str], List[float]]:
+    kinds, weights = [], []
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kinds.append(kind.strip())
+        weights.append(float(weight or 1))
+    return kinds, weights
+
+
+def generate_paths(
+        furniture: int,
+        images: int,
+        mix: str = DEFAULT_MIX,
+        skew: float = 1.1,
+        seed: int = 7,
+) -> Iterator[str]:
+    """Secuencia infinita de rutas con popularidad Zipf(``skew``) sobre muebles e imágenes."""
+    rnd = random.Random(seed)
+    kinds, weights = _parse_mix(mix)
+    # El rango de popularidad se mapea a ids barajados: los populares no son siempre los primeros ids
+    furniture_ids = list(range(1, furniture + 1))
+    image_ids = list(range(1, images + 1))
+    rnd.shuffle(furniture_ids)
+    rnd.shuffle(image_ids)
+    furniture_cum = zipf_cum_weights(furniture, skew)
+    image_cum = zipf_cum_weights(images, skew)
+    page_cum = zipf_cum_weights(50, skew)
+
+    while True:
+        kind = rnd.choices(kinds, weights=weights)[0]
+        if kind == "detail":
+            yield f"/furniture/{rnd.choices(furniture_ids, cum_weights=furniture_cum)[0]}"
+        elif kind == "image":
+            yield f"/images/{rnd.choices(image_ids, cum_weights=image_cum)[0]}/content"
+        elif kind == "search":
+            yield f"/furniture/search?term={rnd.choice(WORDS)}&limit=20"
+        elif kind == "list":
+            page = rnd.choices(range(50), cum_weights=page_cum)[0]
+            yield f"/furniture/?skip={page * 20}&limit=20"
+        else:
+            raise ValueError(f"Tipo de petición desconocido: {kind}")
+
+
+async def replay(base_url: str, paths: Iterator[str], duration: float, rps: float, concurrency: int) -> Dict:
+    import httpx
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def one(path: str):
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    code = r.status_code
+                except httpx.HTTPError:
+                    code = 0
+                latencies.append(time.perf_counter() - t0)
+                statuses[code] = statuses.get(code, 0) + 1
+
+        tasks = []
+        started = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - started < duration:
+            # Tasa abierta: se programa según el reloj, no según las respuestas
+            due = started + sent / rps
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(next(paths))))
+            sent += 1
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": sent,
+        "statuses": statuses,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else None,
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))] * 1000, 3) if latencies else None,
+        "throughput_rps": round(sent / elapsed, 2),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", required=True)
+    parser.add_argument("--furniture", type=int, default=100_000, help="ids de mueble sembrados")
+    parser.add_argument("--images", type=int, default=300_000, help="ids de imagen sembrados")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--skew", type=float, default=1.1, help="exponente Zipf de popularidad")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--dump", default=None, help="escribe la traza en este archivo y termina")
+    parser.add_argument("--count", type=int, default=100_000, help="peticiones a escribir con --dump")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--rps", type=float, default=100)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    paths = generate_paths(args.furniture, args.images, args.mix, args.skew, args.seed)
+    base = args.base_url.rstrip("/")
+    if args.dump:
+        with open(args.dump, "w") as fh:
+            for _ in range(args.count):
+                fh.write(f"GET {base}{next(paths)}\n")
+        return 0
+
+    result = asyncio.run(replay(base, paths, args.duration, args.rps, args.concurrency))
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Configuración común de las pruebas.
+
+Las variables de entorno se fijan antes de importar ``app``: ``database`` y
+``config`` las leen al importarse. Cada sesión de pytest usa un SQLite temporal.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_workdir = tempfile.mkdtemp(prefix="muebleria-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["ENVIRONMENT"] = "test"
+os.environ["DB_ASYNC"] = "0"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["WARMUP_ENABLED"] = "false"
+os.environ["ADMISSION_QUEUE_LIMIT"] = "100000"
+# bcrypt con el costo mínimo: las pruebas de auth no miden el hash
+os.environ["BCRYPT_ROUNDS"] = "4"
+# Cada prueba parte de tablas vacías; la caché de categorías no debe sobrevivirlas
+os.environ["CATEGORY_CACHE_TTL_SECONDS"] = "0"
+
+import pytest  # noqa: E402
+
+PASSWORD = "Secreta123"
+
+
+def image_data_url(seed: int = 0, size: int = 64) -> str:
+    """Imagen PNG en data URL; cada ``seed`` da bytes (y sha256) distintos."""
+    import base64
+
+    data = b"\x89PNG\r\n\x1a\n" + seed.to_bytes(4, "big") + b"\x00" * size
+    return "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+
+
+@pytest.fixture
+def db_engine():
+    """Esquema recién creado en el SQLite de la sesión y cachés de proceso vacías."""
+    from app import auth, database, models
+
+    models.Base.metadata.drop_all(database.engine)
+    models.Base.metadata.create_all(database.engine)
+    with auth._principal_lock:
+        auth._principal_cache.clear()
+        auth._tokens_by_email.clear()
+    return database.engine
+
+
+@pytest.fixture
+def client(db_engine):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_user(db_engine):
+    """Inserta un usuario y devuelve las cabeceras con su token."""
+    from app import auth, models
+
+    hashed = auth.get_pwd_context().hash(PASSWORD)
+
+    def make(email, is_admin=False, is_active=True):
+        with db_engine.begin() as conn:
+            conn.execute(models.User.__table__.insert(), [{
+                "email": email, "hashed_password": hashed, "is_active": is_active, "is_admin": is_admin,
+            }])
+        return {"Authorization": f"Bearer {auth.create_access_token({'sub': email})}"}
+
+    return make
+
+
+@pytest.fixture
+def admin_headers(make_user):
+    return make_user("admin@example.com", is_admin=True)
+
+
+@pytest.fixture
+def category_id(db_engine):
+    from app import models
+
+    with db_engine.begin() as conn:
+        conn.execute(models.Category.__table__.insert(), [{"id": 1, "name": "sala"}])
+    return 1
+
+
+@pytest.fixture
+def statements(db_engine):
+    """Sentencias SQL ejecutadas en el primario (lista que la prueba puede vaciar)."""
+    from sqlalchemy import event
+
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(db_engine, "before_cursor_execute", record)
@@ -0,0 +1,49 @@
+"""
+Caché de principals: un cambio de rol o una desactivación se nota en la siguiente
+petición del mismo proceso, sin esperar al TTL.
+"""
+from app import auth, database, models
+
+ADMIN_ONLY = "/furniture/export"
+
+
+def _update_user(email, **values):
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.email == email).one()
+        for name, value in values.items():
+            setattr(user, name, value)
+        db.commit()
+
+
+def test_demoted_admin_gets_403_on_next_request(client, admin_headers):
+    token = admin_headers["Authorization"].split()[1]
+    assert client.get(ADMIN_ONLY, headers=admin_headers).status_code == 200
+    assert auth._cache_get(token) is not None
+
+    _update_user("admin@example.com", is_admin=False)
+
+    assert auth._cache_get(token) is None
+    r = client.get(ADMIN_ONLY, headers=admin_headers)
+    assert r.status_code == 403, r.text
+
+
+def test_deactivated_user_is_rejected_on_next_request(client, admin_headers):
+    assert client.get(ADMIN_ONLY, headers=admin_headers).status_code == 200
+
+    _update_user("admin@example.com", is_active=False)
+
+    r = client.get(ADMIN_ONLY, headers=admin_headers)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Usuario inactivo"
+
+
+def test_rolled_back_change_keeps_access(client, admin_headers):
+    assert client.get(ADMIN_ONLY, headers=admin_headers).status_code == 200
+
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.email == "admin@example.com").one()
+        user.is_admin = False
+        db.flush()
+        db.rollback()
+
+    assert client.get(ADMIN_ONLY, headers=admin_headers).status_code == 200
@@ -0,0 +1,117 @@
+"""
+Una ráfaga de logins no acapara el threadpool ni las conexiones.
+
+El bcrypt se espera desde endpoints async: mientras los hashes están en curso no
+queda ningún hilo de AnyIO ni conexión ocupados, el catálogo sigue respondiendo y
+lo que excede workers + cola recibe 503 de inmediato.
+"""
+import asyncio
+import threading
+
+import anyio.to_thread
+import httpx
+from sqlalchemy import event
+
+from app import auth
+from app.main import app
+from conftest import PASSWORD
+
+
+class GatedContext:
+    """Sustituye al CryptContext: cada verificación espera a que se abra la compuerta."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Semaphore(0)
+
+    def verify_and_update(self, password, hashed):
+        self.started.release()
+        self.gate.wait(10)
+        return password == PASSWORD, None
+
+
+def test_login_burst_keeps_threads_and_connections_free(db_engine, make_user, monkeypatch):
+    make_user("cliente@example.com")
+    crypt = GatedContext()
+    monkeypatch.setattr(auth, "get_pwd_context", lambda: crypt)
+
+    open_connections = 0
+
+    def checkout(*args):
+        nonlocal open_connections
+        open_connections += 1
+
+    def checkin(*args):
+        nonlocal open_connections
+        open_connections -= 1
+
+    event.listen(db_engine, "checkout", checkout)
+    event.listen(db_engine, "checkin", checkin)
+
+    burst = auth._hash_capacity + 3
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            logins = [
+                asyncio.ensure_future(client.post("/login", json={"email": "cliente@example.com", "password": PASSWORD}))
+                for _ in range(burst)
+            ]
+            # Esperar a que los hilos de bcrypt estén ocupados y el resto en cola
+            for _ in range(min(auth._hash_workers, auth._hash_capacity)):
+                await anyio.to_thread.run_sync(crypt.started.acquire)
+            while sum(task.done() for task in logins) < burst - auth._hash_capacity:
+                await asyncio.sleep(0.01)
+
+            busy_threads = anyio.to_thread.current_default_thread_limiter().borrowed_tokens
+            connections = open_connections
+            catalog = await client.get("/furniture/")
+            crypt.gate.set()
+            return busy_threads, connections, catalog, await asyncio.gather(*logins)
+
+    try:
+        busy_threads, connections, catalog, responses = asyncio.run(scenario())
+    finally:
+        crypt.gate.set()
+        event.remove(db_engine, "checkout", checkout)
+        event.remove(db_engine, "checkin", checkin)
+
+    assert busy_threads == 0
+    assert connections == 0
+    assert catalog.status_code == 200
+    statuses = sorted(r.status_code for r in responses)
+    assert statuses.count(200) == auth._hash_capacity
+    assert statuses.count(503) == burst - auth._hash_capacity
+    rejected = next(r for r in responses if r.status_code == 503)
+    assert rejected.headers["Retry-After"] == "1"
+
+
+def test_hash_capacity_stays_below_threadpool_and_pool():
+    from app.config import settings
+
+    assert auth._hash_capacity <= settings.THREADPOOL_LIMIT // 2
+    assert auth._hash_capacity <= settings.DB_POOL_SIZE // 2
+
+
+def test_register_login_and_rehash(client, make_user, monkeypatch):
+    r = client.post("/register", json={"email": "nuevo@example.com", "password": PASSWORD})
+    assert r.status_code == 200, r.text
+    assert client.post("/register", json={"email": "nuevo@example.com", "password": PASSWORD}).status_code == 400
+    assert client.post("/login", json={"email": "nuevo@example.com", "password": "Otra12345"}).status_code == 401
+
+    # Un hash con otro costo se reemplaza al hacer login
+    from passlib.hash import bcrypt
+
+    from app import database, models
+
+    with database.SessionLocal() as db:
+        user = db.query(models.User).filter_by(email="nuevo@example.com").one()
+        user.hashed_password = bcrypt.using(rounds=5).hash(PASSWORD)
+        db.commit()
+        old_hash = user.hashed_password
+    r = client.post("/login", json={"email": "nuevo@example.com", "password": PASSWORD})
+    assert r.status_code == 200, r.text
+    with database.SessionLocal() as db:
+        new_hash = db.query(models.User).filter_by(email="nuevo@example.com").one().hashed_password
+    assert new_hash != old_hash
+    assert auth.get_pwd_context().verify(PASSWORD, new_hash)
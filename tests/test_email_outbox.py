@@ -0,0 +1,98 @@
+"""
+Outbox de correo contra un servidor SMTP local (aiosmtpd).
+
+Verifica que los correos encolados se entregan por lotes sobre una conexión
+reutilizada y que un rechazo temporal se reintenta.
+"""
+import asyncio
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app import email_utils
+from app.config import settings
+
+
+class RecordingHandler:
+    def __init__(self, reject_first=0):
+        self.messages = []
+        self.sessions = set()
+        self.reject_first = reject_first
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reject_first > 0:
+            self.reject_first -= 1
+            return "451 Intenta más tarde"
+        self.sessions.add(id(session))
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    servers = []
+
+    def start(**handler_kwargs):
+        handler = RecordingHandler(**handler_kwargs)
+        controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        servers.append(controller)
+        monkeypatch.setattr(settings, "SMTP_SERVER", "127.0.0.1")
+        monkeypatch.setattr(settings, "SMTP_PORT", controller.port)
+        monkeypatch.setattr(settings, "SMTP_USE_TLS", False)
+        monkeypatch.setattr(settings, "SMTP_USER", "tienda@example.com")
+        monkeypatch.setattr(settings, "SMTP_PASS", "secreto")
+        return handler
+
+    yield start
+    for controller in servers:
+        controller.stop()
+
+
+def test_outbox_delivers_batches_over_one_connection(smtp_server, monkeypatch):
+    handler = smtp_server()
+    monkeypatch.setattr(settings, "SMTP_BATCH_SIZE", 10)
+    outbox = email_utils.EmailOutbox()
+    monkeypatch.setattr(email_utils, "outbox", outbox)
+
+    async def scenario():
+        outbox.start()
+        results = await asyncio.gather(*(
+            email_utils.send_reset_code_email(f"cliente{i}@example.com", f"{i:06d}") for i in range(25)
+        ))
+        await outbox.stop(timeout=10)
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert all(results)
+    assert sorted(e.rcpt_tos[0] for e in handler.messages) == sorted(f"cliente{i}@example.com" for i in range(25))
+    # 25 correos en 3 lotes, todos sobre la misma conexión SMTP
+    assert len(handler.sessions) == 1
+
+
+def test_outbox_retries_temporary_failures(smtp_server, monkeypatch):
+    handler = smtp_server(reject_first=2)
+    monkeypatch.setattr(settings, "SMTP_RETRY_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "SMTP_MAX_RETRIES", 5)
+    outbox = email_utils.EmailOutbox()
+
+    async def scenario():
+        outbox.start()
+        assert outbox.enqueue(email_utils._build_message("Prueba", "cliente@example.com", "hola"))
+        for _ in range(200):
+            if handler.messages:
+                break
+            await asyncio.sleep(0.01)
+        await outbox.stop(timeout=5)
+
+    asyncio.run(scenario())
+
+    assert [e.rcpt_tos for e in handler.messages] == [["cliente@example.com"]]
@@ -0,0 +1,20 @@
+"""
+El event loop sigue atendiendo peticiones mientras corre una importación grande.
+
+Reutiliza el escenario de ``benchmarks/event_loop.py`` con una carga menor: un
+``POST /furniture/batch`` con imágenes en base64 y, en paralelo, sondeos a ``GET /``.
+"""
+import asyncio
+
+from benchmarks.event_loop import run
+
+
+def test_event_loop_keeps_serving_during_batch_import():
+    result = asyncio.run(run(items=40, image_kb=256, images_per_item=2, probe_interval=0.01))
+
+    assert result["import_status"] == 201
+    assert result["probes_completed"] >= 5, result
+    # Con el loop bloqueado el hueco sin sondeos duraría toda la importación. Se deja
+    # margen para las pausas del GIL (decodificar JSON en el threadpool) en CI de 1 CPU
+    assert result["max_gap_ms"] <= 0.5 * result["import_seconds"] * 1000, result
+    assert result["probe_max_ms"] <= 0.5 * result["import_seconds"] * 1000, result
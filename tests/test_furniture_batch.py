@@ -0,0 +1,46 @@
+"""
+Alta de muebles en lote: todo o nada, errores por ítem y sentencias fijas.
+"""
+from conftest import image_data_url
+
+
+def _item(name, category_id=1, images=None):
+    return {"name": name, "price": 100, "category_id": category_id, "images": images or []}
+
+
+def test_batch_reports_every_failing_item_and_creates_nothing(client, admin_headers, category_id):
+    assert client.post("/furniture/", json=_item("sillón"), headers=admin_headers).status_code == 201
+
+    batch = [
+        _item("mesa"),
+        _item("sillón"),                              # ya existe
+        _item("silla", category_id=99),               # categoría inexistente
+        _item("mesa"),                                # repetido dentro del lote
+        _item("lámpara", images=["no es base64!"]),   # imagen inválida
+    ]
+    r = client.post("/furniture/batch", json=batch, headers=admin_headers)
+    assert r.status_code == 400, r.text
+    errors = r.json()["detail"]["errors"]
+    assert [(e["index"], e["status_code"]) for e in errors] == [(1, 409), (2, 404), (3, 409), (4, 400)]
+    assert [f["name"] for f in client.get("/furniture/").json()] == ["sillón"]
+
+
+def test_batch_with_a_single_error_kind_uses_its_status(client, admin_headers, category_id):
+    r = client.post("/furniture/batch", json=[_item("mesa"), _item("silla", category_id=99)], headers=admin_headers)
+    assert r.status_code == 404
+    assert r.json()["detail"]["errors"][0]["index"] == 1
+
+
+def test_batch_statement_count_does_not_grow_with_size(db_engine, category_id, statements):
+    from app import crud_furniture, database, schemas
+
+    def insert(prefix, count):
+        items = [schemas.FurnitureCreate(**_item(f"{prefix} {i}", images=[image_data_url(i)])) for i in range(count)]
+        statements.clear()
+        with database.SessionLocal() as db:
+            created = crud_furniture.create_furniture_batch(db, items)
+            assert len(created) == count
+        return len(statements)
+
+    small, large = insert("chico", 3), insert("grande", 60)
+    assert small == large, (small, large)
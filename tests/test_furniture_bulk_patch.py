@@ -0,0 +1,66 @@
+"""
+Cambios masivos de stock/precio con UPDATE ... CASE por bloques.
+"""
+import pytest
+
+from app import crud_furniture, database, models, schemas
+
+
+@pytest.fixture
+def furniture_ids(db_engine, category_id):
+    rows = [{"id": i, "name": f"mueble {i}", "price": 100, "category_id": category_id, "stock": 1} for i in range(1, 6)]
+    with db_engine.begin() as conn:
+        conn.execute(models.Furniture.__table__.insert(), rows)
+    return [r["id"] for r in rows]
+
+
+def _state(db_engine):
+    with db_engine.connect() as conn:
+        rows = conn.execute(models.Furniture.__table__.select().order_by(models.Furniture.id))
+        return {r.id: (r.stock, float(r.price)) for r in rows}
+
+
+def test_bulk_patch_updates_by_id_and_reports_missing(client, admin_headers, furniture_ids, db_engine):
+    r = client.patch("/furniture/bulk", headers=admin_headers, json={"items": [
+        {"id": 1, "stock": 10},
+        {"id": 2, "price": 55.5},
+        {"id": 3, "stock": 7, "price": 80},
+        {"id": 1, "stock": 12},          # repetido: gana el último valor
+        {"id": 999, "stock": 1},
+    ]})
+    assert r.status_code == 200, r.text
+    assert r.json() == {"requested": 4, "updated": 3, "not_found": [999]}
+    state = _state(db_engine)
+    assert state[1] == (12, 100.0)
+    assert state[2] == (1, 55.5)
+    assert state[3] == (7, 80.0)
+    assert state[4] == (1, 100.0)
+
+
+def test_bulk_patch_runs_one_update_per_chunk(furniture_ids, statements, monkeypatch, db_engine):
+    monkeypatch.setattr(crud_furniture, "_BULK_PATCH_CHUNK", 2)
+    items = [schemas.FurniturePatchItem(id=i, stock=20 + i) for i in furniture_ids]
+    with database.SessionLocal() as db:
+        statements.clear()
+        result = crud_furniture.bulk_patch_furniture(db, items)
+
+    assert result["updated"] == 5
+    updates = [s for s in statements if s.lstrip().startswith("UPDATE")]
+    selects = [s for s in statements if s.lstrip().startswith("SELECT")]
+    assert len(updates) == 3
+    assert len(selects) == 3
+    assert all("CASE" in s for s in updates)
+    assert _state(db_engine)[5] == (25, 100.0)
+
+
+def test_category_price_adjustment(client, admin_headers, furniture_ids, db_engine, category_id):
+    r = client.patch(f"/furniture/categories/{category_id}/prices", json={"percent": 10}, headers=admin_headers)
+    assert r.status_code == 200, r.text
+    assert r.json() == {"category_id": category_id, "percent": 10, "updated": 5}
+    assert {price for _, price in _state(db_engine).values()} == {110.0}
+
+    # El precio nunca baja de 0.01
+    client.patch(f"/furniture/categories/{category_id}/prices", json={"percent": -99.999}, headers=admin_headers)
+    assert {price for _, price in _state(db_engine).values()} == {0.01}
+
+    assert client.patch("/furniture/categories/99/prices", json={"percent": 5}, headers=admin_headers).status_code == 404
@@ -0,0 +1,52 @@
+"""
+Borrado en cascada con 3 DELETE masivos y rutas de escritura sin cargar blobs.
+"""
+import pytest
+from sqlalchemy import func, select
+
+from app import crud_furniture, database, models, schemas
+from conftest import image_data_url
+
+
+@pytest.fixture
+def sofa(db_engine, category_id):
+    item = schemas.FurnitureCreate(name="sillón", price=100, category_id=category_id,
+                                   images=[image_data_url(i) for i in range(3)])
+    with database.SessionLocal() as db:
+        furniture_id = crud_furniture.create_furniture_batch(db, [item])[0].id
+        db.add_all([models.Post(title=f"Oferta {i}", content="Rebaja", furniture_id=furniture_id) for i in range(2)])
+        db.commit()
+    return furniture_id
+
+
+def _count(db_engine, column, furniture_id):
+    with db_engine.connect() as conn:
+        return conn.execute(select(func.count()).where(column == furniture_id)).scalar()
+
+
+def test_delete_removes_children_with_three_statements(sofa, db_engine, statements):
+    with database.SessionLocal() as db:
+        statements.clear()
+        assert crud_furniture.delete_furniture(db, sofa) is True
+
+    assert [s.split()[0] for s in statements] == ["DELETE", "DELETE", "DELETE"]
+    assert _count(db_engine, models.Furniture.id, sofa) == 0
+    assert _count(db_engine, models.FurnitureImage.furniture_id, sofa) == 0
+    assert _count(db_engine, models.Post.furniture_id, sofa) == 0
+
+
+def test_delete_endpoint(client, admin_headers, sofa):
+    assert client.delete(f"/furniture/{sofa}", headers=admin_headers).status_code == 204
+    assert client.get(f"/furniture/{sofa}").status_code == 404
+    assert client.delete(f"/furniture/{sofa}", headers=admin_headers).status_code == 404
+
+
+def test_update_does_not_load_posts_or_image_blobs(sofa, db_engine, statements):
+    with database.SessionLocal() as db:
+        statements.clear()
+        updated = crud_furniture.update_furniture(db, sofa, schemas.FurnitureUpdate(price=150, stock=3))
+        assert float(updated.price) == 150
+
+    write_path = statements[:next(i for i, s in enumerate(statements) if s.startswith("UPDATE furniture"))]
+    assert write_path, statements
+    assert not any("posts" in s or "furniture_images" in s or "img_base64" in s for s in write_path), write_path
@@ -0,0 +1,67 @@
+"""
+Exportación del catálogo en streaming: keyset por id y sin leer blobs.
+"""
+import csv
+import io
+import json
+
+import pytest
+
+from app import crud_furniture, database, models, schemas
+from conftest import image_data_url
+
+
+@pytest.fixture
+def catalog(db_engine, category_id):
+    items = [
+        schemas.FurnitureCreate(name=f"mueble {i}", price=100 + i, category_id=category_id,
+                                images=[image_data_url(2 * i), image_data_url(2 * i + 1)])
+        for i in range(5)
+    ]
+    with database.SessionLocal() as db:
+        ids = [f.id for f in crud_furniture.create_furniture_batch(db, items)]
+        db.add(models.Post(title="Oferta", content="Rebaja", furniture_id=ids[0]))
+        db.commit()
+    return ids
+
+
+def test_ndjson_export_lists_everything_in_id_order(client, admin_headers, catalog):
+    r = client.get("/furniture/export?include_posts=true", headers=admin_headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["id"] for row in rows] == catalog
+    first = rows[0]
+    assert first["category"] == "sala"
+    assert "img_base64" not in first
+    assert [sorted(image) for image in first["images"]] == [["id", "mime", "position", "sha256", "size_bytes"]] * 2
+    assert [p["title"] for p in first["posts"]] == ["Oferta"]
+    assert rows[1]["posts"] == []
+
+
+def test_csv_export_joins_image_references(client, admin_headers, catalog):
+    r = client.get("/furniture/export?format=csv", headers=admin_headers)
+    assert r.status_code == 200
+    assert 'filename="furniture.csv"' in r.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [int(row["id"]) for row in rows] == catalog
+    assert len(rows[0]["image_ids"].split("|")) == 2
+    assert "post_ids" not in rows[0]
+
+
+def test_export_pages_by_keyset_without_blobs(catalog, statements):
+    with database.ReadSessionLocal() as db:
+        statements.clear()
+        ids = [item["id"] for item in crud_furniture.iter_furniture_export(db, page_size=2)]
+
+    assert ids == catalog
+    furniture_queries = [s for s in statements if s.lstrip().startswith("SELECT furniture.id")]
+    # 3 páginas con datos y una vacía que termina el recorrido
+    assert len(furniture_queries) == 4
+    assert all("WHERE furniture.id > ?" in s and "LIMIT" in s for s in furniture_queries)
+    assert not any("img_base64" in s or "furniture_images.bytes" in s for s in statements)
+
+
+def test_export_requires_admin(client, make_user):
+    assert client.get("/furniture/export").status_code == 401
+    assert client.get("/furniture/export", headers=make_user("cliente@example.com")).status_code == 403
@@ -0,0 +1,82 @@
+"""
+Reordenar y borrar imágenes con sentencias de solo (id, position).
+"""
+import pytest
+from sqlalchemy import select
+
+from app import crud_furniture, database, models, schemas
+from conftest import image_data_url
+
+
+@pytest.fixture
+def furniture(db_engine, category_id):
+    items = [
+        schemas.FurnitureCreate(name="sillón", price=100, category_id=category_id,
+                                images=[image_data_url(i) for i in range(12)]),
+        schemas.FurnitureCreate(name="mesa", price=100, category_id=category_id, images=[image_data_url(99)]),
+    ]
+    with database.SessionLocal() as db:
+        created = crud_furniture.create_furniture_batch(db, items)
+        return [f.id for f in created]
+
+
+def _images(db_engine, furniture_id):
+    image = models.FurnitureImage
+    with db_engine.connect() as conn:
+        return [tuple(r) for r in conn.execute(
+            select(image.id, image.position).where(image.furniture_id == furniture_id).order_by(image.position)
+        )]
+
+
+def _legacy_cover(db_engine, furniture_id):
+    with db_engine.connect() as conn:
+        return conn.execute(select(models.Furniture.img_base64).where(models.Furniture.id == furniture_id)).scalar()
+
+
+def test_reorder_moves_images_and_resyncs_cover(client, admin_headers, furniture, db_engine):
+    sofa = furniture[0]
+    ids = [i for i, _ in _images(db_engine, sofa)]
+    r = client.patch(f"/furniture/{sofa}/images/order", json={str(ids[-1]): 0}, headers=admin_headers)
+    assert r.status_code == 204, r.text
+    # La imagen movida queda primera y las demás conservan su orden relativo
+    assert [i for i, _ in _images(db_engine, sofa)] == [ids[-1]] + ids[:-1]
+    assert [p for _, p in _images(db_engine, sofa)] == list(range(12))
+    assert _legacy_cover(db_engine, sofa) == image_data_url(11)
+
+
+def test_reorder_and_delete_use_a_fixed_number_of_statements(furniture, db_engine, statements):
+    sofa = furniture[0]
+    ids = [i for i, _ in _images(db_engine, sofa)]
+
+    with database.SessionLocal() as db:
+        statements.clear()
+        # Invertir todo sin tocar la portada: ninguna lectura de blobs
+        crud_furniture.reorder_images(db, sofa, {ids[0]: 0, **{ids[i]: 12 - i for i in range(1, 12)}})
+        assert len(statements) <= 6, statements
+        assert not any("furniture_images.bytes" in s for s in statements)
+
+        statements.clear()
+        crud_furniture.delete_image(db, sofa, ids[0])
+        assert len(statements) <= 7, statements
+
+    remaining = _images(db_engine, sofa)
+    assert [p for _, p in remaining] == list(range(11))
+    assert ids[0] not in [i for i, _ in remaining]
+    assert _legacy_cover(db_engine, sofa) is not None
+
+
+def test_foreign_or_missing_images_are_rejected(client, admin_headers, furniture, db_engine):
+    sofa, table = furniture
+    table_image = _images(db_engine, table)[0][0]
+    r = client.patch(f"/furniture/{sofa}/images/order", json={str(table_image): 0}, headers=admin_headers)
+    assert r.status_code == 400
+    assert client.delete(f"/furniture/{sofa}/images/{table_image}", headers=admin_headers).status_code == 404
+    assert client.delete(f"/furniture/999/images/{table_image}", headers=admin_headers).status_code == 404
+
+
+def test_deleting_the_last_image_clears_the_cover(client, admin_headers, furniture, db_engine):
+    table = furniture[1]
+    image_id = _images(db_engine, table)[0][0]
+    assert client.delete(f"/furniture/{table}/images/{image_id}", headers=admin_headers).status_code == 204
+    assert _images(db_engine, table) == []
+    assert _legacy_cover(db_engine, table) is None
@@ -0,0 +1,60 @@
+"""
+Importación NDJSON en streaming: errores por línea, bloques confirmados y 413.
+"""
+import json
+
+import app.furniture_router as furniture_router
+
+
+def _line(name, **extra):
+    return json.dumps({"name": name, "price": 100, "category_id": 1, **extra})
+
+
+def _names(client):
+    return sorted(f["name"] for f in client.get("/furniture/").json())
+
+
+def test_import_reports_errors_by_line_and_keeps_good_lines(client, admin_headers, category_id):
+    body = "\n".join([
+        _line("sillón"),
+        "{no es json",
+        _line("mesa", price=-5),          # falla la validación
+        "",                               # las líneas vacías solo cuentan
+        _line("silla", category_id=99),   # categoría inexistente
+        _line("sillón"),                  # duplicado del primero
+        _line("lámpara"),
+    ])
+    r = client.post("/furniture/import?chunk_size=2", content=body, headers=admin_headers)
+    assert r.status_code == 200, r.text
+    summary = r.json()
+    assert summary["lines"] == 7
+    assert summary["created"] == 2
+    assert summary["failed"] == 4
+    assert [(e["line"], e["status_code"]) for e in summary["errors"]] == [(2, 400), (3, 422), (5, 404), (6, 409)]
+    assert _names(client) == ["lámpara", "sillón"]
+
+
+def test_reported_errors_are_truncated(client, admin_headers, category_id, monkeypatch):
+    monkeypatch.setattr(furniture_router, "IMPORT_MAX_REPORTED_ERRORS", 2)
+    body = "\n".join(["{malo"] * 5 + [_line("sillón")])
+    summary = client.post("/furniture/import", content=body, headers=admin_headers).json()
+    assert summary["failed"] == 5
+    assert len(summary["errors"]) == 2
+    assert summary["errors_truncated"] is True
+    assert summary["created"] == 1
+
+
+def test_oversized_line_is_rejected_after_committed_chunks(client, admin_headers, category_id, monkeypatch):
+    monkeypatch.setattr(furniture_router, "IMPORT_MAX_LINE_BYTES", 1024)
+    body = _line("sillón") + "\n" + _line("mesa") + "\n" + "x" * 4096
+
+    r = client.post("/furniture/import?chunk_size=1", content=body, headers=admin_headers)
+    assert r.status_code == 413
+    assert "Línea 3" in r.json()["detail"]
+    # Los bloques confirmados antes de la línea gigante se conservan
+    assert _names(client) == ["mesa", "sillón"]
+
+
+def test_import_requires_admin(client, make_user, category_id):
+    headers = make_user("cliente@example.com")
+    assert client.post("/furniture/import", content=_line("sillón"), headers=headers).status_code == 403
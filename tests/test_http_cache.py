@@ -0,0 +1,40 @@
+"""
+Validadores HTTP del catálogo: 304 con el ETag y Last-Modified solo en el detalle.
+"""
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+
+def _create(client, headers, category_id, name):
+    r = client.post("/furniture/", json={"name": name, "price": 100, "category_id": category_id}, headers=headers)
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def test_list_ignores_if_modified_since_after_a_delete(client, admin_headers, category_id):
+    first = _create(client, admin_headers, category_id, "sillón")
+    _create(client, admin_headers, category_id, "mesa")
+
+    r = client.get("/furniture/")
+    assert r.status_code == 200
+    assert "Last-Modified" not in r.headers
+    etag = r.headers["ETag"]
+    assert client.get("/furniture/", headers={"If-None-Match": etag}).status_code == 304
+
+    # Borrar no adelanta max(updated_at): solo la cuenta del ETag detecta el cambio
+    assert client.delete(f"/furniture/{first}", headers=admin_headers).status_code == 204
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(days=1), usegmt=True)
+    r = client.get("/furniture/", headers={"If-Modified-Since": future})
+    assert r.status_code == 200
+    assert [item["name"] for item in r.json()] == ["mesa"]
+    assert client.get("/furniture/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_detail_keeps_last_modified(client, admin_headers, category_id):
+    furniture_id = _create(client, admin_headers, category_id, "sillón")
+
+    r = client.get(f"/furniture/{furniture_id}")
+    assert r.status_code == 200
+    last_modified = r.headers["Last-Modified"]
+    assert client.get(f"/furniture/{furniture_id}", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get(f"/furniture/{furniture_id}", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
@@ -0,0 +1,83 @@
+"""
+Bytes de imagen: desde la DB, desde disco (FileResponse) o vía X-Accel-Redirect.
+"""
+import base64
+
+import pytest
+
+from app import crud_furniture, database, image_store, models, schemas
+from app.config import settings
+from conftest import image_data_url
+
+DATA_URL = image_data_url(7)
+IMAGE_BYTES = base64.b64decode(DATA_URL.split(",", 1)[1])
+
+
+@pytest.fixture
+def image(db_engine, category_id):
+    item = schemas.FurnitureCreate(name="sillón", price=100, category_id=category_id, images=[DATA_URL])
+    with database.SessionLocal() as db:
+        crud_furniture.create_furniture_batch(db, [item])
+        row = db.query(models.FurnitureImage.id, models.FurnitureImage.sha256).one()
+    return row.id, row.sha256
+
+
+def _blob_reads(statements):
+    return [s for s in statements if "furniture_images.bytes" in s]
+
+
+def test_served_from_db_without_storage_dir(client, image, monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_DIR", "")
+    r = client.get(f"/images/{image[0]}/content")
+    assert r.status_code == 200
+    assert r.content == IMAGE_BYTES
+    assert r.headers["content-type"] == "image/png"
+    assert r.headers["content-length"] == str(len(IMAGE_BYTES))
+
+
+def test_file_response_writes_once_and_then_skips_the_blob(client, image, monkeypatch, tmp_path, statements):
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "IMAGE_ACCEL_REDIRECT_PREFIX", "")
+    image_id, sha = image
+
+    statements.clear()
+    first = client.get(f"/images/{image_id}/content")
+    assert first.status_code == 200
+    assert first.content == IMAGE_BYTES
+    assert len(_blob_reads(statements)) == 1
+    rel = image_store.relative_path(sha, "image/png")
+    assert rel.endswith(".png")
+    assert (tmp_path / rel).read_bytes() == IMAGE_BYTES
+
+    statements.clear()
+    second = client.get(f"/images/{image_id}/content")
+    assert second.content == IMAGE_BYTES
+    assert _blob_reads(statements) == []
+
+
+def test_accel_redirect_returns_only_headers(client, image, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "IMAGE_ACCEL_REDIRECT_PREFIX", "/_images/")
+    image_id, sha = image
+
+    r = client.get(f"/images/{image_id}/content")
+    assert r.status_code == 200
+    assert r.content == b""
+    assert r.headers["X-Accel-Redirect"] == "/_images/" + image_store.relative_path(sha, "image/png")
+    assert r.headers["content-type"] == "image/png"
+
+
+def test_unwritable_storage_falls_back_to_db(client, image, monkeypatch, tmp_path):
+    blocker = tmp_path / "no-es-directorio"
+    blocker.write_text("x")
+    monkeypatch.setattr(settings, "IMAGE_STORAGE_DIR", str(blocker))
+    monkeypatch.setattr(settings, "IMAGE_ACCEL_REDIRECT_PREFIX", "/_images/")
+
+    r = client.get(f"/images/{image[0]}/content")
+    assert r.status_code == 200
+    assert "X-Accel-Redirect" not in r.headers
+    assert r.content == IMAGE_BYTES
+
+
+def test_missing_image_is_404(client, db_engine):
+    assert client.get("/images/999/content").status_code == 404
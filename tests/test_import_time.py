@@ -0,0 +1,23 @@
+"""
+Presupuesto de arranque: ``import app.main`` en un intérprete limpio.
+
+Reutiliza ``benchmarks/import_time.py``: el subproceso apunta a un MySQL
+inalcanzable, así que un import que tocara la DB falla en vez de medir.
+"""
+import os
+import statistics
+
+from benchmarks.import_time import LAZY_MODULES, measure_once
+
+# Holgado para CI compartido; el objetivo local es bastante menor
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+
+def test_import_does_not_touch_db_or_load_lazy_modules():
+    result = measure_once()
+    assert result["loaded"] == [], f"módulos perezosos cargados al importar: {result['loaded']} (de {LAZY_MODULES})"
+
+
+def test_import_time_within_budget():
+    runs = [measure_once()["seconds"] * 1000 for _ in range(3)]
+    assert statistics.median(runs) <= BUDGET_MS, f"import de app.main: {runs} ms (presupuesto {BUDGET_MS:.0f} ms)"
@@ -0,0 +1,77 @@
+"""
+Control de admisión: con el limitador del threadpool lleno se responde 503.
+
+Cubre tanto endpoints ``def`` como endpoints ``async`` que delegan su trabajo con
+``run_in_threadpool`` (alta de muebles).
+"""
+import asyncio
+import threading
+
+import anyio.to_thread
+import httpx
+
+from app.config import settings
+from app.main import app
+
+
+def test_full_threadpool_sheds_sync_and_async_endpoints(admin_headers, category_id, monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_QUEUE_LIMIT", 1)
+    gate = threading.Event()
+
+    async def scenario():
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = 1
+        # Un hilo ocupado y una tarea en cola: el limitador queda lleno
+        blockers = [asyncio.ensure_future(anyio.to_thread.run_sync(gate.wait, 10)) for _ in range(2)]
+        while limiter.statistics().tasks_waiting < 1:
+            await asyncio.sleep(0.01)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            listing = await client.get("/furniture/")
+            created = await client.post("/furniture/", json={"name": "sillón", "price": 100, "category_id": category_id},
+                                        headers=admin_headers)
+            gate.set()
+            await asyncio.gather(*blockers)
+            recovered = await client.get("/furniture/")
+        return listing, created, recovered
+
+    try:
+        listing, created, recovered = asyncio.run(scenario())
+    finally:
+        gate.set()
+
+    for response in (listing, created):
+        assert response.status_code == 503, response.text
+        assert response.headers["Retry-After"] == str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+    assert recovered.status_code == 200
+
+
+def test_admitted_import_is_not_shed_between_chunks(admin_headers, category_id, monkeypatch):
+    # Tras el primer bloque toda petición nueva se rechazaría; la importación ya
+    # admitida debe confirmar también el segundo
+    import app.furniture_router as furniture_router
+
+    original = furniture_router._import_chunk
+
+    def import_chunk(db, pending):
+        monkeypatch.setattr(settings, "ADMISSION_QUEUE_LIMIT", 0)
+        return original(db, pending)
+
+    monkeypatch.setattr(furniture_router, "_import_chunk", import_chunk)
+    body = "\n".join(
+        f'{{"name": "importado {i}", "price": 100, "category_id": {category_id}}}' for i in range(2)
+    )
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            imported = await client.post("/furniture/import?chunk_size=1", content=body, headers=admin_headers)
+            rejected = await client.get("/furniture/")
+        return imported, rejected
+
+    imported, rejected = asyncio.run(scenario())
+    assert imported.status_code == 200, imported.text
+    assert imported.json()["created"] == 2
+    assert imported.json()["chunks"] == 2
+    assert rejected.status_code == 503
@@ -0,0 +1,62 @@
+"""
+Todas las lecturas públicas del catálogo llevan X-Accel-Expires para nginx.
+"""
+import base64
+
+import pytest
+
+from app.config import settings
+
+PNG = "data:image/png;base64," + base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"\x00" * 32).decode()
+
+
+@pytest.fixture
+def catalog(client, admin_headers, category_id):
+    r = client.post("/furniture/", json={"name": "sillón", "price": 100, "category_id": category_id, "images": [PNG]},
+                    headers=admin_headers)
+    assert r.status_code == 201, r.text
+    furniture = r.json()
+    r = client.post("/posts/", json={"title": "Oferta", "content": "Sillón rebajado", "furniture_id": furniture["id"]},
+                    headers=admin_headers)
+    assert r.status_code == 201, r.text
+    return furniture, r.json()
+
+
+def test_every_anonymous_catalog_get_is_marked(client, catalog, category_id):
+    furniture, post = catalog
+    paths = [
+        "/furniture/",
+        "/furniture/search?q=sill",
+        f"/furniture/{furniture['id']}",
+        "/furniture/categories",
+        f"/furniture/categories/{category_id}",
+        f"/furniture/{furniture['id']}/posts",
+        "/posts/",
+        f"/posts/furniture/{furniture['id']}",
+        f"/posts/{post['id']}",
+    ]
+    for path in paths:
+        r = client.get(path)
+        assert r.status_code == 200, (path, r.text)
+        assert r.headers.get("X-Accel-Expires") == str(settings.NGINX_CACHE_SECONDS), path
+
+    image_id = furniture["images"][0]["id"]
+    r = client.get(f"/images/{image_id}/content")
+    assert r.status_code == 200
+    assert r.headers["X-Accel-Expires"] == str(settings.NGINX_IMAGE_CACHE_SECONDS)
+
+
+def test_authenticated_errors_and_writes_are_not_marked(client, catalog, admin_headers):
+    furniture, _ = catalog
+    assert "X-Accel-Expires" not in client.get("/furniture/", headers=admin_headers).headers
+    assert "X-Accel-Expires" not in client.get("/furniture/999999").headers
+    r = client.put(f"/furniture/{furniture['id']}", json={"price": 120}, headers=admin_headers)
+    assert r.status_code == 200, r.text
+    assert "X-Accel-Expires" not in r.headers
+
+
+def test_not_modified_keeps_the_marker_first(client, catalog):
+    etag = client.get("/furniture/").headers["ETag"]
+    r = client.get("/furniture/", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert list(r.headers.keys())[0].lower() == "x-accel-expires"
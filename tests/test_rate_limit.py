@@ -0,0 +1,99 @@
+"""
+Rate limit de login detrás del nginx del compose.
+
+Con TRUSTED_PROXIES por defecto, la IP real sale de X-Forwarded-For cuando el peer
+es la red de Docker, y un 429 se responde antes de tocar la DB o bcrypt.
+"""
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app import auth, rate_limit
+from app.config import Settings, settings
+from app.main import app
+
+# IP típica de nginx en una red de Docker Compose
+NGINX_PEER = ("172.18.0.3", 40000)
+
+
+class CountingContext:
+    def __init__(self):
+        self.calls = 0
+
+    def verify_and_update(self, password, hashed):
+        self.calls += 1
+        return False, None
+
+
+@pytest.fixture
+def limiter(db_engine, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_PER_MINUTE", 1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_BURST", 2)
+    monkeypatch.setattr(settings, "RATE_LIMIT_EMAIL_PER_MINUTE", 0)
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", Settings.TRUSTED_PROXIES)
+    monkeypatch.setattr(rate_limit, "_storage", rate_limit.MemoryBucketStorage())
+
+
+def _login(client, ip):
+    return client.post("/login", json={"email": "cliente@example.com", "password": "Incorrecta1"},
+                       headers={"X-Forwarded-For": ip})
+
+
+def test_default_trusts_compose_network(limiter):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app, client=NGINX_PEER)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            attacker = [await _login(client, "203.0.113.7") for _ in range(3)]
+            other = await _login(client, "198.51.100.20")
+        return attacker, other
+
+    attacker, other = asyncio.run(scenario())
+    assert [r.status_code for r in attacker] == [401, 401, 429]
+    # Otro cliente detrás del mismo nginx conserva su propia cubeta
+    assert other.status_code == 401
+
+
+def test_429_before_db_and_bcrypt(limiter, make_user, db_engine, monkeypatch):
+    make_user("cliente@example.com")
+    crypt = CountingContext()
+    monkeypatch.setattr(auth, "get_pwd_context", lambda: crypt)
+    checkouts = []
+    listener = lambda *args: checkouts.append(1)  # noqa: E731
+    event.listen(db_engine, "checkout", listener)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app, client=NGINX_PEER)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            allowed = [await _login(client, "203.0.113.7") for _ in range(2)]
+            before = (len(checkouts), crypt.calls)
+            rejected = await _login(client, "203.0.113.7")
+            return allowed, before, rejected
+
+    try:
+        allowed, before, rejected = asyncio.run(scenario())
+    finally:
+        event.remove(db_engine, "checkout", listener)
+
+    assert [r.status_code for r in allowed] == [401, 401]
+    assert before[1] == 2
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert (len(checkouts), crypt.calls) == before
+
+
+def test_untrusted_peer_ignores_forwarded_for(limiter, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "127.0.0.1")
+    monkeypatch.setattr(rate_limit, "_warned_untrusted_proxy", False)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app, client=NGINX_PEER)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await _login(client, f"203.0.113.{i}") for i in range(3)]
+
+    responses = asyncio.run(scenario())
+    # Todos comparten la cubeta del proxy y se avisa en el log
+    assert [r.status_code for r in responses] == [401, 401, 429]
+    assert "TRUSTED_PROXIES" in caplog.text
@@ -0,0 +1,66 @@
+"""
+Ruteo de lecturas a réplicas con dos archivos SQLite como réplicas.
+
+Cada base tiene un mueble con un nombre distinto, así que la respuesta dice qué
+base atendió la petición.
+"""
+import pytest
+from sqlalchemy import create_engine
+
+from app import database, models
+
+
+def _seed(engine, name):
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.Category.__table__.insert(), [{"id": 1, "name": "sala"}])
+        conn.execute(models.Furniture.__table__.insert(), [{"name": name, "price": 100, "category_id": 1, "stock": 1}])
+
+
+@pytest.fixture
+def replicas(tmp_path, db_engine):
+    _seed(db_engine, "primario")
+    urls = []
+    for label in ("a", "b"):
+        url = f"sqlite:///{tmp_path / f'replica-{label}.db'}"
+        engine = create_engine(url)
+        _seed(engine, f"réplica {label}")
+        engine.dispose()
+        urls.append(url)
+    database.configure_read_replicas(urls)
+    yield database.read_engines
+    database.configure_read_replicas([])
+
+
+def _served_by(client, headers=None):
+    r = client.get("/furniture/", headers=headers or {})
+    assert r.status_code == 200, r.text
+    return [item["name"] for item in r.json()]
+
+
+def test_public_reads_round_robin_across_replicas(client, replicas):
+    assert _served_by(client) == ["réplica a"]
+    assert _served_by(client) == ["réplica b"]
+    assert _served_by(client) == ["réplica a"]
+
+
+def test_authenticated_reads_stay_on_primary(client, replicas, admin_headers):
+    assert _served_by(client, admin_headers) == ["primario"]
+
+
+def test_down_replica_is_skipped(client, replicas, tmp_path):
+    database.configure_read_replicas([f"sqlite:///{tmp_path / 'no-existe' / 'replica.db'}", replicas[1].url])
+    assert _served_by(client) == ["réplica b"]
+    assert _served_by(client) == ["réplica b"]
+
+
+def test_lagging_replicas_fall_back(client, replicas, monkeypatch):
+    lag = {replicas[0]: 60.0, replicas[1]: 0.0}
+    monkeypatch.setattr(database, "_measure_lag", lambda engine: lag[engine])
+    assert _served_by(client) == ["réplica b"]
+    assert _served_by(client) == ["réplica b"]
+
+    # Sin ninguna réplica al día se lee del primario
+    lag[replicas[1]] = 60.0
+    database._replica_lag.clear()
+    assert _served_by(client) == ["primario"]
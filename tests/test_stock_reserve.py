@@ -0,0 +1,73 @@
+"""
+Reserva de stock con un UPDATE condicional: nunca se vende de más.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+
+from app import crud_furniture, database, models, schemas
+from app.main import app
+
+
+def _furniture(db_engine, stock):
+    with db_engine.begin() as conn:
+        conn.execute(models.Furniture.__table__.insert(), [{"id": 1, "name": "sillón", "price": 100, "category_id": 1,
+                                                             "stock": stock}])
+
+
+def _stock(db_engine):
+    with db_engine.connect() as conn:
+        return conn.execute(select(models.Furniture.stock).where(models.Furniture.id == 1)).scalar()
+
+
+def test_parallel_reserves_sell_exactly_the_stock(db_engine, admin_headers, category_id):
+    stock, buyers = 7, 30
+    _furniture(db_engine, stock)
+    body = {"items": [{"id": 1, "quantity": 1}]}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            return await asyncio.gather(*[
+                client.post("/furniture/stock/reserve", json=body, headers=admin_headers) for _ in range(buyers)
+            ])
+
+    responses = asyncio.run(scenario())
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(200) == stock, statuses
+    assert statuses.count(409) == buyers - stock, statuses
+    for r in responses:
+        if r.status_code == 409:
+            assert r.json()["detail"]["items"] == [{"id": 1, "requested": 1, "available": 0}]
+    assert _stock(db_engine) == 0
+
+
+def test_all_or_nothing_cart(db_engine, category_id):
+    _furniture(db_engine, 5)
+    with db_engine.begin() as conn:
+        conn.execute(models.Furniture.__table__.insert(), [{"id": 2, "name": "mesa", "price": 100, "category_id": 1,
+                                                             "stock": 1}])
+    items = [schemas.StockItem(id=1, quantity=2), schemas.StockItem(id=2, quantity=3)]
+    with database.SessionLocal() as db, pytest.raises(HTTPException) as error:
+        crud_furniture.reserve_stock(db, items)
+    assert error.value.status_code == 409
+    assert error.value.detail["items"] == [{"id": 2, "requested": 3, "available": 1}]
+    assert _stock(db_engine) == 5
+
+
+def test_conflict_reports_requested_items_when_stock_returns_meanwhile(db_engine, category_id):
+    _furniture(db_engine, 0)
+
+    def restock(session, *args):
+        # Otra transacción libera stock entre el UPDATE fallido y la relectura
+        with db_engine.begin() as conn:
+            conn.execute(models.Furniture.__table__.update().values(stock=10))
+
+    with database.SessionLocal() as db, pytest.raises(HTTPException) as error:
+        event.listen(db, "after_rollback", restock, once=True)
+        crud_furniture.reserve_stock(db, [schemas.StockItem(id=1, quantity=2)])
+    assert error.value.status_code == 409
+    assert error.value.detail["items"] == [{"id": 1, "requested": 2, "available": 10}]